@@ -0,0 +1 @@
+"""Throughput benchmarks for the static analysis tools, see benchmarks/README.md"""
@@ -0,0 +1,95 @@
+import os
+import random
+from typing import List
+
+# building blocks of the generated function bodies
+_STATEMENTS: List[str] = [
+    "{a} = {b} + {n}",
+    "{a} = [{b} * i for i in range({n})]",
+    "if {a} > {n}:\n    {b} = {a} - {n}\nelse:\n    {b} = {a} + {n}",
+    "for {c} in range({n}):\n    {a} += {c} * {b}",
+    "{a} = {{'{c}': {b}, 'count': {n}}}",
+    "while {a} < {n}:\n    {a} += 1",
+    "{a} = str({b}).upper()",
+    "try:\n    {a} = {b} / {n}\nexcept ZeroDivisionError:\n    {a} = 0",
+]
+_NAMES: List[str] = ["value", "total", "count", "item", "result", "index", "data", "size"]
+
+
+def _function(generator: random.Random, name: str, statements: int) -> List[str]:
+    lines: List[str] = ["def %s(%s, %s):" % (name, "value", "total")]
+    for _ in range(statements):
+        a, b, c = generator.sample(_NAMES, 3)
+        statement: str = generator.choice(_STATEMENTS).format(
+            a=a, b=b, c=c, n=generator.randint(1, 100)
+        )
+        lines.extend("    " + line for line in statement.splitlines())
+    lines.append("    return value")
+    lines.append("")
+    lines.append("")
+    return lines
+
+
+def generate_corpus(
+    directory: str, files: int = 10, lines: int = 500, clone_density: float = 0.2, seed: int = 0,
+) -> List[str]:
+    """Writes a corpus of python files to benchmark the tools with
+
+    Every file is a sequence of functions. A `clone_density` share of the functions are exact
+    copies of functions shared by the whole corpus, half of the remaining functions are near
+    copies of them with renamed variables. The corpus only depends on the arguments, the same
+    arguments always produce the same files.
+
+    Args:
+        directory (str): the directory the files are written to, it is created if needed
+        files (int, default=10): the number of files
+        lines (int, default=500): the approximate number of lines per file
+        clone_density (float, default=0.2): the share of functions that are exact clones,
+            between 0 and 1
+        seed (int, default=0): the seed of the random generator
+
+    Returns:
+        [str]: the paths of the generated files
+
+    Raises:
+        ValueError: If `clone_density` is not between 0 and 1
+
+    """
+    if not 0.0 <= clone_density <= 1.0:
+        raise ValueError("clone_density must be between 0 and 1")
+
+    generator: random.Random = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # the functions that are copied between the files
+    shared: List[List[str]] = [
+        _function(generator, "shared_%d" % number, generator.randint(4, 10)) for number in range(20)
+    ]
+
+    file_paths: List[str] = []
+    for file_number in range(files):
+        source: List[str] = ["import os", "import sys", "", ""]
+        function_number: int = 0
+        while len(source) < lines:
+            draw: float = generator.random()
+            if draw < clone_density:
+                function: List[str] = list(generator.choice(shared))
+                function[0] = function[0].replace("def shared_", "def clone_%d_" % function_number)
+            elif draw < clone_density + (1.0 - clone_density) / 2:
+                # a near copy: same structure, different variable names
+                old, new = generator.sample(_NAMES, 2)
+                function = [line.replace(old, new) for line in generator.choice(shared)]
+                function[0] = "def near_%d(value, total):" % function_number
+            else:
+                function = _function(
+                    generator, "function_%d" % function_number, generator.randint(3, 12)
+                )
+            source.extend(function)
+            function_number += 1
+
+        file_path: str = os.path.join(directory, "module_%03d.py" % file_number)
+        with open(file_path, "w") as corpus_file:
+            corpus_file.write("\n".join(source))
+        file_paths.append(file_path)
+
+    return file_paths
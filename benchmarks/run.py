@@ -0,0 +1,324 @@
+"""
+Benchmarks the static analysis tools and the analyzer on a generated or existing corpus.
+
+Example:
+    python -m benchmarks.run --files 50 --lines 800 --output results.json
+    python -m benchmarks.run --corpus path/to/project --compare results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from tabulate import tabulate
+
+from benchmarks.corpus import generate_corpus
+
+# the command line program each tool needs, None for tools running in-process
+TOOL_PROGRAMS: Dict[str, Optional[str]] = {
+    "checks": None,
+    "duplicate": None,
+    "pyflakes": None,
+    "vulture": "vulture",
+    "mypy": "mypy",
+    "prospector": "prospector",
+    "performance-profiler": None,
+}
+
+
+def tool_config(tool_name: str, file_paths: List[str]) -> Dict[str, Any]:
+    """Creates the configs of a tool that analyzes `file_paths`
+
+    Args:
+        tool_name (str): the name of a tool in `TOOL_PROGRAMS`
+        file_paths ([str]): the files of the corpus
+
+    Returns:
+        Dict[str, Any]: the configs passed to the tool's `load_config`
+
+    """
+    if tool_name == "duplicate":
+        return {"FilePaths": file_paths, "ignore": [], "min": 2, "one_error_per_line": 1}
+    if tool_name == "performance-profiler":
+        return {"file_paths": file_paths, "number_of_calls_thresh": 1000}
+    return {"file_paths": file_paths}
+
+
+def create_tool(tool_name: str):
+    """Creates the static tool with the name `tool_name`"""
+    from cam2_code_review_bot.static_analysis import (
+        CheckTool,
+        DuplicateTool,
+        MyPyTool,
+        PerformanceProfilerTool,
+        ProspectorTool,
+        PyflakesTool,
+        VultureTool,
+    )
+
+    tools: Dict[str, Callable] = {
+        "checks": CheckTool,
+        "duplicate": DuplicateTool,
+        "pyflakes": PyflakesTool,
+        "vulture": VultureTool,
+        "mypy": MyPyTool,
+        "prospector": ProspectorTool,
+        "performance-profiler": PerformanceProfilerTool,
+    }
+    return tools[tool_name]()
+
+
+def available_tools(tool_names: List[str]) -> List[str]:
+    """Selects the tools whose command line program is installed"""
+    return [
+        tool_name
+        for tool_name in tool_names
+        if TOOL_PROGRAMS[tool_name] is None or shutil.which(TOOL_PROGRAMS[tool_name])
+    ]
+
+
+def _run_case(case: str, tool_names: List[str], file_paths: List[str], results) -> None:
+    # runs in a fresh process so the peak memory belongs to this case only
+    from cam2_code_review_bot.static_analysis import StaticAnalyzer
+
+    analyzer: StaticAnalyzer = StaticAnalyzer()
+    for tool_name in tool_names:
+        analyzer.add_tool(create_tool(tool_name))
+        analyzer.configure_tool(tool_name, tool_config(tool_name, file_paths))
+
+    before_self = resource.getrusage(resource.RUSAGE_SELF)
+    before_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start: float = time.perf_counter()
+    errors = analyzer.run_raw(parallel=case == "analyzer-parallel")
+    wall_time: float = time.perf_counter() - start
+    after_self = resource.getrusage(resource.RUSAGE_SELF)
+    after_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    results.put(
+        {
+            "wall_time": wall_time,
+            "cpu_time": (after_self.ru_utime - before_self.ru_utime)
+            + (after_self.ru_stime - before_self.ru_stime)
+            + (after_children.ru_utime - before_children.ru_utime)
+            + (after_children.ru_stime - before_children.ru_stime),
+            # kilobytes on linux, the largest of this process and the tools it started
+            "peak_rss_kb": max(after_self.ru_maxrss, after_children.ru_maxrss),
+            "errors": len(errors),
+        }
+    )
+
+
+def measure(case: str, tool_names: List[str], file_paths: List[str], repeat: int) -> Dict[str, Any]:
+    """Runs one benchmark case `repeat` times, each time in a new process
+
+    Args:
+        case (str): the name of the case, a tool name, "analyzer" or "analyzer-parallel"
+        tool_names ([str]): the tools run by the case
+        file_paths ([str]): the corpus
+        repeat (int): the number of runs
+
+    Returns:
+        Dict[str, Any]: the median wall and CPU time in seconds, the largest peak RSS in
+            kilobytes, the number of errors and the errors reported per second
+
+    Raises:
+        RuntimeError: If a run of the case fails
+
+    """
+    context = multiprocessing.get_context("spawn")
+    runs: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        results = context.Queue()
+        process = context.Process(target=_run_case, args=(case, tool_names, file_paths, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError("benchmark case [%s] failed with code %s" % (case, process.exitcode))
+        runs.append(results.get())
+
+    wall_time: float = statistics.median(run["wall_time"] for run in runs)
+    errors: int = runs[-1]["errors"]
+    return {
+        "wall_time": wall_time,
+        "cpu_time": statistics.median(run["cpu_time"] for run in runs),
+        "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+        "errors": errors,
+        "errors_per_second": errors / wall_time if wall_time > 0 else 0.0,
+        "runs": repeat,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.run(
+                ["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            .stdout.decode()
+            .strip()
+            or None
+        )
+    except OSError:
+        return None
+
+
+def run_benchmarks(
+    file_paths: List[str], tool_names: List[str], repeat: int = 3, analyzer: bool = True
+) -> Dict[str, Dict[str, Any]]:
+    """Benchmarks every tool on its own and, if `analyzer` is set, all of them together
+
+    Args:
+        file_paths ([str]): the corpus
+        tool_names ([str]): the tools being benchmarked
+        repeat (int, default=3): the number of runs of every case
+        analyzer (bool, default=True): also run the full analyzer, sequentially and in parallel
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the measurements of every case (see `measure`)
+
+    """
+    cases: Dict[str, List[str]] = {tool_name: [tool_name] for tool_name in tool_names}
+    if analyzer and len(tool_names) > 1:
+        cases["analyzer"] = tool_names
+        cases["analyzer-parallel"] = tool_names
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for case, case_tools in cases.items():
+        results[case] = measure(case, case_tools, file_paths, repeat)
+        print("%-20s %8.3fs" % (case, results[case]["wall_time"]), file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Prints the change of every case against a baseline results file
+
+    Args:
+        results (Dict[str, Any]): the current results file content
+        baseline (Dict[str, Any]): the baseline results file content
+        threshold (float): the relative slowdown of the wall time treated as a regression
+
+    Returns:
+        bool: True if no case regressed
+
+    """
+    rows = []
+    passed: bool = True
+    for case, current in results["results"].items():
+        previous: Optional[Dict[str, Any]] = baseline["results"].get(case)
+        if previous is None:
+            rows.append([case, None, current["wall_time"], None, ""])
+            continue
+        change: float = current["wall_time"] / previous["wall_time"] - 1.0
+        regressed: bool = change > threshold
+        passed = passed and not regressed
+        rows.append(
+            [
+                case,
+                previous["wall_time"],
+                current["wall_time"],
+                "%+.1f%%" % (change * 100),
+                "REGRESSION" if regressed else "",
+            ]
+        )
+    print(
+        tabulate(
+            rows,
+            ["Case", "Baseline Wall (s)", "Wall (s)", "Change", ""],
+            tablefmt="github",
+            floatfmt=".3f",
+        )
+    )
+    return passed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--corpus", help="benchmark an existing directory instead of a generated corpus"
+    )
+    parser.add_argument("--files", type=int, default=10, help="generated files")
+    parser.add_argument("--lines", type=int, default=500, help="lines per generated file")
+    parser.add_argument(
+        "--clone-density", type=float, default=0.2, help="share of cloned functions, 0 to 1"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated corpus")
+    parser.add_argument(
+        "--tools",
+        nargs="+",
+        choices=sorted(TOOL_PROGRAMS),
+        default=sorted(TOOL_PROGRAMS),
+        help="tools to benchmark, tools that are not installed are skipped",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every case")
+    parser.add_argument("--no-analyzer", action="store_true", help="only benchmark single tools")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results to a previous results file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown reported as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    tool_names: List[str] = available_tools(args.tools)
+    skipped: List[str] = sorted(set(args.tools) - set(tool_names))
+    if skipped:
+        print("skipping tools that are not installed: " + ", ".join(skipped), file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.corpus:
+            corpus: Dict[str, Any] = {"path": os.path.abspath(args.corpus)}
+            file_paths: List[str] = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(args.corpus)
+                for name in names
+                if name.endswith(".py")
+            )
+        else:
+            corpus = {
+                "files": args.files,
+                "lines": args.lines,
+                "clone_density": args.clone_density,
+                "seed": args.seed,
+            }
+            file_paths = generate_corpus(
+                directory, args.files, args.lines, args.clone_density, args.seed
+            )
+
+        results: Dict[str, Any] = {
+            "metadata": {
+                "commit": _commit(),
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "corpus": dict(corpus, total_files=len(file_paths)),
+                "skipped": skipped,
+            },
+            "results": run_benchmarks(file_paths, tool_names, args.repeat, not args.no_analyzer),
+        }
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r") as baseline_file:
+            baseline: Dict[str, Any] = json.load(baseline_file)
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,17 @@
 import asyncio
+import functools
 import os
 import json
-import threading
 import logging
 
-import aiohttp
 from quart import Quart, request, jsonify, render_template, send_from_directory
 import quart
-from gidgethub.aiohttp import GitHubAPI
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 import cam2_code_review_bot.commands as commands
 import cam2_code_review_bot.utils as utils
 import cam2_code_review_bot.dynamodb as dynamodb
+import cam2_code_review_bot.jobs as jobs
 
 from cam2_code_review_bot.commands import (
     is_registered_command,
@@ -23,8 +22,10 @@ from cam2_code_review_bot.commands import (
 
 app = Quart(__name__)
 
-# Establishes a lock to force sections of code to function synchronously
-key_lock = threading.Lock()
+# the actions of pull_request events that change the head commit of the pull request
+PUSH_ACTIONS: List[str] = ["opened", "reopened", "synchronize"]
+# seconds between two reads of the attempts finished by the worker pool
+ATTEMPTS_INTERVAL: float = 5.0
 
 
 @app.before_serving
@@ -33,9 +34,14 @@ async def create_session() -> None:
     Gets the following;
         * Github OAUTH Token
         * bot's name
-        * aiohttp session
-        * gidgethub object
-    
+        * aiohttp session, its connections are kept alive and shared by every command
+        * gidgethub object, shared by every command
+        * job queue shared with the worker pool (see worker.py)
+        * task scheduler running the other commands in the background
+        * caches of the handled deliveries, of the recently started commands and of the head
+          commits of the pull requests, and the lock the deliveries are handled under
+        * the task recording the attempts finished by the worker pool in the metrics
+
     Initalizes the following in DynamoDB:
         * Defects table
         * Issues table
@@ -45,28 +51,90 @@ async def create_session() -> None:
     Returns:
         None
     """
-    github_oauth_token = os.getenv("GITHUBTOKEN")
     app.bot_name = os.getenv("BOT_NAME")
-    app.session = aiohttp.ClientSession()
-    app.gh = None
+    app.session = utils.Github.create_session()
+    app.gh = utils.Github.create_api(app.session)
+    utils.Github.initialize(app.gh, app.session)
+    app.job_queue = jobs.JobQueue(os.getenv("OPTIMUS_QUEUE_PATH", "optimus_jobs.sqlite"))
+    app.task_scheduler = utils.TaskScheduler(int(os.getenv("OPTIMUS_MAX_TASKS", "8")))
+    app.deliveries = utils.TTLCache(max_entries=10000, ttl=3600.0)
+    app.coalesced = utils.TTLCache(
+        max_entries=1000, ttl=float(os.getenv("OPTIMUS_COALESCE_WINDOW", "10"))
+    )
+    app.head_shas = utils.TTLCache(max_entries=10000, ttl=86400.0)
+    app.webhook_lock = asyncio.Lock()
+    # attempts finished before the bot started are not reported
+    app.attempt_cursor = await run_blocking(app.job_queue.last_attempt)
+    app.attempt_recorder = asyncio.ensure_future(record_job_attempts_forever())
 
-    with key_lock:
-        dynamodb.createDefectsTable()
-        dynamodb.createIssuesTable()
-        dynamodb.createReviewersTable()
-        dynamodb.createEntryCountTable()
+    dynamodb.createDefectsTable()
+    dynamodb.createIssuesTable()
+    dynamodb.createReviewersTable()
+    dynamodb.createEntryCountTable()
 
 
 @app.after_serving
 async def destroy_session() -> None:
-    """Closes down aiohttp session properly.
+    """Waits for the running commands and closes down aiohttp session properly.
 
     Returns:
         None
     """
+    app.attempt_recorder.cancel()
+    await app.task_scheduler.shutdown(timeout=30.0)
     await app.session.close()
 
 
+def run_blocking(function, *args, **kwargs) -> "asyncio.Future":
+    """Calls a blocking function, such as a method of the job queue, in the default executor.
+
+    The job queue waits for SQLite, which can take long while the workers write to it. The
+    event loop keeps serving the other requests and commands in the meantime.
+
+    Returns:
+        asyncio.Future
+        The result of the function
+    """
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(None, functools.partial(function, *args, **kwargs))
+
+
+async def record_job_attempts() -> None:
+    """Adds the attempts the worker pool finished since the last call to `JOB_SECONDS`.
+
+    The calls to GitHub and DynamoDB made by the workers during the attempts are added to
+    `GITHUB_SECONDS` and `DYNAMODB_SECONDS`. The attempts are read after `app.attempt_cursor`,
+    the id of the last attempt recorded, and stay in the job queue for other readers.
+
+    Returns:
+        None
+    """
+    attempts = await run_blocking(app.job_queue.attempts, app.attempt_cursor)
+    for attempt_id, job, outcome, seconds, worker_metrics in attempts:
+        command: str = job.payload.get("command", job.kind)
+        utils.metrics.JOB_SECONDS.observe(seconds, command=command, outcome=outcome)
+        try:
+            utils.metrics.merge_worker_metrics(worker_metrics)
+        except (KeyError, ValueError):
+            # metrics of a worker running another version of the bot
+            logging.exception("failed to record the metrics of attempt [%d]", attempt_id)
+        app.attempt_cursor = attempt_id
+
+
+async def record_job_attempts_forever() -> None:
+    """Calls `record_job_attempts` every `ATTEMPTS_INTERVAL` seconds until it is cancelled.
+
+    Returns:
+        None
+    """
+    while True:
+        try:
+            await record_job_attempts()
+        except Exception:
+            logging.exception("failed to read the attempts of the job queue")
+        await asyncio.sleep(ATTEMPTS_INTERVAL)
+
+
 @app.route("/", methods=["GET"])
 async def index() -> quart.Response:
     """A test function.
@@ -79,53 +147,200 @@ async def index() -> quart.Response:
     return jsonify(success=True)
 
 
+@app.route("/metrics", methods=["GET"])
+async def metrics() -> quart.Response:
+    """Reports the metrics of the bot in the Prometheus text format.
+
+    See `utils.metrics` for the metrics, such as the time to handle webhooks, run commands and
+    call GitHub and DynamoDB, and the number of queued jobs. The attempts of queued commands
+    finished by the worker pool are recorded as they are read from the job queue (see
+    `record_job_attempts`), serving the metrics leaves the job queue unchanged.
+
+    Returns:
+        quart.Response
+        The metrics, as `text/plain`
+    """
+    for status, count in (await run_blocking(app.job_queue.counts)).items():
+        utils.metrics.QUEUE_DEPTH.set(count, status=status)
+    for status, count in app.task_scheduler.counts().items():
+        utils.metrics.TASKS.set(count, status=status)
+    return quart.Response(
+        utils.metrics.REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.route("/jobs/<int:job_id>", methods=["GET"])
+async def job_status(job_id: int) -> quart.Response:
+    """Reports the status of a command queued by the webhook.
+
+    Returns:
+        quart.Response
+        The job's id, kind, repository, status, attempts and last error, or `404 Not Found`
+    """
+    job = await run_blocking(app.job_queue.get, job_id)
+    if job is None:
+        return jsonify(success=False), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/tasks/<int:task_id>", methods=["GET"])
+async def task_status(task_id: int) -> quart.Response:
+    """Reports the status of a command run in the background by the webhook.
+
+    Returns:
+        quart.Response
+        The task's id, name, status, result, error and timestamps, or `404 Not Found`
+    """
+    task = app.task_scheduler.get(task_id)
+    if task is None:
+        return jsonify(success=False), 404
+    return jsonify(task.to_dict())
+
+
 @app.route("/webhook", methods=["POST"])
 async def webhook() -> quart.Response:
     """The main processing functions. Processes things that happen in PR feedback comments and issue/PR comments.
-    
+
     See the following link for documentation:
     https://github.com/PurdueCAM2Project/CAM2CodeReviewBot/tree/master/commands
-    
+
+    Commands are not run before answering, GitHub gives up on a webhook after 10 seconds.
+    Commands marked as `queued` are added to the job queue and run by the worker pool, the
+    response is then `202 Accepted` with the id of the job. Other commands and reviewer feedback
+    are run in the background by the task scheduler, the response is `202 Accepted` with the id
+    of the task. The tasks of one issue or pull request run in the order their comments arrived,
+    the tasks of different ones run in parallel.
+
+    GitHub sends a delivery again if it is redelivered, deliveries whose `X-GitHub-Delivery` id
+    was handled in the last hour are ignored. Commands marked as `coalesced` that were already
+    started for the same issue with the same arguments in the last `OPTIMUS_COALESCE_WINDOW`
+    seconds are not started again, the response has the id of the job or task already started.
+    Comments do not carry the head commit of a pull request, the webhook remembers it from the
+    `pull_request` events instead. A command asked for again after a push is started again.
+
     Returns:
         quart.Response
         A Flask response object to let Github the request was received.
     """
-    payload = await request.get_json()
+    with utils.metrics.WEBHOOK_SECONDS.time():
+        payload = await request.get_json()
+        delivery_id: Optional[str] = request.headers.get("X-GitHub-Delivery")
+        # deliveries are handled one at a time while the job queue is written to, so the same
+        # delivery or a coalesced command arriving in the meantime is not started twice
+        async with app.webhook_lock:
+            if delivery_id is not None and delivery_id in app.deliveries:
+                utils.metrics.WEBHOOK_DELIVERIES.inc(result="duplicate")
+                return jsonify(success=True, duplicate=True)
+
+            response = await handle_payload(payload)
+            if delivery_id is not None:
+                app.deliveries.add(delivery_id)
+        utils.metrics.WEBHOOK_DELIVERIES.inc(result="handled")
+        return response
+
+
+async def handle_payload(payload: Dict[str, Any]) -> quart.Response:
+    """Starts the command of a comment, see `webhook`.
+
+    Returns:
+        quart.Response
+        A Flask response object to let Github the request was received.
+    """
+    if "pull_request" in payload.keys() and payload.get("action") in PUSH_ACTIONS:
+        pull_request: Dict[str, Any] = payload["pull_request"]
+        app.head_shas.set(
+            pull_request["url"].replace("/pulls/", "/issues/"), pull_request["head"]["sha"]
+        )
+        return jsonify(success=True)
+
     if "issue" in payload.keys() and payload["action"] == "created":
-        comment_text = r["comment"]["body"]
+        comment_text = payload["comment"]["body"]
         if comment_text[: len(app.bot_name)] == app.bot_name:
             issue_url = payload["issue"]["url"]
-            command, args = utils.extract_command_and_args(comment_text[(len(app.bot_name) + 1) :])
+            command_name, args = utils.extract_command_and_args(
+                comment_text[(len(app.bot_name) + 1) :]
+            )
 
-            comment_url: str = ""
+            comment_url: str = payload["comment"]["url"]
             repo_url: str = "/repos/" + payload["repository"]["full_name"]
-            comment_data: Dict[str, Any] = {}
+            comment_data: Dict[str, Any] = payload["comment"]
+            # the same issue or pull request, whichever of both urls GitHub sent
+            issue_key: str = issue_url.replace("/pulls/", "/issues/")
 
-            async with aiohttp.ClientSession() as session:
-                gh = GitHubAPI(session, app.bot_name, oauth_token=os.getenv("GITHUBTOKEN"))
-                utils.Github.initialize(gh)
-                command_payload: CommandPayload(
-                    gh,
+            coalesce_key: Optional[str] = None
+            if is_registered_command(command_name) and get_command(command_name).coalesced:
+                # None until a pull_request event of the issue was received
+                head_sha: Optional[str] = app.head_shas.get(issue_key)
+                coalesce_key = json.dumps([issue_key, head_sha, command_name, args])
+                started: Optional[Dict[str, int]] = app.coalesced.get(coalesce_key)
+                if started is not None:
+                    utils.metrics.COALESCED_COMMANDS.inc(command=command_name)
+                    return jsonify(success=True, coalesced=True, **started), 202
+
+            if is_registered_command(command_name) and get_command(command_name).queued:
+                job_id: int = await run_blocking(
+                    app.job_queue.enqueue,
+                    jobs.COMMAND_JOB,
+                    payload["repository"]["full_name"],
+                    jobs.command_job_payload(
+                        command_name, issue_url, comment_url, repo_url, comment_data, args
+                    ),
+                )
+                if coalesce_key is not None:
+                    app.coalesced.set(coalesce_key, {"job_id": job_id})
+                return jsonify(success=True, job_id=job_id), 202
+
+            if is_registered_command(command_name) or "/pulls/" in issue_url:
+                task_id: int = app.task_scheduler.submit(
+                    command_name if is_registered_command(command_name) else "review feedback",
+                    run_comment,
+                    command_name,
                     issue_url,
-                    comment_url,  # NOTE: mocked
-                    repo_url,  
-                    comment_data,  # NOTE: mocked
+                    comment_url,
+                    repo_url,
+                    comment_data,
                     args,
+                    lane=issue_key,
                 )
-
-                if is_registered_command(command):
-                    command: Command = get_command(command)
-                    result: bool = await command.call(command_payload)
-                    return jsonify(success=result)
-
-                # else we consider it as a feedback from reviewer
-                elif "/pulls/" in issue_url:
-                    review_id = comment_data["pull_request_review_id"]
-                    review_url = issue_url + "/reviews/" + str(review_id)
-                    review_data = await gh.getitem(review_url)
-                    review_status = review_data["state"]
-                    if review_status == "APPROVED":
-                        reviewer = review_data["user"]["login"]
-                        await utils.status(app.gh, issue_url, reviewer)
+                if coalesce_key is not None:
+                    app.coalesced.set(coalesce_key, {"task_id": task_id})
+                return jsonify(success=True, task_id=task_id), 202
 
     return jsonify(success=True)
+
+
+async def run_comment(
+    command_name: str,
+    issue_url: str,
+    comment_url: str,
+    repo_url: str,
+    comment_data: Dict[str, Any],
+    args: List[str],
+) -> bool:
+    """Runs the command of a comment, or processes it as feedback from a reviewer.
+
+    Runs in the background, see `webhook`.
+
+    Returns:
+        bool
+        The result of the command, True for reviewer feedback
+    """
+    if is_registered_command(command_name):
+        command_payload: CommandPayload = CommandPayload(
+            app.gh, issue_url, comment_url, repo_url, comment_data, args,
+        )
+        command: Command = get_command(command_name)
+        with utils.metrics.COMMAND_SECONDS.time(command=command_name) as labels:
+            result: bool = await command.call(command_payload)
+            labels["outcome"] = "succeeded" if result else "failed"
+        return result
+
+    # else we consider it as a feedback from reviewer
+    review_id = comment_data["pull_request_review_id"]
+    review_url = issue_url + "/reviews/" + str(review_id)
+    review_data = await app.gh.getitem(review_url)
+    review_status = review_data["state"]
+    if review_status == "APPROVED":
+        reviewer = review_data["user"]["login"]
+        await utils.status(app.gh, issue_url, reviewer)
+    return True
@@ -11,3 +11,4 @@ from . import assign
 from . import roleslist
 from . import parentissue
 from . import show
+from . import analyze
@@ -0,0 +1,181 @@
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from cam2_code_review_bot.static_analysis import (
+    ChangedLines,
+    MyPyTool,
+    PyflakesTool,
+    ResultCache,
+    StaticAnalyzer,
+    StaticError,
+    VultureTool,
+)
+from cam2_code_review_bot.utils import Github
+from . import Command, CommandPayload, register_command
+
+# seconds after which the process of a tool is stopped
+analysis_timeout = 300.0
+
+# the results of the tools, shared by the jobs of a worker and kept on disk between them
+_result_cache: Optional[ResultCache] = None
+
+
+def result_cache() -> ResultCache:
+    """The cache of the tool results, created on first use
+
+    The results are stored in the directory set by the "OPTIMUS_CACHE_DIR" environment variable,
+    ".optimus_cache" by default, so the workers share them and keep them between restarts.
+
+    Returns:
+        ResultCache: the cache of this process
+    """
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            max_entries=512, directory=os.getenv("OPTIMUS_CACHE_DIR", ".optimus_cache")
+        )
+    return _result_cache
+
+
+def create_analyzer(directory: str, changed_lines: ChangedLines) -> StaticAnalyzer:
+    """Creates the analyzer run on the python files of a pull request
+
+    Args:
+        directory (str): the directory the files of the pull request were saved in
+        changed_lines (ChangedLines): the lines changed by the pull request, errors on other
+            lines are not reported
+
+    Returns:
+        StaticAnalyzer: the analyzer with its tools configured. The results of files that did
+            not change since an earlier run, such as a previous push, come from `result_cache`.
+    """
+    static_analyzer: StaticAnalyzer = StaticAnalyzer(
+        result_cache(), changed_lines=changed_lines, root=directory
+    )
+    for tool in [PyflakesTool(), MyPyTool(), VultureTool()]:
+        static_analyzer.add_tool(tool)
+        static_analyzer.configure_tool(
+            tool.name, {"directory": directory, "timeout": analysis_timeout}
+        )
+    return static_analyzer
+
+
+def format_errors(errors: List[StaticError], directory: str) -> str:
+    """Formats the errors of a run as one markdown table per file
+
+    Args:
+        errors ([StaticError]): the errors reported by the analyzer
+        directory (str): the directory the files of the pull request were saved in
+
+    Returns:
+        str: the markdown of the tables, the files are named by their path in the repository
+    """
+    files: Dict[str, List[StaticError]] = dict()
+    for error in errors:
+        file_path: str = os.path.relpath(error.file_path, directory) if error.file_path else ""
+        files.setdefault(file_path, []).append(error)
+    if not files:
+        return StaticAnalyzer.format_md([])
+
+    sections: List[str] = []
+    for file_path in sorted(files):
+        title: str = "#### " + file_path + "\n\n" if file_path else ""
+        sections.append(title + StaticAnalyzer.format_md(files[file_path]))
+    return "\n\n".join(sections)
+
+
+async def save_python_files(gh, files: List[Dict[str, Any]], directory: str) -> int:
+    """Saves the python files of a pull request below `directory`, keeping their paths
+
+    Removed files and paths outside of the repository are skipped.
+
+    Returns:
+        int: the number of files saved
+    """
+    saved: int = 0
+    for file in files:
+        file_path: str = os.path.normpath(file["filename"])
+        if (
+            not file_path.endswith(".py")
+            or file.get("status") == "removed"
+            or os.path.isabs(file_path)
+            or file_path.startswith(os.pardir)
+        ):
+            continue
+
+        file_data = await gh.getitem(file["contents_url"])
+        code: str = await Github.download(file_data["download_url"])
+        local_path: str = os.path.join(directory, file_path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "w", encoding="utf-8") as local_file:
+            local_file.write(code)
+        saved += 1
+    return saved
+
+
+async def analyze(gh, issue_url, args) -> bool:
+
+    # If not a pull request, there is no code to analyze
+    if "/issues/" in issue_url:
+        await gh.post(
+            issue_url + "/comments",
+            data={
+                "body": "Command failed. You cannot analyze an issue, as there is no code to analyze. You can only analyze pull requests."
+            },
+        )
+        return False
+
+    # Get the committed files in the pull request
+    committed_files = await gh.getitem(issue_url + "/files")
+    changed_lines: ChangedLines = ChangedLines.from_files_metadata(committed_files)
+
+    comments_url: str = issue_url.replace("/pulls/", "/issues/") + "/comments"
+
+    # the files are removed again even if the analysis fails
+    with tempfile.TemporaryDirectory(prefix="analyze-") as temp_dir:
+        if await save_python_files(gh, committed_files, temp_dir) == 0:
+            await gh.post(comments_url, data={"body": "No python files to analyze."})
+            return True
+
+        # the results of each tool are posted as soon as it finishes, the tools run in
+        # threads and the event loop of the worker keeps serving the requests to GitHub
+        static_analyzer: StaticAnalyzer = create_analyzer(temp_dir, changed_lines)
+        async for tool_name, errors in static_analyzer.run_stream_async():
+            await gh.post(
+                comments_url,
+                data={
+                    "body": "Static analysis of the changed lines by "
+                    + tool_name
+                    + ":\n\n"
+                    + format_errors(errors, temp_dir)
+                },
+            )
+
+    # a tool that failed did not post any results, it is marked as failed here
+    await gh.post(
+        comments_url,
+        data={
+            "body": "Static analysis has been performed.\n\n"
+            + StaticAnalyzer.format_metrics_md(static_analyzer.metrics.values())
+        },
+    )
+    return True
+
+
+class AnalyzeCommand(Command):
+    """Runs the static analysis tools on the python files changed by a pull request
+
+    Only errors on changed lines are reported. Every tool posts its results as soon as it
+    finishes, a last comment has the time each tool took. The tools can take minutes on large
+    pull requests, so the command is run by the worker pool.
+    """
+
+    queued = True
+    coalesced = True
+
+    async def call(self, command_payload: CommandPayload) -> bool:
+        return await analyze(command_payload.gh, command_payload.issue_url, command_payload.args)
+
+
+register_command("analyze", AnalyzeCommand())
@@ -36,7 +36,7 @@ async def assign(gh, issue_url, comment_url, args) -> bool:
 
     # Get the issue number and its associated database info
     issue_number = int(issue_url[issue_url.rindex("/") + 1 :])
-    issue_db_info = dynamodb.getIssue(issue_number)
+    issue_db_info = await dynamodb.run_async(dynamodb.getIssue, issue_number)
 
     # Do nothing if the current issue is not initialized in the database.
     # Notify the user that they must initialize the current issue.
@@ -90,18 +90,19 @@ async def assign(gh, issue_url, comment_url, args) -> bool:
     # 	})
 
     # Create an entry for the reviewer information in the database
-    dynamodb.createReviewer(
+    await dynamodb.run_async(
+        dynamodb.createReviewer,
         {
             "github_username": reviewer,
             "issue_number": issue_number,
             "role": role,
             "role_description": description,
-        }
+        },
     )
 
     # Update the entry for the issue in the database to include the new reviewer
     issue_db_info["reviewers"] = reviewers
-    dynamodb.updateIssue(issue_number, issue_db_info)
+    await dynamodb.run_async(dynamodb.updateIssue, issue_number, issue_db_info)
 
     # Request the new reviewer
     await gh.post(issue_url + "/requested_reviewers", data={"reviewers": reviewers})
@@ -125,4 +126,4 @@ class AssignCommand(Command):
         )
 
 
-register_command("assign", AssignCommand)
+register_command("assign", AssignCommand())
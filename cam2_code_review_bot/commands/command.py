@@ -24,8 +24,20 @@ class Command(ABC):
     # commands/__init__.py ------------------------------------------------------------------------
     from . import hello
     ```
+
+    Commands that take long, such as running static analysis, should set `queued` to True. The
+    webhook then only enqueues them and they are run by the worker pool (see `jobs.WorkerPool`).
+
+    Commands whose result only depends on the pull request, such as linting it, can set
+    `coalesced` to True. The same command with the same arguments asked for again on the same
+    issue or pull request within a short window is then run only once.
     """
 
+    # if True the command is run by a worker process instead of the webhook
+    queued: bool = False
+    # if True identical requests of the command on the same issue are merged into one run
+    coalesced: bool = False
+
     @abstractmethod
     async def call(self, payload: CommandPayload) -> bool:
         """Executes this specific command. 
@@ -3,8 +3,19 @@ import re
 from . import Command, CommandPayload, register_command
 
 
+# Sets the number of a new defect. The defect is validated first, so a defect that can not be
+# stored does not use up a number. Returns False if the defect is invalid or no number was given.
+async def numberDefect(defect):
+    if not dynamodb.isDefectAttributesValid(defect):
+        return False
+    defect_number = await dynamodb.run_async(dynamodb.allocateDefectNumber)
+    if defect_number < 0:
+        return False
+    defect["defect_number"] = int(defect_number)
+    return True
+
+
 async def documentationDefect(comment_data, args, issue_url):
-    defect_count = dynamodb.getDefectCount()
     defect = dict()
     if len(args) > 8:  # if the input line is multi line
         line_num = [i for i in range(int(args[4]), int(args[6]) + 1)]
@@ -17,7 +28,6 @@ async def documentationDefect(comment_data, args, issue_url):
         code_seg = code_seg[::-1]
         defect.update(
             {
-                "defect_number": int(defect_count),
                 "file_name": comment_data["path"],
                 "description": args[9],
                 "line_numbers": line_num,
@@ -29,29 +39,30 @@ async def documentationDefect(comment_data, args, issue_url):
         code_seg = list(comment_data["diff_hunk"].split("\n"))
         defect.update(
             {
-                "defect_number": int(defect_count),
                 "file_name": comment_data["path"],
                 "description": args[7],
                 "line_numbers": line_num,
                 "code_segments": [code_seg[-1].replace("+", "")],
             }
         )
-    dynamodb.createDefect(defect)
+    if not await numberDefect(defect):
+        return
+    if await dynamodb.run_async(dynamodb.createDefect, defect) != 0:
+        return
 
     # Update the documentation_defects field in issue
     issue_number = issue_url.split("/")[-1]
     updatedissue = dict()
-    currIssue = dynamodb.getIssue(int(issue_number))
+    currIssue = await dynamodb.run_async(dynamodb.getIssue, int(issue_number))
     lgic_num = list()
     for item in currIssue["documentation_defects"]:
         lgic_num.append(int(item))
     lgic_num.append(defect["defect_number"])
     updatedissue.update({"documentation_defects": lgic_num})
-    dynamodb.updateIssue(int(issue_number), updatedissue)
+    await dynamodb.run_async(dynamodb.updateIssue, int(issue_number), updatedissue)
 
 
 async def logicDefect(comment_data, args, issue_url):
-    defect_count = dynamodb.getDefectCount()
     defect = dict()
     if len(args) > 8:  # if the input line is multi line
         line_num = [i for i in range(int(args[4]), int(args[6]) + 1)]
@@ -64,7 +75,6 @@ async def logicDefect(comment_data, args, issue_url):
         code_seg = code_seg[::-1]
         defect.update(
             {
-                "defect_number": int(defect_count),
                 "file_name": comment_data["path"],
                 "description": args[9],
                 "line_numbers": line_num,
@@ -76,25 +86,27 @@ async def logicDefect(comment_data, args, issue_url):
         code_seg = list(comment_data["diff_hunk"].split("\n"))
         defect.update(
             {
-                "defect_number": int(defect_count),
                 "file_name": comment_data["path"],
                 "description": args[7],
                 "line_numbers": line_num,
                 "code_segments": [code_seg[-1].replace("+", "")],
             }
         )
-    dynamodb.createDefect(defect)
+    if not await numberDefect(defect):
+        return
+    if await dynamodb.run_async(dynamodb.createDefect, defect) != 0:
+        return
 
     # Update the logic defects field in issue
     issue_number = issue_url.split("/")[-1]
     updateissue = dict()
-    currIssue = dynamodb.getIssue(int(issue_number))
+    currIssue = await dynamodb.run_async(dynamodb.getIssue, int(issue_number))
     lgic_num = list()
     for item in currIssue["logic_defects"]:
         lgic_num.append(int(item))
     lgic_num.append(defect["defect_number"])
     updateissue.update({"logic_defects": lgic_num})
-    dynamodb.updateIssue(int(issue_number), updateissue)
+    await dynamodb.run_async(dynamodb.updateIssue, int(issue_number), updateissue)
 
 
 class DefectCommand(Command):
@@ -115,4 +127,4 @@ class DefectCommand(Command):
             return False
 
 
-register_command("report", DefectCommand)
+register_command("report", DefectCommand())
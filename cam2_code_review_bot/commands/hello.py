@@ -14,4 +14,4 @@ class HelloCommand(Command):
         return True
 
 
-register_command("hello", HelloCommand)
+register_command("hello", HelloCommand())
@@ -13,7 +13,7 @@ async def init(gh, issue_url):
     issue = await gh.getitem(issue_url)
 
     # Check if this issue has been initialized in the database already
-    issue_db_data = dynamodb.getIssue(int(issue["number"]))
+    issue_db_data = await dynamodb.run_async(dynamodb.getIssue, int(issue["number"]))
     if issue_db_data is not None:
         # Replace the url to say "issues" if "pulls" exists
         issue_url = issue_url.replace("/pulls/", "/issues/")
@@ -25,7 +25,8 @@ async def init(gh, issue_url):
         return
 
     # Give the issue an entry in the database
-    dynamodb.createIssue(
+    await dynamodb.run_async(
+        dynamodb.createIssue,
         {
             "issue_number": issue["number"],
             "reviewers": [],
@@ -34,7 +35,7 @@ async def init(gh, issue_url):
             "child_issues": [],
             "documentation_defects": [],
             "logic_defects": [],
-        }
+        },
     )
 
     # Replace the url to say "issues" if "pulls" exists
@@ -51,4 +52,4 @@ class InitCommand(Command):
         return True
 
 
-register_command("init", InitCommand)
+register_command("init", InitCommand())
@@ -1,24 +1,89 @@
-import asyncio
 import os
-import aiohttp
-import subprocess
-import requests
-import shutil
+import tempfile
 
+from cam2_code_review_bot.static_analysis import ProcessResult, run_process_async
+from cam2_code_review_bot.utils import Github
 from . import Command, CommandPayload, register_command
 
-# Supported file extensions and linting commands
+# Supported file extensions and linting commands, as argument lists. They are never run
+# through a shell, file names come from pull requests.
 extensions = {"python": ".py", "java": ".java", "javascript": ".js", "c": ".c"}
 lint_command = {
-    "python": "pycodestyle",
-    "java": "java -jar 3rdparty/checkstyle-8.26-all.jar -c 3rdparty/sun_checks.xml",
-    "javascript": "standard",
-    "c": "oclint",
+    "python": ["pycodestyle"],
+    "java": ["java", "-jar", "3rdparty/checkstyle-8.26-all.jar", "-c", "3rdparty/sun_checks.xml"],
+    "javascript": ["standard"],
+    "c": ["oclint"],
 }
-lint_args = {"python": "", "java": "", "javascript": "", "c": "-- -c"}
+lint_args = {"python": [], "java": [], "javascript": [], "c": ["--", "-c"]}
 
 languages = ["python", "java", "javascript", "c"]
 
+# seconds after which the linter of a file is stopped
+lint_timeout = 60.0
+
+
+async def lint_files(gh, issue_url, committed_files, language, temp_dir) -> None:
+    # Loop through each file in pull request
+    for file in committed_files:
+        file_path = file["filename"]
+
+        if file_path.endswith(extensions.get(language)):
+            file_data = await gh.getitem(file["contents_url"])
+            # Retrieve the commit hash
+            file_commit_id = file["contents_url"][file["contents_url"].rfind("=") + 1 :]
+
+            # Obtain the file's code, through the connections of the GitHub session
+            code = await Github.download(file_data["download_url"])
+
+            # only the base name, the file is always created inside the temporary directory
+            file_name = os.path.basename(file_data["name"])
+
+            # Create a temporary local file containing the downloaded code
+            with open(os.path.join(temp_dir, file_name), "w+", encoding="utf-8") as file_to_check:
+                file_to_check.write(code)
+
+            # Execute the linter without blocking the event loop, it is stopped after the
+            # timeout and the messages written until then are still reported
+            cmd = (
+                lint_command.get(language)
+                + [os.path.join(temp_dir, file_name)]
+                + lint_args.get(language)
+            )
+            result: ProcessResult = await run_process_async(cmd, timeout=lint_timeout)
+
+            # Assemble bulleted list of linting messages, linking the error found to its respective line number.
+            linting_messages = ""
+            for line in result.stdout.decode("utf-8").splitlines():
+                if line.find(":") != -1:
+                    msg = line
+                    line_info = msg[line.find(":") + 1 :]
+                    number = line_info[: line_info.find(":")]
+                    line_url = file_data["html_url"] + "#L" + number
+                    print_msg = "\u2022 [Line " + line_info + "](" + line_url + ")"
+                    linting_messages = linting_messages + "\n" + print_msg
+            if result.timed_out:
+                linting_messages = (
+                    linting_messages
+                    + "\n\nLinting was stopped after %g seconds, the results are incomplete."
+                    % lint_timeout
+                )
+
+            # If there are no linting errors
+            if linting_messages == "":
+                linting_messages = "No linting errors."
+
+            # Post a comment on each file with the linting feedback
+            await gh.post(
+                issue_url + "/comments",
+                data={
+                    "commit_id": file_commit_id,
+                    "path": file_path,
+                    "side": "LEFT",
+                    "position": 1,
+                    "body": linting_messages,
+                },
+            )
+
 
 async def lint(gh, issue_url, args) -> bool:
 
@@ -68,66 +133,12 @@ async def lint(gh, issue_url, args) -> bool:
     # Get the committed files in the pull request
     committed_files = await gh.getitem(issue_url + "/files")
 
-    # Make temporary directory
-    os.mkdir("commands/temp")
-
-    # TODO: Allow all languages to lint at once.
-    if language == "all":
-        pass
-    else:
-        # Loop through each file in pull request
-        for file in committed_files:
-            file_path = file["filename"]
-
-            if file_path.endswith(extensions.get(language)):
-                file_data = await gh.getitem(file["contents_url"])
-                # Retrieve the commit hash
-                file_commit_id = file["contents_url"][file["contents_url"].rfind("=") + 1 :]
-
-                # Obtain the file's code
-                r = requests.request("GET", file_data["download_url"])
-
-                file_name = file_data["name"]
-
-                # Create a temporary local file containing the downloaded code
-                with open("commands/temp/" + file_name, "w+", encoding=r.encoding) as file_to_check:
-                    file_to_check.write(r.text)
-
-                # Execute pycodestyle linting
-                cmd = f"{lint_command.get(language)} commands/temp/{file_name} {lint_args.get(language)}"
-                proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE)
-                stdout, _ = proc.communicate()
-
-                # Assemble bulleted list of linting messages, linking the error found to its respective line number.
-                linting_messages = ""
-                for line in stdout.decode(r.encoding).splitlines():
-                    if line.find(":") != -1:
-                        msg = line
-                        line_info = msg[line.find(":") + 1 :]
-                        number = line_info[: line_info.find(":")]
-                        line_url = file_data["html_url"] + "#L" + number
-                        print_msg = "\u2022 [Line " + line_info + "](" + line_url + ")"
-                        linting_messages = linting_messages + "\n" + print_msg
-                proc.stdout.close()
-
-                # If there are no linting errors
-                if linting_messages == "":
-                    linting_messages = "No linting errors."
-
-                # Post a comment on each file with the linting feedback
-                await gh.post(
-                    issue_url + "/comments",
-                    data={
-                        "commit_id": file_commit_id,
-                        "path": file_path,
-                        "side": "LEFT",
-                        "position": 1,
-                        "body": linting_messages,
-                    },
-                )
-
-    # Remove temporary local files
-    shutil.rmtree("commands/temp")
+    # Make temporary directory, several workers can lint at the same time. It is removed
+    # with the downloaded files even if linting fails.
+    with tempfile.TemporaryDirectory(prefix="lint-") as temp_dir:
+        # TODO: Allow all languages to lint at once.
+        if language != "all":
+            await lint_files(gh, issue_url, committed_files, language, temp_dir)
 
     # Indicate the linting has been finished successfully
     await gh.post(
@@ -142,8 +153,11 @@ async def lint(gh, issue_url, args) -> bool:
 
 
 class LintCommand(Command):
+    queued = True
+    coalesced = True
+
     async def call(self, command_payload: CommandPayload) -> bool:
         return await lint(command_payload.gh, command_payload.issue_url, command_payload.args)
 
 
-register_command("lint", LintCommand)
+register_command("lint", LintCommand())
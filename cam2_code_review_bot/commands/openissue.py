@@ -28,7 +28,7 @@ async def openissue(gh, issue_url, repo_url, args) -> True:
 
     # Get the issue number and its associated database info
     curr_issue_number = int(issue_url[issue_url.rindex("/") + 1 :])
-    issue_db_info = dynamodb.getIssue(curr_issue_number)
+    issue_db_info = await dynamodb.run_async(dynamodb.getIssue, curr_issue_number)
 
     # Do nothing if the current issue is not initialized in the database.
     # Notify the user that they must initialize the current issue.
@@ -64,7 +64,7 @@ async def openissue(gh, issue_url, repo_url, args) -> True:
         "documentation_defects": [],
         "logic_defects": [],
     }
-    dynamodb.createIssue(child_issue_db_info)
+    await dynamodb.run_async(dynamodb.createIssue, child_issue_db_info)
 
     await gh.post(
         child_issue["url"] + "/comments", data={"body": "🤖 The bot has initialized this issue!"},
@@ -73,7 +73,7 @@ async def openissue(gh, issue_url, repo_url, args) -> True:
     # Add the new issue to the parent issue's database entry
     issue_db_info["child_issues"].append(child_issue["number"])
     changed_db_info = {"child_issues": issue_db_info["child_issues"]}
-    dynamodb.updateIssue(curr_issue_number, changed_db_info)
+    await dynamodb.run_async(dynamodb.updateIssue, curr_issue_number, changed_db_info)
 
     # Replace the url to say "issues" if "pulls" exists
     issue_url = issue_url.replace("/pulls/", "/issues/")
@@ -100,4 +100,4 @@ class OpenIssueCommand(Command):
         )
 
 
-register_command("open", OpenIssueCommand)
+register_command("open", OpenIssueCommand())
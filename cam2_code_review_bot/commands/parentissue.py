@@ -40,7 +40,7 @@ async def parentissue(gh, issue_url, repo_url, args):
     issue_data = await gh.getitem(issue_url)
 
     # Make sure the child issue is in the database.
-    issue_db_info = dynamodb.getIssue(issue_data["number"])
+    issue_db_info = await dynamodb.run_async(dynamodb.getIssue, issue_data["number"])
     if issue_db_info is None:
         # Replace the url to say "issues" if "pulls" exists
         issue_url = issue_url.replace("/pulls/", "/issues/")
@@ -54,7 +54,7 @@ async def parentissue(gh, issue_url, repo_url, args):
         return
 
     # Make sure the new parent issue is in the database.
-    new_parent_issue_db_info = dynamodb.getIssue(int(args[2]))
+    new_parent_issue_db_info = await dynamodb.run_async(dynamodb.getIssue, int(args[2]))
     if new_parent_issue_db_info is None:
         # Replace the url to say "issues" if "pulls" exists
         issue_url = issue_url.replace("/pulls/", "/issues/")
@@ -76,17 +76,21 @@ async def parentissue(gh, issue_url, repo_url, args):
     if old_parent_issue_number > 0:
         # Remove child issue from old parent issue.
         # The database entry should already exist.
-        old_parent_issue_db_info = dynamodb.getIssue(old_parent_issue_number)
+        old_parent_issue_db_info = await dynamodb.run_async(
+            dynamodb.getIssue, old_parent_issue_number
+        )
         old_parent_issue_db_info["child_issues"].remove(issue_data["number"])
-        dynamodb.updateIssue(old_parent_issue_number, old_parent_issue_db_info)
+        await dynamodb.run_async(
+            dynamodb.updateIssue, old_parent_issue_number, old_parent_issue_db_info
+        )
 
     # Add child issue to new parent issue.
     new_parent_issue_db_info["child_issues"].append(issue_data["number"])
-    dynamodb.updateIssue(int(args[2]), new_parent_issue_db_info)
+    await dynamodb.run_async(dynamodb.updateIssue, int(args[2]), new_parent_issue_db_info)
 
     # Add new parent issue to child issue.
     issue_db_info["parent_issue"] = int(args[2])
-    dynamodb.updateIssue(issue_data["number"], issue_db_info)
+    await dynamodb.run_async(dynamodb.updateIssue, issue_data["number"], issue_db_info)
 
     # Replace the url to say "issues" if "pulls" exists
     issue_url = issue_url.replace("/pulls/", "/issues/")
@@ -108,4 +112,4 @@ class ParentIssueCommand(Command):
         )
 
 
-register_command("parent", ParentIssueCommand)
+register_command("parent", ParentIssueCommand())
@@ -25,4 +25,4 @@ class RolesListCommand(Command):
         )
 
 
-register_command("roles", RolesListCommand)
+register_command("roles", RolesListCommand())
@@ -6,7 +6,7 @@ async def showreviewers(gh, issue_url) -> bool:
 
     # Get the issue number and its associated database info
     issue_number = int(issue_url[issue_url.rindex("/") + 1 :])
-    issue_db_info = dynamodb.getIssue(issue_number)
+    issue_db_info = await dynamodb.run_async(dynamodb.getIssue, issue_number)
 
     # Do nothing if the current issue is not initialized in the database.
     # Notify the user that they must initialize the current issue.
@@ -25,7 +25,7 @@ async def showreviewers(gh, issue_url) -> bool:
     # Obtain information for reviewers in this pull request.
     reviewers = []
     for reviewer in issue_db_info["reviewers"]:
-        reviewer_db_info = dynamodb.getReviewer(reviewer, issue_number)
+        reviewer_db_info = await dynamodb.run_async(dynamodb.getReviewer, reviewer, issue_number)
         reviewers.append(reviewer_db_info)
 
     # Format reviewer information into a Markdown table.
@@ -58,7 +58,7 @@ async def showissuedependencies(gh, issue_url) -> bool:
 
     # Get the issue number and its associated database info
     issue_number = int(issue_url[issue_url.rindex("/") + 1 :])
-    issue_db_info = dynamodb.getIssue(issue_number)
+    issue_db_info = await dynamodb.run_async(dynamodb.getIssue, issue_number)
 
     # Do nothing if the current issue is not initialized in the database.
     # Notify the user that they must initialize the current issue.
@@ -119,4 +119,4 @@ class ShowCommand(Command):
             return False
 
 
-register_command("show", ShowCommand)
+register_command("show", ShowCommand())
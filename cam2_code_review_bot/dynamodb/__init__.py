@@ -2,3 +2,4 @@ from .defect import *
 from .issue import *
 from .reviewer import *
 from .entry_count import *
+from .executor import run_async
@@ -1,9 +1,10 @@
 import boto3
 import json
+from botocore.exceptions import ClientError
 import logging
 from os import path, getenv
 from cam2_code_review_bot.dynamodb.validation import isDefectKeyValid, isDefectAttributesValid
-from cam2_code_review_bot.dynamodb.entry_count import incrementDefectCount, decrementDefectCount
+from cam2_code_review_bot.utils import metrics
 
 key_id = getenv("AWS_SERVER_PUBLIC_KEY")
 access_key = getenv("AWS_SERVER_SECRET_KEY")
@@ -15,6 +16,7 @@ session = boto3.Session(
 
 # Get the service resource
 dynamodb = session.resource("dynamodb", region_name="us-east-1")
+metrics.measure_dynamodb(dynamodb)
 
 # Specify the Defects table
 table = dynamodb.Table("Defects")
@@ -33,31 +35,31 @@ def createDefectsTable():
         pass
 
 
-# Create a new defect
+# Create a new defect. Its number must come from allocateDefectNumber, an existing defect
+# with the same number is never overwritten.
 def createDefect(defect):
     if not isDefectKeyValid(defect["defect_number"]) or not isDefectAttributesValid(defect):
         return -1
 
-    response = incrementDefectCount()
-    if response != 0:
+    try:
+        response = table.put_item(
+            Item={
+                "Defect_Number": defect["defect_number"],
+                "File_Name": defect["file_name"],
+                "Description": defect["description"],
+                "Line_Numbers": defect["line_numbers"],
+                "Code_Segments": defect["code_segments"],
+            },
+            ConditionExpression="attribute_not_exists(Defect_Number)",
+        )
+    except ClientError as error:
+        if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logging.critical("defect [%d] already exists, it was not created", defect["defect_number"])
         return -1
-    response = table.put_item(
-        Item={
-            "Defect_Number": defect["defect_number"],
-            "File_Name": defect["file_name"],
-            "Description": defect["description"],
-            "Line_Numbers": defect["line_numbers"],
-            "Code_Segments": defect["code_segments"],
-        }
-    )
     if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
         return 0
     else:
-        response = decrementDefectCount()
-        if response == -1:
-            logging.critical(
-                "FAILED TO DECREMENT COUNTER AFTER UNSUCCESSFUL ATTEMPT TO ADD TABLE ENTRY"
-            )
         return -1
 
 
@@ -1,10 +1,8 @@
 import boto3
 import json
-import threading
 from os import path, getenv
 from cam2_code_review_bot.dynamodb.validation import isDefectKeyValid, isDefectAttributesValid
-
-key_lock = threading.Lock()
+from cam2_code_review_bot.utils import metrics
 
 key_id = getenv("AWS_SERVER_PUBLIC_KEY")
 access_key = getenv("AWS_SERVER_SECRET_KEY")
@@ -16,6 +14,7 @@ session = boto3.Session(
 
 # Get the service resource
 dynamodb = session.resource("dynamodb", region_name="us-east-1")
+metrics.measure_dynamodb(dynamodb)
 
 # Specify the Defects table
 table = dynamodb.Table("Entry_Count")
@@ -36,37 +35,25 @@ def createEntryCountTable():
         pass
 
 
-# Increments the number of entries in the Defects table by 1
-def incrementDefectCount():
-    with key_lock:
-        defectCount = getDefectCount() + 1
-        response = table.update_item(
-            Key={"Table_Name": "Defects",},
-            UpdateExpression="SET Entry_Count = :val1",
-            ExpressionAttributeValues={":val1": defectCount,},
-        )
-    if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
-        return 0
-    else:
-        return -1
-
-
-# Decrements the number of entries in the Defects table by 1
-def decrementDefectCount():
-    with key_lock:
-        defectCount = getDefectCount() - 1
-        response = table.update_item(
-            Key={"Table_Name": "Defects",},
-            UpdateExpression="SET Entry_Count = :val1",
-            ExpressionAttributeValues={":val1": defectCount,},
-        )
+# Allocates the number of a new defect. The counter is incremented and read in one atomic
+# update, so two defects reported at the same time never get the same number. Validate the
+# defect before allocating its number: a number whose defect is not stored afterwards, for
+# example because DynamoDB failed, is not given out again and leaves a gap.
+def allocateDefectNumber():
+    response = table.update_item(
+        Key={"Table_Name": "Defects",},
+        UpdateExpression="ADD Entry_Count :one",
+        ExpressionAttributeValues={":one": 1,},
+        ReturnValues="UPDATED_NEW",
+    )
     if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
-        return 0
+        # defects are numbered from 0, the number is the count before the new defect
+        return int(response["Attributes"]["Entry_Count"]) - 1
     else:
         return -1
 
 
-# Get the number of defect entries in a table
+# Get the number of defect entries in a table, the number of defect numbers allocated so far
 def getDefectCount():
     response = table.get_item(Key={"Table_Name": "Defects",})
     if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
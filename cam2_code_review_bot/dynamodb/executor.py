@@ -0,0 +1,9 @@
+import asyncio
+import functools
+
+
+# Calls one of the blocking database functions in the default executor of the running loop,
+# so commands running in the background never block the event loop while boto3 waits
+def run_async(function, *args, **kwargs):
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(None, functools.partial(function, *args, **kwargs))
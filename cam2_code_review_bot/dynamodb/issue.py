@@ -2,6 +2,7 @@ import boto3
 import json
 from os import path, getenv
 from cam2_code_review_bot.dynamodb.validation import isIssueKeyValid, isIssueAttributesValid
+from cam2_code_review_bot.utils import metrics
 
 key_id = getenv("AWS_SERVER_PUBLIC_KEY")
 access_key = getenv("AWS_SERVER_SECRET_KEY")
@@ -13,6 +14,7 @@ session = boto3.Session(
 
 # Get the service resource
 dynamodb = session.resource("dynamodb", region_name="us-east-1")
+metrics.measure_dynamodb(dynamodb)
 
 # Specify the Defects table
 table = dynamodb.Table("Issues")
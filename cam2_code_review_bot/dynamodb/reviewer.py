@@ -2,6 +2,7 @@ import boto3
 import json
 from os import path, getenv
 from cam2_code_review_bot.dynamodb.validation import isReviewerKeyValid, isReviewerAttributesValid
+from cam2_code_review_bot.utils import metrics
 
 basepath = path.dirname(__file__)
 filepath = path.abspath(path.join(basepath, "..", "config.json"))
@@ -16,6 +17,7 @@ session = boto3.Session(
 
 # Get the service resource
 dynamodb = session.resource("dynamodb", region_name="us-east-1")
+metrics.measure_dynamodb(dynamodb)
 
 # Specify the Reviewer table
 table = dynamodb.Table("Reviewers")
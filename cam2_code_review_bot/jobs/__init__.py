@@ -0,0 +1,5 @@
+from .job import Job, QUEUED, RUNNING, SUCCEEDED, FAILED
+from .job_queue import JobQueue, LOST
+from .handler_registry import register_handler, is_registered_handler, get_handler
+from .worker_pool import WorkerPool, run_worker
+from .command_job import COMMAND_JOB, command_job_payload, run_command_job
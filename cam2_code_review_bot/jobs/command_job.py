@@ -0,0 +1,67 @@
+from typing import Any, Dict, List
+
+import cam2_code_review_bot.utils as utils
+from cam2_code_review_bot.commands import get_command, CommandPayload
+from .handler_registry import register_handler
+
+# the kind of the jobs created for queued commands (see `Command.queued`)
+COMMAND_JOB: str = "command"
+
+
+def command_job_payload(
+    command: str,
+    issue_url: str,
+    comment_url: str,
+    repo_url: str,
+    comment_data: Dict[str, Any],
+    args: List[str],
+) -> Dict[str, Any]:
+    """Creates the payload of a job that runs a command in a worker
+
+    Args:
+        command (str): the name of a registered command
+        issue_url (str): see `CommandPayload`
+        comment_url (str): see `CommandPayload`
+        repo_url (str): see `CommandPayload`
+        comment_data (Dict[str, Any]): see `CommandPayload`
+        args ([str]): see `CommandPayload`
+
+    Returns:
+        Dict[str, Any]: the JSON serializable job payload
+    """
+    return {
+        "command": command,
+        "issue_url": issue_url,
+        "comment_url": comment_url,
+        "repo_url": repo_url,
+        "comment_data": comment_data,
+        "args": args,
+    }
+
+
+async def run_command_job(payload: Dict[str, Any]) -> bool:
+    """Runs a command in a worker process with its own GitHub session
+
+    Every job runs in its own event loop, so the session is shared by the requests of one job.
+
+    Args:
+        payload (Dict[str, Any]): a payload created by `command_job_payload`
+
+    Returns:
+        bool: the result of the command
+    """
+    async with utils.Github.create_session() as session:
+        gh = utils.Github.create_api(session)
+        utils.Github.initialize(gh, session)
+        command_payload: CommandPayload = CommandPayload(
+            gh,
+            payload["issue_url"],
+            payload["comment_url"],
+            payload["repo_url"],
+            payload["comment_data"],
+            payload["args"],
+        )
+        return await get_command(payload["command"]).call(command_payload)
+
+
+register_handler(COMMAND_JOB, run_command_job)
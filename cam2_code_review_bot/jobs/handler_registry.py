@@ -0,0 +1,49 @@
+from typing import Any, Awaitable, Callable, Dict
+
+# a handler runs one job, it is given the job's payload
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+__HANDLER_REGISTRY: Dict[str, Handler] = dict()
+
+
+def register_handler(kind: str, handler: Handler) -> None:
+    """Defines how the worker pool runs jobs of a kind
+
+    Args:
+        kind (str): The kind of job, the name used when the job is enqueued
+
+        handler (Handler): An async function that is called with the payload of the job. The job
+            fails if it raises an exception.
+
+    Raises:
+        ValueError: If a handler for `kind` is already registered
+    """
+    if kind in __HANDLER_REGISTRY.keys():
+        raise ValueError("Handler for jobs of kind [" + kind + "] already exists")
+    __HANDLER_REGISTRY[kind] = handler
+
+
+def is_registered_handler(kind: str) -> bool:
+    """Checks if a handler is registered
+
+    Returns:
+        bool: True if a handler for jobs of kind `kind` is registered
+    """
+    return kind in __HANDLER_REGISTRY.keys()
+
+
+def get_handler(kind: str) -> Handler:
+    """Returns the handler registered for `kind`
+
+    Args:
+        kind (str): The kind of job.
+
+    Returns:
+        Handler: The handler registered for `kind`
+
+    Raises:
+        ValueError: If no handler for `kind` is registered
+    """
+    if not is_registered_handler(kind):
+        raise ValueError("Handler for jobs of kind [" + kind + "] does not exist")
+    return __HANDLER_REGISTRY[kind]
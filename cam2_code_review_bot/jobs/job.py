@@ -0,0 +1,148 @@
+import json
+from typing import Any, Dict, Optional
+
+# the states of a job, in the order a job usually goes through them
+QUEUED: str = "queued"
+RUNNING: str = "running"
+SUCCEEDED: str = "succeeded"
+FAILED: str = "failed"
+
+
+class Job:
+    """A unit of work stored in a `JobQueue`, see `JobQueue` for more information"""
+
+    def __init__(
+        self,
+        job_id: int,
+        kind: str,
+        repo: str,
+        payload: Dict[str, Any],
+        status: str,
+        attempts: int,
+        max_attempts: int,
+        error: Optional[str],
+        created_at: float,
+        updated_at: float,
+        worker: Optional[str] = None,
+    ):
+        self.__job_id = job_id
+        self.__kind = kind
+        self.__repo = repo
+        self.__payload = payload
+        self.__status = status
+        self.__attempts = attempts
+        self.__max_attempts = max_attempts
+        self.__error = error
+        self.__created_at = created_at
+        self.__updated_at = updated_at
+        self.__worker = worker
+
+    @property
+    def job_id(self) -> int:
+        """int: The id of this job in its queue"""
+        return self.__job_id
+
+    @property
+    def kind(self) -> str:
+        """str: The name of the handler that runs this job (see `register_handler`)"""
+        return self.__kind
+
+    @property
+    def repo(self) -> str:
+        """str: The repository this job belongs to, jobs are shared fairly between repositories"""
+        return self.__repo
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """json: The data passed to the handler"""
+        return self.__payload
+
+    @property
+    def status(self) -> str:
+        """str: One of "queued", "running", "succeeded" or "failed" """
+        return self.__status
+
+    @property
+    def attempts(self) -> int:
+        """int: How often this job was started"""
+        return self.__attempts
+
+    @property
+    def max_attempts(self) -> int:
+        """int: How often this job is started before it is marked as failed"""
+        return self.__max_attempts
+
+    @property
+    def error(self) -> Optional[str]:
+        """str: The error of the last failed attempt, None if there was none"""
+        return self.__error
+
+    @property
+    def created_at(self) -> float:
+        """float: The time this job was enqueued, in seconds since the epoch"""
+        return self.__created_at
+
+    @property
+    def updated_at(self) -> float:
+        """float: The time the status of this job last changed, in seconds since the epoch"""
+        return self.__updated_at
+
+    @property
+    def worker(self) -> Optional[str]:
+        """str: The id of the worker that claimed this job last, None if it was never claimed"""
+        return self.__worker
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this job to a JSON serializable dictionary, without its payload
+
+        Returns:
+            Dict[str, Any]: the id, kind, repo, status, attempts and error of this job
+
+        """
+        return {
+            "job_id": self.__job_id,
+            "kind": self.__kind,
+            "repo": self.__repo,
+            "status": self.__status,
+            "attempts": self.__attempts,
+            "max_attempts": self.__max_attempts,
+            "error": self.__error,
+        }
+
+    @staticmethod
+    def from_row(row: tuple) -> "Job":
+        """Creates a job from a row of the jobs table
+
+        Args:
+            row (tuple): the columns of the jobs table, in order
+
+        Returns:
+            Job: the job stored in `row`
+
+        """
+        (
+            job_id,
+            kind,
+            repo,
+            payload,
+            status,
+            attempts,
+            max_attempts,
+            error,
+            created_at,
+            updated_at,
+        ) = row[:10]
+        worker: Optional[str] = row[10] if len(row) > 10 else None
+        return Job(
+            job_id,
+            kind,
+            repo,
+            json.loads(payload),
+            status,
+            attempts,
+            max_attempts,
+            error,
+            created_at,
+            updated_at,
+            worker,
+        )
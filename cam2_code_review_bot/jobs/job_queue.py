@@ -0,0 +1,456 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .job import Job, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+_COLUMNS: str = (
+    "id, kind, repo, payload, status, attempts, max_attempts, error, created_at, updated_at, "
+    "worker"
+)
+# the outcome of an attempt whose worker stopped before it finished the job
+LOST: str = "lost"
+
+
+class JobQueue:
+    """Durable job queue stored in a local SQLite database
+
+    The webhook enqueues jobs and returns right away, worker processes (see `WorkerPool`) claim
+    and run them. Every process opens its own `JobQueue` on the same database file.
+
+    A failed job is retried with an exponential backoff until it was attempted `max_attempts`
+    times. When a worker claims a job it gets the oldest job of the repository with the fewest
+    running jobs, ties are broken by the repository served longest ago. A burst of jobs from one
+    repository therefore does not delay the jobs of other repositories.
+
+    A claimed job belongs to the worker that claimed it. Only that worker can complete or fail
+    it, so a worker that was thought to be lost can not overwrite a later attempt of its job.
+
+    Every finished attempt is recorded with its outcome, its run time and the metrics the worker
+    recorded while running it. The webhook reads them with `attempts` to report how long the
+    queued commands and their calls to GitHub and DynamoDB take.
+
+    Example:
+    ```python
+    job_queue: JobQueue = JobQueue("optimus_jobs.sqlite")
+    job_id: int = job_queue.enqueue("command", "owner/repo", {"command": "lint"})
+    job_queue.get(job_id).status  # "queued"
+    ```
+
+    """
+
+    def __init__(self, path: str, retry_delay: float = 5.0):
+        """
+        Args:
+            path (str): the SQLite database file. It is created if it does not exist.
+            retry_delay (float, default=5.0): seconds before a failed job is retried the first
+                time, the delay doubles with every further attempt
+
+        """
+        self.__path = path
+        self.__retry_delay = retry_delay
+        with closing(self.__connect()) as connection:
+            # write-ahead logging lets the webhook enqueue while workers read
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    repo TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    available_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+                CREATE INDEX IF NOT EXISTS jobs_repo ON jobs (repo, status);
+                CREATE TABLE IF NOT EXISTS repos (
+                    repo TEXT PRIMARY KEY,
+                    last_claimed REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS attempts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id INTEGER NOT NULL,
+                    outcome TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    finished_at REAL NOT NULL,
+                    metrics TEXT
+                );
+                """
+            )
+            # queues created before jobs had an owner
+            columns: List[str] = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+            if "worker" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+            # queues created before attempts had metrics
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(attempts)")]
+            if "metrics" not in columns:
+                connection.execute("ALTER TABLE attempts ADD COLUMN metrics TEXT")
+
+    @property
+    def path(self) -> str:
+        """str: The SQLite database file of this queue"""
+        return self.__path
+
+    def enqueue(self, kind: str, repo: str, payload: Dict[str, Any], max_attempts: int = 3) -> int:
+        """Adds a job to the queue
+
+        Args:
+            kind (str): the name of the handler that runs the job (see `register_handler`)
+            repo (str): the repository the job belongs to, such as "owner/name"
+            payload (Dict[str, Any]): JSON serializable data passed to the handler
+            max_attempts (int, default=3): how often the job is started before it is marked
+                as failed
+
+        Returns:
+            int: the id of the new job
+
+        Raises:
+            ValueError: If `max_attempts` is not positive
+
+        """
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be a positive integer")
+
+        now: float = time.time()
+        with closing(self.__connect()) as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (kind, repo, payload, status, max_attempts, created_at, "
+                "updated_at, available_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, repo, json.dumps(payload), QUEUED, max_attempts, now, now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: Optional[str] = None) -> Optional[Job]:
+        """Takes the next job to run and marks it as running
+
+        Args:
+            worker (str, default=None): the id of the worker claiming the job, see `complete`
+                and `requeue_lost`
+
+        Returns:
+            Job: the claimed job, None if no job is ready to run
+
+        """
+        now: float = time.time()
+        connection: sqlite3.Connection = self.__connect()
+        try:
+            # an immediate transaction keeps two workers from claiming the same job
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                """
+                SELECT jobs.id, jobs.repo FROM jobs LEFT JOIN repos ON repos.repo = jobs.repo
+                WHERE jobs.status = ? AND jobs.available_at <= ?
+                ORDER BY
+                    (SELECT COUNT(*) FROM jobs AS running
+                     WHERE running.repo = jobs.repo AND running.status = ?),
+                    COALESCE(repos.last_claimed, 0),
+                    jobs.id
+                LIMIT 1
+                """,
+                (QUEUED, now, RUNNING),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            job_id, repo = row
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, worker = ? "
+                "WHERE id = ?",
+                (RUNNING, now, worker, job_id),
+            )
+            connection.execute("INSERT OR REPLACE INTO repos VALUES (?, ?)", (repo, now))
+            job: Job = Job.from_row(
+                connection.execute(
+                    "SELECT " + _COLUMNS + " FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+            )
+            connection.execute("COMMIT")
+            return job
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def complete(
+        self, job_id: int, worker: Optional[str] = None, metrics: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Marks a running job as succeeded
+
+        Args:
+            job_id (int): the id of the job
+            worker (str, default=None): the id of the worker that claimed the job
+            metrics (Dict[str, Any], default=None): JSON serializable metrics recorded while
+                running the job, stored with the attempt (see `attempts`)
+
+        Returns:
+            bool: False if the job is not running for `worker` any more, it is then unchanged
+
+        """
+        now: float = time.time()
+        connection: sqlite3.Connection = self.__connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            self.__record_attempts(
+                connection,
+                SUCCEEDED,
+                now,
+                "id = ? AND status = ? AND worker IS ?",
+                (job_id, RUNNING, worker),
+                metrics,
+            )
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND worker IS ?",
+                (SUCCEEDED, now, job_id, RUNNING, worker),
+            )
+            connection.execute("COMMIT")
+            return cursor.rowcount == 1
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def fail(
+        self,
+        job_id: int,
+        error: str,
+        worker: Optional[str] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Records a failed attempt of a running job
+
+        The job is queued again after the retry delay, or marked as failed if it has no
+        attempts left. Nothing is changed if the job is not running for `worker` any more.
+
+        Args:
+            job_id (int): the id of the job
+            error (str): a description of the failure
+            worker (str, default=None): the id of the worker that claimed the job
+            metrics (Dict[str, Any], default=None): see `complete`
+
+        Returns:
+            bool: True if the job will be retried
+
+        """
+        now: float = time.time()
+        connection: sqlite3.Connection = self.__connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE id = ? AND status = ? AND worker IS ?",
+                (job_id, RUNNING, worker),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return False
+
+            attempts, max_attempts = row
+            retry: bool = attempts < max_attempts
+            self.__record_attempts(connection, FAILED, now, "id = ?", (job_id,), metrics)
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, available_at = ? "
+                "WHERE id = ?",
+                (
+                    QUEUED if retry else FAILED,
+                    error,
+                    now,
+                    now + self.__retry_delay * 2 ** (attempts - 1),
+                    job_id,
+                ),
+            )
+            connection.execute("COMMIT")
+            return retry
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def requeue_lost(self, live_workers: List[str]) -> int:
+        """Queues jobs again right away whose worker is not one of `live_workers`
+
+        The jobs of a worker that died, or of a pool that was stopped, count as a failed
+        attempt and are marked as failed if they have no attempts left. Jobs claimed without
+        a worker id are never requeued by this method, see `requeue_stale`.
+
+        Args:
+            live_workers ([str]): the ids of the workers that are running
+
+        Returns:
+            int: the number of jobs queued again or marked as failed
+
+        """
+        return self.__requeue(
+            "status = ? AND worker IS NOT NULL AND worker NOT IN (%s)"
+            % ", ".join("?" * len(live_workers)),
+            [RUNNING] + list(live_workers),
+        )
+
+    def overdue_workers(self, timeout: float) -> List[str]:
+        """Finds the workers running a job for longer than `timeout`
+
+        Args:
+            timeout (float): seconds a job may run
+
+        Returns:
+            [str]: the ids of the workers
+
+        """
+        with closing(self.__connect()) as connection:
+            return [
+                row[0]
+                for row in connection.execute(
+                    "SELECT DISTINCT worker FROM jobs "
+                    "WHERE status = ? AND worker IS NOT NULL AND updated_at < ?",
+                    (RUNNING, time.time() - timeout),
+                )
+            ]
+
+    def requeue_stale(self, timeout: float) -> int:
+        """Queues jobs again that have been running for longer than `timeout`
+
+        Jobs are left running if the worker running them died. They count as a failed
+        attempt and are marked as failed if they have no attempts left.
+
+        Args:
+            timeout (float): seconds after which a running job is considered lost
+
+        Returns:
+            int: the number of jobs queued again or marked as failed
+
+        """
+        return self.__requeue("status = ? AND updated_at < ?", (RUNNING, time.time() - timeout))
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """Looks up a job
+
+        Args:
+            job_id (int): the id of the job
+
+        Returns:
+            Job: the job, None if there is no job with `job_id`
+
+        """
+        with closing(self.__connect()) as connection:
+            row = connection.execute(
+                "SELECT " + _COLUMNS + " FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else Job.from_row(row)
+
+    def counts(self) -> Dict[str, int]:
+        """Counts the jobs in every status
+
+        Returns:
+            Dict[str, int]: the number of "queued", "running", "succeeded" and "failed" jobs
+
+        """
+        counts: Dict[str, int] = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        with closing(self.__connect()) as connection:
+            for status, count in connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ):
+                counts[status] = count
+        return counts
+
+    def attempts(self, after: int = 0) -> List[Tuple[int, Job, str, float, Dict[str, Any]]]:
+        """Returns the finished attempts recorded after the attempt `after`
+
+        Attempts are not removed when they are read, every reader keeps the id of the last
+        attempt it read and passes it as `after` the next time. They are removed by
+        `prune_attempts` once they are old.
+
+        Args:
+            after (int, default=0): the id of the last attempt read, 0 returns every attempt
+
+        Returns:
+            [(int, Job, str, float, Dict[str, Any])]: the id of every attempt, its job, its
+                outcome ("succeeded", "failed" or "lost"), the seconds it ran and the metrics
+                recorded by its worker, oldest first. Lost attempts have no metrics.
+
+        """
+        with closing(self.__connect()) as connection:
+            rows: List[tuple] = connection.execute(
+                "SELECT attempts.id, attempts.outcome, "
+                "attempts.finished_at - attempts.started_at, attempts.metrics, "
+                + ", ".join("jobs." + column.strip() for column in _COLUMNS.split(","))
+                + " FROM attempts JOIN jobs ON jobs.id = attempts.job_id "
+                "WHERE attempts.id > ? ORDER BY attempts.id",
+                (after,),
+            ).fetchall()
+        return [
+            (row[0], Job.from_row(row[4:]), row[1], row[2], json.loads(row[3] or "{}"))
+            for row in rows
+        ]
+
+    def last_attempt(self) -> int:
+        """int: The id of the last recorded attempt, 0 if there is none"""
+        with closing(self.__connect()) as connection:
+            return connection.execute("SELECT COALESCE(MAX(id), 0) FROM attempts").fetchone()[0]
+
+    def prune_attempts(self, age: float) -> int:
+        """Removes the attempts that finished more than `age` seconds ago
+
+        Args:
+            age (float): seconds an attempt is kept for its readers
+
+        Returns:
+            int: the number of removed attempts
+
+        """
+        with closing(self.__connect()) as connection:
+            return connection.execute(
+                "DELETE FROM attempts WHERE finished_at < ?", (time.time() - age,)
+            ).rowcount
+
+    def __requeue(self, where: str, parameters: Sequence[Any]) -> int:
+        # queues the running jobs matching `where` again, as the failed attempt of a lost worker
+        now: float = time.time()
+        connection: sqlite3.Connection = self.__connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            self.__record_attempts(connection, LOST, now, where, parameters)
+            cursor = connection.execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, "
+                "error = 'the worker running the job stopped', updated_at = ?, available_at = ? "
+                "WHERE " + where,
+                [QUEUED, FAILED, now, now] + list(parameters),
+            )
+            connection.execute("COMMIT")
+            return cursor.rowcount
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def __record_attempts(
+        connection: sqlite3.Connection,
+        outcome: str,
+        now: float,
+        where: str,
+        parameters: Sequence[Any],
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # a running job was last updated when it was claimed, that is when its attempt started
+        connection.execute(
+            "INSERT INTO attempts (job_id, outcome, started_at, finished_at, metrics) "
+            "SELECT id, ?, updated_at, ?, ? FROM jobs WHERE " + where,
+            [outcome, now, json.dumps(metrics) if metrics else None] + list(parameters),
+        )
+
+    def __connect(self) -> sqlite3.Connection:
+        # a connection per call, connections can not be shared between threads or processes
+        return sqlite3.connect(self.__path, timeout=30.0, isolation_level=None)
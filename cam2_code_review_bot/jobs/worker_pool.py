@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import uuid
+from typing import List, Optional
+from cam2_code_review_bot.static_analysis import kill_processes
+from cam2_code_review_bot.utils import metrics
+from .job import Job
+from .job_queue import JobQueue
+from .handler_registry import get_handler
+
+
+def run_worker(
+    queue_path: str, stop_event, poll_interval: float = 0.5, worker_id: Optional[str] = None
+) -> None:
+    """Runs jobs from a queue until `stop_event` is set
+
+    This is the main function of every worker process. Jobs are run one at a time, each in
+    its own event loop. A job whose handler raises an exception is marked as failed and
+    retried by the queue if it has attempts left. A worker that is terminated kills the
+    processes its job started first. The calls to GitHub and DynamoDB a job made are stored
+    with its attempt for the webhook (see `metrics.drain_worker_metrics`).
+
+    Args:
+        queue_path (str): the SQLite database file of the `JobQueue`
+        stop_event (multiprocessing.Event): stops the worker once the current job is done
+        poll_interval (float, default=0.5): seconds to wait before looking for new jobs when
+            the queue is empty
+        worker_id (str, default=None): the id the jobs are claimed with. Defaults to the
+            process id.
+
+    """
+    worker_id = worker_id or str(os.getpid())
+    signal.signal(signal.SIGTERM, _terminate)
+    # a forked worker starts with the metrics its parent recorded, they are not of its jobs
+    metrics.drain_worker_metrics()
+    job_queue: JobQueue = JobQueue(queue_path)
+    while not stop_event.is_set():
+        job: Optional[Job] = job_queue.claim(worker_id)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        try:
+            asyncio.run(get_handler(job.kind)(job.payload))
+        except Exception as error:
+            logging.exception("job [%d] of kind [%s] failed", job.job_id, job.kind)
+            job_queue.fail(job.job_id, repr(error), worker_id, metrics.drain_worker_metrics())
+        else:
+            job_queue.complete(job.job_id, worker_id, metrics.drain_worker_metrics())
+
+
+def _terminate(signum, frame) -> None:
+    # the tools of a job run in sessions of their own and would outlive a terminated worker,
+    # they are killed before the worker exits by the signal as usual
+    kill_processes()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+class WorkerPool:
+    """A pool of worker processes running the jobs of a `JobQueue`
+
+    The analysis is kept out of the webhook process: the webhook only enqueues jobs and the
+    workers run them. Workers that die are replaced and the jobs they were running are
+    queued again right away. A worker running a job for longer than `job_timeout` is
+    terminated first, so a job never runs twice at the same time.
+
+    Only one pool may run on a queue, jobs claimed by workers of another pool are considered
+    lost.
+
+    Example:
+    ```python
+    worker_pool: WorkerPool = WorkerPool("optimus_jobs.sqlite", processes=4)
+    worker_pool.run_forever()
+    ```
+
+    """
+
+    def __init__(
+        self,
+        queue_path: str,
+        processes: Optional[int] = None,
+        poll_interval: float = 0.5,
+        job_timeout: float = 900.0,
+        attempt_retention: float = 86400.0,
+    ):
+        """
+        Args:
+            queue_path (str): the SQLite database file of the `JobQueue`
+            processes (int, default=None): the number of worker processes. Defaults to the
+                number of CPUs.
+            poll_interval (float, default=0.5): seconds an idle worker waits before looking
+                for new jobs
+            job_timeout (float, default=900.0): seconds after which the worker running a job is
+                terminated and the job is queued again. This must be longer than the longest
+                job.
+            attempt_retention (float, default=86400.0): seconds the finished attempts of jobs
+                are kept in the queue for the webhook to read (see `JobQueue.attempts`)
+
+        Raises:
+            ValueError: If `processes` is not positive
+
+        """
+        if processes is not None and processes <= 0:
+            raise ValueError("processes must be a positive integer")
+
+        self.__queue_path = queue_path
+        self.__processes = processes or os.cpu_count() or 1
+        self.__poll_interval = poll_interval
+        self.__job_timeout = job_timeout
+        self.__attempt_retention = attempt_retention
+        self.__stop_event = multiprocessing.Event()
+        self.__workers: List[multiprocessing.Process] = []
+        # the id every worker claims its jobs with, by position in `__workers`
+        self.__worker_ids: List[str] = []
+
+        # creates the database before the workers start using it
+        self.__job_queue: JobQueue = JobQueue(queue_path)
+
+    @property
+    def job_queue(self) -> JobQueue:
+        """JobQueue: The queue the workers take their jobs from"""
+        return self.__job_queue
+
+    @property
+    def workers(self) -> List[multiprocessing.Process]:
+        """[multiprocessing.Process]: The worker processes of this pool"""
+        return list(self.__workers)
+
+    def start(self) -> None:
+        """Starts the worker processes"""
+        self.__stop_event.clear()
+        self.__workers = []
+        self.__worker_ids = []
+        for _ in range(self.__processes):
+            self.__start_worker()
+
+    def supervise(self) -> None:
+        """Replaces workers that died and queues their jobs again
+
+        Workers running a job for longer than `job_timeout` are terminated and replaced too.
+        Attempts older than `attempt_retention` are removed from the queue.
+        Should be called regularly while the pool is running, `run_forever` does so.
+
+        """
+        overdue: List[str] = self.__job_queue.overdue_workers(self.__job_timeout)
+        for position, worker in enumerate(self.__workers):
+            if self.__worker_ids[position] in overdue and worker.is_alive():
+                logging.warning("worker [%s] exceeded the job timeout", worker.name)
+                worker.terminate()
+                worker.join()
+            if not worker.is_alive():
+                logging.warning("worker [%s] stopped with code %s", worker.name, worker.exitcode)
+                self.__start_worker(position)
+
+        requeued: int = self.__job_queue.requeue_lost(self.__worker_ids)
+        if requeued:
+            logging.warning("queued %d lost jobs again", requeued)
+        self.__job_queue.prune_attempts(self.__attempt_retention)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the workers after their current job
+
+        Args:
+            timeout (float, default=None): seconds to wait for each worker, workers still
+                running after that are terminated. None waits until the workers are done.
+
+        """
+        self.__stop_event.set()
+        for worker in self.__workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        self.__workers = []
+        self.__worker_ids = []
+
+    def run_forever(self, supervise_interval: float = 5.0) -> None:
+        """Starts the workers and supervises them until the process is interrupted or terminated
+
+        Args:
+            supervise_interval (float, default=5.0): seconds between two calls to `supervise`
+
+        """
+        # SIGTERM, as sent by docker, stops the pool like a keyboard interrupt
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        self.start()
+        try:
+            while True:
+                time.sleep(supervise_interval)
+                self.supervise()
+        except KeyboardInterrupt:
+            logging.info("stopping the worker pool")
+        finally:
+            self.stop()
+
+    def __start_worker(self, position: Optional[int] = None) -> None:
+        # starts a worker at `position`, or after the other workers. Ids are never reused so
+        # the jobs of a dead worker are not mistaken for those of its replacement.
+        worker_id: str = uuid.uuid4().hex
+        worker: multiprocessing.Process = multiprocessing.Process(
+            target=run_worker,
+            args=(self.__queue_path, self.__stop_event, self.__poll_interval, worker_id),
+            daemon=True,
+        )
+        worker.start()
+        if position is None:
+            self.__workers.append(worker)
+            self.__worker_ids.append(worker_id)
+        else:
+            self.__workers[position] = worker
+            self.__worker_ids[position] = worker_id
@@ -1,5 +1,14 @@
 from .error import StaticError
+from .error_batch import ErrorBatch
+from .runner import (
+    ProcessResult, run_process, run_process_async, set_max_processes, measure_processes,
+    kill_processes
+)
+from .diff import ChangedLines, parse_patch
+from .source_cache import SourceCache, SourceFile
 from .tool import StaticTool
+from .cache import ResultCache
+from .metrics import ResourceSnapshot, ToolMetrics
 from .analyzer import StaticAnalyzer
 from .vulture_tool import VultureTool
 from .performance_profiler_tool import PerformanceProfilerTool
@@ -7,3 +16,8 @@ from .mypy_tool import MyPyTool
 from .prospector_tool import ProspectorTool
 from .pyflakes_tool import PyflakesTool
 from .duplicate_tool import DuplicateTool
+from .clone_index import CloneIndex
+from .check import Check, CheckContext
+from .check_registry import register_check, is_registered_check, get_check, registered_checks
+from .check_tool import CheckTool
+from . import checks
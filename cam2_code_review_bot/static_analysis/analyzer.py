@@ -1,6 +1,10 @@
+import asyncio
 import json
-from typing import Dict, List
-from . import StaticError, StaticTool
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from . import StaticError, ErrorBatch, StaticTool, ResultCache, ChangedLines
+from . import ResourceSnapshot, ToolMetrics, SourceCache, measure_processes
 from tabulate import tabulate
 
 class StaticAnalyzer:
@@ -10,9 +14,36 @@ class StaticAnalyzer:
 
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        changed_lines: Optional[ChangedLines] = None,
+        source_cache: Optional[SourceCache] = None,
+        root: Optional[str] = None,
+    ):
+        """
+        Args:
+            cache (ResultCache, default=None): if set, the results of tools configured through
+                this analyzer are stored in and reused from `cache` as long as the tool's
+                configs and the content of the files it analyzes do not change. The same
+                cache can be shared between analyzers.
+            changed_lines (ChangedLines, default=None): if set, only errors on the lines
+                changed by a pull request are reported (see `changed_lines`)
+            source_cache (SourceCache, default=None): the files read and parsed by the tools
+                are shared through this cache. By default every run uses a new cache, so each
+                file is parsed once per run. A cache given here is kept between runs.
+            root (str, default=None): the checkout the analyzed files are in. Results are
+                cached with paths relative to it, so they are reused for the same files in
+                another checkout of the repository (see `ResultCache`).
+
+        """
         self.__tools: Dict[str, StaticTool] = dict()
-        pass
+        self.__configs: Dict[str, Any] = dict()
+        self.__cache: Optional[ResultCache] = cache
+        self.__changed_lines: Optional[ChangedLines] = changed_lines
+        self.__metrics: Dict[str, ToolMetrics] = dict()
+        self.__source_cache: Optional[SourceCache] = source_cache
+        self.__root: Optional[str] = root
 
     def add_tool(self, tool: StaticTool, override: bool = False) -> None:
         """Adds a static tool to this analyzer
@@ -32,6 +63,7 @@ class StaticAnalyzer:
         if tool.name in self.__tools.keys() and not override:
             raise ValueError('tool already exists but override is set to False')
         self.__tools[tool.name] = tool
+        self.__configs.pop(tool.name, None)
     
     def configure_tool_from_file(self, tool_name: str, config_file_path: str) -> None:
         """Configues an existing tool in this analyzer
@@ -44,10 +76,9 @@ class StaticAnalyzer:
             ValueError: if the tool is not present in this static analyzer
 
         """
-        tool: StaticTool = self.get_tool(tool_name)
-        if tool is None:
+        if self.get_tool(tool_name) is None:
             raise ValueError('the tool [' + tool_name + '] does not exist in this static analyzer.')
-        tool.load_config_from_file(config_file_path)
+        self.configure_tool(tool_name, StaticTool.read_config_file(config_file_path))
 
     def configure_tool(self, tool_name: str, config: json) -> None:
         """Configures an existing tool in this analyzer
@@ -64,6 +95,7 @@ class StaticAnalyzer:
         if tool is None:
             raise ValueError('the tool [' + tool_name + '] does not exist in this static analyzer.')
         tool.load_config(config)
+        self.__configs[tool_name] = config
 
     def get_tool(self, tool_name: str) -> StaticTool:
         """Gets the tool object named `tool_name`
@@ -92,47 +124,358 @@ class StaticAnalyzer:
 
         """
         if tool_name in self.__tools.keys():        
-            self.__tools.remove(tool_name)
+            del self.__tools[tool_name]
+            self.__configs.pop(tool_name, None)
             return True
         return False
 
-    def run_raw(self) -> List[StaticError]:
+    @property
+    def cache(self) -> Optional[ResultCache]:
+        """ResultCache: The cache used by this analyzer, None if caching is disabled. """
+        return self.__cache
+
+    @property
+    def source_cache(self) -> Optional[SourceCache]:
+        """SourceCache: The cache of parsed files kept between runs, None uses one cache per run. """
+        return self.__source_cache
+
+    @property
+    def root(self) -> Optional[str]:
+        """str: The checkout the analyzed files are in, None caches results by their paths. """
+        return self.__root
+
+    @property
+    def changed_lines(self) -> Optional[ChangedLines]:
+        """ChangedLines: The lines changed by a pull request, None analyzes whole files.
+
+        When set, errors on unchanged lines are not reported and the tools are told which
+        files and lines changed so they can skip analyzing the rest (see
+        `StaticTool.set_changed_lines`).
+
+        """
+        return self.__changed_lines
+
+    @changed_lines.setter
+    def changed_lines(self, changed_lines: Optional[ChangedLines]) -> None:
+        self.__changed_lines = changed_lines
+
+    @property
+    def metrics(self) -> Dict[str, ToolMetrics]:
+        """Dict[str, ToolMetrics]: The time, CPU and memory used by each tool in the last run.
+
+        Every run (`run_raw`, `run_md`, `run_stream` and `run_stream_async`) replaces the
+        metrics of the previous one. Tools are listed in the order they were added, tools
+        that did not run are left out.
+
+        """
+        return {
+            tool_name: self.__metrics[tool_name]
+            for tool_name in self.__tools if tool_name in self.__metrics
+        }
+
+    def run_raw(
+        self, parallel: bool = False, max_workers: Optional[int] = None, batch: bool = False
+    ) -> Union[List[StaticError], ErrorBatch]:
         """Runs all the tools in this analyzer with their current configurations
 
+        Args:
+            parallel (bool, default=False): if set to true, the tools are run concurrently
+                in a worker pool instead of one after another. A tool that raises an
+                exception is logged and contributes no errors, the remaining tools still run.
+            max_workers (int, default=None): the maximum number of tools run at the same
+                time when `parallel` is set. None lets the pool decide.
+            batch (bool, default=False): if set to true, the errors are returned as an
+                `ErrorBatch`. The errors of each tool are moved into the batch as soon as the
+                tool finishes, which keeps the memory used by large runs down.
+
         Returns:
             [StaticError]: a list of all the errors reported from running all of 
-                the tools in this analyzer
+                the tools in this analyzer. The errors are ordered by the order the tools
+                were added in, regardless of `parallel`. An `ErrorBatch` if `batch` is set.
 
         """
-        return self.__run()
+        return self.__run(parallel, max_workers, ErrorBatch() if batch else [])
+
+    def run_stream(self, max_workers: Optional[int] = None) -> Iterator[Tuple[str, List[StaticError]]]:
+        """Runs all the tools concurrently and yields the errors of each tool as soon as it finishes
+
+        The first results are available after the fastest tool finished instead of the slowest.
+        A tool that raises an exception is logged and yields nothing, the remaining tools still run.
+        Tools that did not start yet are cancelled if the iteration is stopped early, stopping
+        waits for the tools that are already running.
+
+        Example:
+        ```python
+        for tool_name, errors in static_analyzer.run_stream():
+            print(tool_name, StaticAnalyzer.format_md(errors))
+        ```
+
+        Args:
+            max_workers (int, default=None): the maximum number of tools run at the same
+                time. None lets the pool decide.
+
+        Returns:
+            Iterator[Tuple[str, [StaticError]]]: the name of a tool and the errors it reported,
+                in the order the tools finish
+
+        """
+        self.__start_run()
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {}
+        try:
+            futures = {executor.submit(self.__run_tool, tool): tool for tool in self.__tools.values()}
+            for future in as_completed(futures):
+                tool: StaticTool = futures[future]
+                try:
+                    errors: List[StaticError] = future.result()
+                except Exception:
+                    logging.exception('static tool [%s] failed, its errors are not reported', tool.name)
+                    continue
+                yield tool.name, errors
+        finally:
+            # tools that did not start yet are not run when the caller stops iterating, the
+            # running ones still use the source cache and metrics of this run
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self.__finish_run()
+
+    async def run_stream_async(
+        self, max_workers: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, List[StaticError]]]:
+        """Asynchronous version of `run_stream` for use inside an event loop
+
+        The tools run in a worker pool, the event loop is free to serve other requests
+        while waiting for them.
+
+        Example:
+        ```python
+        async for tool_name, errors in static_analyzer.run_stream_async():
+            await post_comment(StaticAnalyzer.format_md(errors))
+        ```
+
+        Args:
+            max_workers (int, default=None): the maximum number of tools run at the same
+                time. None lets the pool decide.
 
-    def run_md(self) -> str:
+        Returns:
+            AsyncIterator[Tuple[str, [StaticError]]]: the name of a tool and the errors it
+                reported, in the order the tools finish
+
+        """
+        self.__start_run()
+        loop = asyncio.get_running_loop()
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {}
+        try:
+            futures = {
+                asyncio.ensure_future(loop.run_in_executor(executor, self.__run_tool, tool)): tool
+                for tool in self.__tools.values()
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    tool: StaticTool = futures[future]
+                    try:
+                        errors: List[StaticError] = future.result()
+                    except Exception:
+                        logging.exception('static tool [%s] failed, its errors are not reported', tool.name)
+                        continue
+                    yield tool.name, errors
+        finally:
+            # cancelling the asyncio futures also cancels the tools that did not start yet, the
+            # running ones still use the source cache and metrics of this run
+            for future in futures:
+                future.cancel()
+            await loop.run_in_executor(None, executor.shutdown)
+            self.__finish_run()
+
+    def run_md(
+        self, parallel: bool = False, max_workers: Optional[int] = None, include_timing: bool = False
+    ) -> str:
         """Runs all the tools in this analyzer with their current configurations
 
+        Args:
+            parallel (bool, default=False): see `run_raw`
+            max_workers (int, default=None): see `run_raw`
+            include_timing (bool, default=False): if set to true, a collapsed table of the
+                time, CPU and memory used by each tool is appended (see `format_metrics_md`)
+
         Returns:
             str: a formatted markdown string of all of the errors collected
                 from this run
                 
         """
 
-        errors: List[StaticError] = self.__run()
+        md: str = StaticAnalyzer.format_md(self.__run(parallel, max_workers, ErrorBatch()))
+        if include_timing:
+            md += '\n\n' + StaticAnalyzer.format_metrics_md(self.metrics.values())
+        return md
+
+    @staticmethod
+    def format_md(errors: Union[List[StaticError], ErrorBatch]) -> str:
+        """Formats errors as the markdown table returned by `run_md`
+
+        Args:
+            errors ([StaticError] or ErrorBatch): the errors being formatted. The rows of an
+                `ErrorBatch` are read without creating `StaticError` objects.
+
+        Returns:
+            str: a formatted markdown string of all of `errors`
+
+        """
 
         #headers will be the header of the created table
         headers = ["Error Type", "Line Number", "Error Description", "Code"]
 
-        #error_markdown is a list of lists where each list represents one error
+        #error_markdown is a list of rows where each row represents one error
         #tabulate is used to create the wanted table of multiple errors with description of what and where it occurs in the code
-        error_markdown = []
-        for error in errors:
-            error_markdown.append([error.error_name, error.line_no, error.error_description, error.code])
+        if isinstance(errors, ErrorBatch):
+            error_markdown = list(errors.rows('error_name', 'line_no', 'error_description', 'code'))
+        else:
+            error_markdown = []
+            for error in errors:
+                error_markdown.append([error.error_name, error.line_no, error.error_description, error.code])
         if(len(error_markdown) == 0):
             return 'No static errors reported.'
         else:
             return ''.join(tabulate(error_markdown, headers, tablefmt='github'))
 
+    @staticmethod
+    def format_metrics_md(metrics: Iterable[ToolMetrics]) -> str:
+        """Formats the metrics of tool runs as a collapsed markdown table
+
+        The table is wrapped in a `<details>` block, GitHub shows it when the summary is
+        clicked.
+
+        Args:
+            metrics (Iterable[ToolMetrics]): the metrics being formatted, see `metrics`
+
+        Returns:
+            str: the markdown of the table
+
+        """
+        headers = [
+            "Tool", "Wall (s)", "User CPU (s)", "System CPU (s)", "Subprocess CPU (s)",
+            "Subprocess peak RSS (MB)", "Errors", "Cached",
+        ]
+        rows = []
+        for tool_metrics in metrics:
+            rows.append([
+                tool_metrics.tool_name + (' (failed)' if tool_metrics.failed else ''),
+                tool_metrics.wall_time,
+                tool_metrics.user_time,
+                tool_metrics.system_time,
+                tool_metrics.children_user_time + tool_metrics.children_system_time,
+                tool_metrics.peak_rss_kb / 1024,
+                tool_metrics.error_count,
+                'yes' if tool_metrics.cache_hit else 'no',
+            ])
+        table: str = tabulate(rows, headers, tablefmt='github', floatfmt='.2f')
+        return '<details>\n<summary>Timing</summary>\n\n' + table + '\n\n</details>'
+
     
-    def __run(self) -> List[StaticError]:
-        errors: List[StaticError] = []
-        for name, tool in self.__tools.items():
-            errors.extend(tool.run())
+    def __run(
+        self,
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        errors: Union[List[StaticError], ErrorBatch, None] = None,
+    ) -> Union[List[StaticError], ErrorBatch]:
+        tools: List[StaticTool] = list(self.__tools.values())
+        if errors is None:
+            errors = []
+
+        self.__start_run()
+        try:
+            if not parallel:
+                for tool in tools:
+                    errors.extend(self.__run_tool(tool))
+                return errors
+
+            # a single tool is run in the pool as well, so it fails the same way as several.
+            # the tools spend most of their time waiting on subprocesses, so threads are enough
+            # to overlap them. results are collected in the order the tools were added so the
+            # report does not depend on which tool finished first.
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(self.__run_tool, tool) for tool in tools]
+                for tool, future in zip(tools, futures):
+                    try:
+                        errors.extend(future.result())
+                    except Exception:
+                        logging.exception('static tool [%s] failed, its errors are not reported', tool.name)
+            return errors
+        finally:
+            self.__finish_run()
+
+    def __start_run(self) -> None:
+        self.__metrics = dict()
+        # without a cache kept between runs, files are still parsed only once per run
+        source_cache: Optional[SourceCache] = self.__source_cache
+        if source_cache is None:
+            source_cache = SourceCache()
+        for tool in self.__tools.values():
+            tool.set_source_cache(source_cache)
+
+    def __finish_run(self) -> None:
+        # the parsed files of a run are released with the run
+        for tool in self.__tools.values():
+            tool.set_source_cache(None)
+
+    def __run_tool(self, tool: StaticTool) -> List[StaticError]:
+        changed_lines: Optional[ChangedLines] = self.__changed_lines
+        tool.set_changed_lines(changed_lines)
+
+        with measure_processes() as processes:
+            before: ResourceSnapshot = ResourceSnapshot.take()
+            try:
+                errors, cache_hit = self.__run_tool_cached(tool, changed_lines)
+            except Exception:
+                self.__metrics[tool.name] = ToolMetrics.measured(
+                    tool.name, before, ResourceSnapshot.take(), processes, failed=True
+                )
+                raise
+
+        if changed_lines is not None and not tool.filters_changed_lines:
+            errors = changed_lines.filter(errors)
+        tool_metrics: ToolMetrics = ToolMetrics.measured(
+            tool.name, before, ResourceSnapshot.take(), processes, len(errors), cache_hit
+        )
+        self.__metrics[tool.name] = tool_metrics
+        logging.debug(
+            'static tool [%s] took %.2fs and reported %d errors',
+            tool.name, tool_metrics.wall_time, tool_metrics.error_count
+        )
         return errors
+
+    def __run_tool_cached(
+        self, tool: StaticTool, changed_lines: Optional[ChangedLines]
+    ) -> Tuple[List[StaticError], bool]:
+        # only tools configured through this analyzer can be cached, for the others
+        # there is no record of the configs they were loaded with
+        if self.__cache is None or tool.name not in self.__configs:
+            return tool.run(), False
+
+        # tools that filter their errors themselves report differently for other changes to
+        # the same files. the others are run on whole files and their errors are filtered
+        # after the lookup, so a result is reused for any change to the same files
+        config: Any = self.__configs[tool.name]
+        if changed_lines is not None and tool.filters_changed_lines:
+            config = {'config': config, 'changed_lines': changed_lines.to_dict()}
+
+        key: Optional[str] = ResultCache.make_key(
+            tool.name, config, tool.input_files(), tool.dependency_files(), self.__root
+        )
+        if key is None:
+            return tool.run(), False
+
+        errors: Optional[List[StaticError]] = self.__cache.get(key, self.__root)
+        if errors is not None:
+            return errors, True
+        if not tool.filters_changed_lines:
+            tool.set_changed_lines(None)
+        errors = tool.run()
+        # the results of a tool stopped after its timeout are incomplete, they are not kept
+        if not any(error.error_name == 'Timeout Error' for error in errors):
+            self.__cache.put(key, errors, self.__root)
+        return errors, False
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+from . import StaticError
+
+
+class ResultCache:
+    """Cache for the errors reported by static tools
+
+    Results are kept in memory and evicted in least recently used order once
+    `max_entries` is reached. If a `directory` is given, every result is also
+    written to disk so it survives evictions and restarts of the bot.
+
+    Entries are keyed by `make_key`, which combines the name of the tool, its
+    configs and the content of the files it analyzes and of the files its results
+    depend on. A change to any of these produces a new key, so entries never have
+    to be invalidated.
+
+    If the files are in a checkout, such as the files of a pull request downloaded
+    into a temporary directory, the checkout can be given as `root`. Paths inside it
+    are then keyed and stored relative to it, so a result is reused for the same
+    files in another checkout.
+
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None):
+        """
+        Args:
+            max_entries (int, default=256): the number of results kept in memory
+            directory (str, default=None): the directory used for the on-disk tier. None
+                keeps results in memory only.
+
+        Raises:
+            ValueError: if `max_entries` is not a positive number
+
+        """
+        if max_entries < 1:
+            raise ValueError('max_entries must be a positive number')
+
+        self.__max_entries = max_entries
+        self.__directory = directory
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        tool_name: str,
+        config: Any,
+        file_paths: List[str],
+        dependency_paths: Sequence[str] = (),
+        root: Optional[str] = None,
+    ) -> Optional[str]:
+        """Creates the cache key for one run of a tool
+
+        Args:
+            tool_name (str): the name of the tool
+            config (json): the configs the tool was loaded with
+            file_paths ([str]): the files analyzed by the tool
+            dependency_paths ([str], default=()): other files the results depend on, such
+                as imported modules or config files (see `StaticTool.dependency_files`).
+                Files that do not exist are part of the key as missing files.
+            root (str, default=None): the checkout the files are in. Paths inside it, in
+                the configs as well, are keyed relative to it.
+
+        Returns:
+            str: a SHA-256 hex digest, or None if the run can not be cached because
+                the tool does not list any files or one of them can not be read
+
+        """
+        if not file_paths:
+            return None
+
+        key = hashlib.sha256()
+        key.update(tool_name.encode())
+        key.update(json.dumps(
+            _relative_config(config, root), sort_keys=True, default=repr).encode())
+
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'rb') as source:
+                    content_hash: str = hashlib.sha256(source.read()).hexdigest()
+            except OSError:
+                return None
+            key.update(_relative(file_path, root).encode())
+            key.update(content_hash.encode())
+
+        for dependency_path in dependency_paths:
+            try:
+                with open(dependency_path, 'rb') as source:
+                    content_hash = hashlib.sha256(source.read()).hexdigest()
+            except OSError:
+                content_hash = 'missing'
+            key.update(b'dependency ' + _relative(dependency_path, root).encode())
+            key.update(content_hash.encode())
+
+        return key.hexdigest()
+
+    def get(self, key: str, root: Optional[str] = None) -> Optional[List[StaticError]]:
+        """Looks up a cached result
+
+        Args:
+            key (str): a key created by `make_key`
+            root (str, default=None): the checkout of the current run, the errors stored
+                relative to the checkout they were found in are moved into it
+
+        Returns:
+            [StaticError]: the cached errors, or None on a cache miss
+
+        """
+        with self.__lock:
+            data = self.__entries.get(key)
+            if data is not None:
+                self.__entries.move_to_end(key)
+
+        if data is None and self.__directory is not None:
+            data = self.__read(key)
+            if data is not None:
+                self.__store(key, data)
+
+        with self.__lock:
+            if data is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+
+        if root is not None:
+            data = [
+                dict(error, file_path=os.path.join(root, error['file_path']))
+                if error['file_path'] and not os.path.isabs(error['file_path']) else error
+                for error in data
+            ]
+        return [StaticError.from_dict(error) for error in data]
+
+    def put(self, key: str, errors: List[StaticError], root: Optional[str] = None) -> None:
+        """Stores the errors reported by a tool
+
+        Args:
+            key (str): a key created by `make_key`
+            errors ([StaticError]): the errors reported by the tool
+            root (str, default=None): the checkout the errors were found in. Their files are
+                stored relative to it, files outside of it by their absolute path.
+
+        """
+        data = [error.to_dict() for error in errors]
+        if root is not None:
+            for error in data:
+                if error['file_path']:
+                    error['file_path'] = _relative(os.path.abspath(error['file_path']), root)
+        self.__store(key, data)
+
+        if self.__directory is not None:
+            self.__write(key, data)
+
+    def clear(self) -> None:
+        """Removes all in-memory entries and resets the hit and miss counters"""
+        with self.__lock:
+            self.__entries.clear()
+            self.__hits = 0
+            self.__misses = 0
+
+    @property
+    def hits(self) -> int:
+        """int: The number of lookups that found a cached result. """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """int: The number of lookups that did not find a cached result. """
+        return self.__misses
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __store(self, key: str, data: List[dict]) -> None:
+        with self.__lock:
+            self.__entries[key] = data
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__directory, key + '.json')
+
+    def __read(self, key: str) -> Optional[List[dict]]:
+        try:
+            with open(self.__path(key), 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def __write(self, key: str, data: List[dict]) -> None:
+        # write to a temporary file first so a concurrent reader never sees half an entry
+        temp_path: str = '%s.%d.%d.tmp' % (self.__path(key), os.getpid(), threading.get_ident())
+        with open(temp_path, 'w') as cache_file:
+            json.dump(data, cache_file)
+        os.replace(temp_path, self.__path(key))
+
+
+def _relative(path: str, root: Optional[str]) -> str:
+    # the path relative to `root` if it is inside of it, otherwise the path as given
+    if root is None:
+        return path
+    root = os.path.abspath(root)
+    absolute: str = os.path.abspath(path)
+    if absolute != root and not absolute.startswith(os.path.join(root, '')):
+        return path
+    return os.path.relpath(absolute, root)
+
+
+def _relative_config(config: Any, root: Optional[str]) -> Any:
+    # the configs with every path inside `root` made relative to it
+    if root is None:
+        return config
+    if isinstance(config, dict):
+        return {name: _relative_config(value, root) for name, value in config.items()}
+    if isinstance(config, (list, tuple)):
+        return [_relative_config(value, root) for value in config]
+    if isinstance(config, str):
+        return _relative(config, root)
+    return config
@@ -0,0 +1,130 @@
+"""
+Lightweight checks run by `CheckTool`. Every check handles the node types it is interested
+in and all checks share a single traversal of each file's syntax tree.
+"""
+
+import ast
+from typing import Any, Dict, List, Optional
+from . import StaticError, SourceFile
+
+
+class CheckContext:
+    """The file being traversed by `CheckTool`, passed to every handler of a `Check`"""
+
+    def __init__(self, file_path: str, source_file: SourceFile, tool_name: str = 'checks'):
+        """
+        Args:
+            file_path (str): the path of the file, as configured for the tool
+            source_file (SourceFile): the content of the file
+            tool_name (str, default='checks'): the name of the tool reporting the errors
+
+        """
+        self.__file_path = file_path
+        self.__source_file = source_file
+        self.__tool_name = tool_name
+        self.__parents: List[ast.AST] = []
+        self.__errors: List[StaticError] = []
+
+    @property
+    def file_path(self) -> str:
+        """str: The path of the file being traversed. """
+        return self.__file_path
+
+    @property
+    def source_file(self) -> SourceFile:
+        """SourceFile: The content of the file being traversed. """
+        return self.__source_file
+
+    @property
+    def parents(self) -> List[ast.AST]:
+        """[ast.AST]: The ancestors of the current node, the module first and its parent last. """
+        return self.__parents
+
+    @property
+    def errors(self) -> List[StaticError]:
+        """[StaticError]: The errors reported in the file so far. """
+        return self.__errors
+
+    def report(self, node: ast.AST, error_name: str, error_description: str) -> None:
+        """Reports an error on the first line of a node
+
+        Args:
+            node (ast.AST): the node the error is found in
+            error_name (str): the name of the error
+            error_description (str): what is wrong and how to fix it
+
+        """
+        line_no: int = getattr(node, 'lineno', 1)
+        lines: List[str] = self.__source_file.lines
+        self.__errors.append(
+            StaticError(
+                file_path=self.__file_path,
+                line_no=line_no,
+                code=lines[line_no - 1].strip() if line_no <= len(lines) else '',
+                error_name=error_name,
+                error_description=error_description,
+                tool_name=self.__tool_name,
+            )
+        )
+
+
+class Check:
+    """Base class for the checks run by `CheckTool`
+
+    A check defines a handler `visit_<NodeType>(self, node, context)` for every node type it
+    is interested in, such as `visit_ExceptHandler`. Handlers for base classes such as
+    `visit_stmt` or `visit_expr` receive every node of a subclass. Unlike `ast.NodeVisitor`
+    handlers do not traverse the children of the node, the tool visits every node once
+    and calls the handlers of all checks for it. Ancestors of the node are found in
+    `context.parents`.
+
+    Note:
+        The syntax tree is shared with the other tools and must not be modified. Python 3.7
+        parses literals to `Num`, `Str`, `Bytes` and `NameConstant` nodes, later versions to
+        `Constant` nodes.
+
+    Example:
+    ```python
+    class PrintCheck(Check):
+        name = 'print'
+        error_name = 'Print Call'
+
+        def visit_Call(self, node: ast.Call, context: CheckContext) -> None:
+            if isinstance(node.func, ast.Name) and node.func.id == 'print':
+                self.report(node, context, 'use logging instead of print')
+
+    register_check(PrintCheck)
+    ```
+
+    """
+
+    # the name used to select and configure the check
+    name: str = ''
+    # the name of the errors reported by the check
+    error_name: str = ''
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            config (Dict[str, Any], default=None): the options of the check, from the
+                "check_configs" of the tool's configs
+
+        """
+        self.config: Dict[str, Any] = dict(config or {})
+
+    def start_file(self, context: CheckContext) -> None:
+        """Called before the traversal of every file"""
+
+    def finish_file(self, context: CheckContext) -> None:
+        """Called after the traversal of every file"""
+
+    def report(self, node: ast.AST, context: CheckContext, error_description: str) -> None:
+        """Reports an error named `error_name` on the first line of a node
+
+        Args:
+            node (ast.AST): the node the error is found in
+            context (CheckContext): the context passed to the handler
+            error_description (str): what is wrong and how to fix it
+
+        """
+        context.report(node, self.error_name, error_description)
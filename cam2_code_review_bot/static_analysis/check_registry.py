@@ -0,0 +1,52 @@
+from typing import Dict, List, Type
+from .check import Check
+
+__CHECK_REGISTRY: Dict[str, Type[Check]] = dict()
+
+
+def register_check(check: Type[Check]) -> None:
+    """Defines a new check in the registry
+
+    Args:
+        check (Type[Check]): The class of the check. It is registered under its `name` and
+            instantiated with its configs every time `CheckTool` is configured.
+
+    Raises:
+        ValueError: If the check has no name or a check with its name is already registered
+    """
+    if not check.name:
+        raise ValueError("Check [" + check.__name__ + "] has no name")
+    if check.name in __CHECK_REGISTRY.keys():
+        raise ValueError("Check with name [" + check.name + "] already exists")
+    __CHECK_REGISTRY[check.name] = check
+
+
+def is_registered_check(name: str) -> bool:
+    """Checks if a check is registered
+
+    Returns:
+        bool: True if the check with `name` is registered
+    """
+    return name in __CHECK_REGISTRY.keys()
+
+
+def get_check(name: str) -> Type[Check]:
+    """Returns the check class registered with `name`
+
+    Args:
+        name (str): The name of the check.
+
+    Returns:
+        Type[Check]: The check class registered under `name`
+
+    Raises:
+        ValueError: If no check is registered with `name`
+    """
+    if not is_registered_check(name):
+        raise ValueError("Check with name [" + name + "] does not exist")
+    return __CHECK_REGISTRY[name]
+
+
+def registered_checks() -> List[str]:
+    """Returns the names of all registered checks, in the order they were registered"""
+    return list(__CHECK_REGISTRY.keys())
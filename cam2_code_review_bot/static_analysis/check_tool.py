@@ -0,0 +1,139 @@
+import ast
+import logging
+from typing import Any, Callable, Dict, List, Type
+from . import StaticError, StaticTool, SourceFile
+from .check import Check, CheckContext
+from .check_registry import get_check, registered_checks
+
+# a bound `visit_<NodeType>` method of a check
+Handler = Callable[[ast.AST, CheckContext], None]
+
+
+class CheckTool(StaticTool):
+    """Runs many lightweight checks in a single traversal of every file
+
+    Every registered `Check` declares handlers for the node types it is interested in. The
+    tool walks the syntax tree of each file once and calls, for every node, only the
+    handlers registered for its type. Adding a check costs the time of its handlers, not
+    another traversal of every file. The trees are read through `read_source` and shared
+    with the other tools of the analyzer.
+
+    """
+
+    def __init__(self):
+        super(CheckTool, self).__init__('checks')
+        self.checks: List[Check] = []
+        self.__handlers: Dict[type, List[Handler]] = {}
+
+    def load_config(self, config: Dict[str, Any]) -> None:
+        """Loads the specified ``configs`` for the checks
+
+        Configs:
+            file_path (str): The relative path to a file to check. This must be a ".py" file
+            file_paths ([str]): Several files to check. These must be ".py" files
+            directory (str): A directory, every ".py" file inside it is checked
+            checks ([str], optional): The names of the checks to run. Defaults to every
+                registered check (see `register_check`)
+            disable ([str], optional): The names of checks not to run
+            check_configs (Dict[str, Dict[str, Any]], optional): The options of each check,
+                by check name, such as `{"nested-loops": {"max_depth": 2}}`
+
+        Args:
+            config (Dict[str, Any]): Configs for the checks, (see above)
+
+        Raises:
+            ValueError: If none of "file_path", "file_paths" or "directory" is included in the config
+            ValueError: If a file is not a python file (".py" extension)
+            ValueError: If a check name is not registered
+
+        """
+        self.load_file_paths(config)
+
+        names: List[str] = list(config.get('checks', registered_checks()))
+        disabled: List[str] = list(config.get('disable', []))
+        check_configs: Dict[str, Dict[str, Any]] = config.get('check_configs', {})
+        for name in names + disabled + list(check_configs):
+            get_check(name)
+
+        self.checks = [
+            get_check(name)(check_configs.get(name)) for name in names if name not in disabled
+        ]
+        self.__handlers = {}
+
+    def run(self) -> List[StaticError]:
+        """Runs the configured checks on every file
+
+        Only files with changed lines are checked if the tool is restricted to the changes
+        of a pull request. Files that can not be parsed are skipped, pyflakes reports their
+        syntax errors.
+
+        Returns:
+            [StaticError]: the errors reported by the checks, in the order of the files and
+                of the nodes in each file
+
+        """
+        errors: List[StaticError] = []
+        for file_path in self.changed_files(self.file_paths):
+            try:
+                source_file: SourceFile = self.read_source(file_path)
+                tree: ast.AST = source_file.tree
+            except (OSError, SyntaxError, ValueError):
+                logging.warning('checks could not parse [%s], it is not checked', file_path)
+                continue
+            errors.extend(self.check_tree(file_path, source_file, tree))
+        return errors
+
+    def check_tree(self, file_path: str, source_file: SourceFile, tree: ast.AST) -> List[StaticError]:
+        """Runs the configured checks on one syntax tree
+
+        Args:
+            file_path (str): the path reported with the errors
+            source_file (SourceFile): the content of the file, used for the code of the errors
+            tree (ast.AST): the syntax tree of the file
+
+        Returns:
+            [StaticError]: the errors reported by the checks
+
+        """
+        context: CheckContext = CheckContext(file_path, source_file, self.name)
+        for check in self.checks:
+            check.start_file(context)
+
+        parents: List[ast.AST] = context.parents
+        # the tree is walked depth first without recursion. None marks the point where
+        # the children of the last parent are done.
+        stack: List[Any] = [tree]
+        while stack:
+            node: Any = stack.pop()
+            if node is None:
+                parents.pop()
+                continue
+
+            for handler in self.__node_handlers(type(node)):
+                handler(node, context)
+
+            children: List[ast.AST] = list(ast.iter_child_nodes(node))
+            if children:
+                parents.append(node)
+                stack.append(None)
+                stack.extend(reversed(children))
+
+        for check in self.checks:
+            check.finish_file(context)
+        return context.errors
+
+    def __node_handlers(self, node_type: Type[ast.AST]) -> List[Handler]:
+        # the handlers of each node type are looked up once per configuration, in the
+        # order of the checks and, within a check, most specific node type first
+        handlers = self.__handlers.get(node_type)
+        if handlers is None:
+            handlers = []
+            for check in self.checks:
+                for base in node_type.__mro__:
+                    handler = getattr(check, 'visit_' + base.__name__, None)
+                    if handler is not None:
+                        handlers.append(handler)
+                    if base is ast.AST:
+                        break
+            self.__handlers[node_type] = handlers
+        return handlers
@@ -0,0 +1,134 @@
+"""
+The checks that come with `CheckTool`. They are registered when the package is imported.
+"""
+
+import ast
+from typing import Any
+from .check import Check, CheckContext
+from .check_registry import register_check
+
+# nodes that start a new scope, loops outside of them do not run inside each other
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+
+
+def _is_none(node: ast.AST) -> bool:
+    # NameConstant on python 3.7, Constant on later versions
+    return type(node).__name__ in ('Constant', 'NameConstant') and getattr(node, 'value', 0) is None
+
+
+def _is_string(node: ast.AST) -> bool:
+    if isinstance(node, ast.JoinedStr):
+        return True
+    # Str on python 3.7, Constant on later versions
+    value: Any = getattr(node, 'value', getattr(node, 's', None))
+    return type(node).__name__ in ('Constant', 'Str') and isinstance(value, str)
+
+
+def _loop_depth(context: CheckContext) -> int:
+    # the number of loops the current node is nested in within its function
+    depth: int = 0
+    for parent in reversed(context.parents):
+        if isinstance(parent, _SCOPES):
+            break
+        if isinstance(parent, _LOOPS):
+            depth += 1
+    return depth
+
+
+class BareExceptCheck(Check):
+    """Reports `except:` without an exception type"""
+
+    name = 'bare-except'
+    error_name = 'Bare Except'
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler, context: CheckContext) -> None:
+        if node.type is None:
+            self.report(
+                node, context,
+                'except without a type also catches KeyboardInterrupt and SystemExit, '
+                'catch Exception or a more specific type'
+            )
+
+
+class MutableDefaultCheck(Check):
+    """Reports lists, dictionaries and sets used as default argument values"""
+
+    name = 'mutable-default'
+    error_name = 'Mutable Default Argument'
+
+    def visit_arguments(self, node: ast.arguments, context: CheckContext) -> None:
+        for default in list(node.defaults) + [d for d in node.kw_defaults if d is not None]:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)):
+                self.report(
+                    default, context,
+                    'the default value is created once and shared by every call, '
+                    'use None and create the value inside the function'
+                )
+
+
+class NoneComparisonCheck(Check):
+    """Reports `== None` and `!= None`"""
+
+    name = 'none-comparison'
+    error_name = 'Comparison To None'
+
+    def visit_Compare(self, node: ast.Compare, context: CheckContext) -> None:
+        operands = [node.left] + list(node.comparators)
+        for position, operator in enumerate(node.ops):
+            if isinstance(operator, (ast.Eq, ast.NotEq)) and (
+                _is_none(operands[position]) or _is_none(operands[position + 1])
+            ):
+                self.report(
+                    node, context,
+                    'use "is None" or "is not None", == calls __eq__ which can be overridden'
+                )
+                return
+
+
+class NestedLoopCheck(Check):
+    """Reports loops nested deeper than `max_depth` inside one function
+
+    Configs:
+        max_depth (int, optional): The deepest allowed nesting. Defaults to 3
+
+    """
+
+    name = 'nested-loops'
+    error_name = 'Deeply Nested Loop'
+
+    def visit_For(self, node: ast.AST, context: CheckContext) -> None:
+        max_depth: int = int(self.config.get('max_depth', 3))
+        depth: int = _loop_depth(context) + 1
+        # only the outermost loop that is too deep is reported, not every loop inside it
+        if depth == max_depth + 1:
+            self.report(
+                node, context,
+                '%d nested loops, the running time grows with the product of their lengths'
+                % depth
+            )
+
+    visit_AsyncFor = visit_For
+    visit_While = visit_For
+
+
+class StringConcatenationCheck(Check):
+    """Reports strings built with `+=` inside a loop"""
+
+    name = 'string-concat-in-loop'
+    error_name = 'String Concatenation In Loop'
+
+    def visit_AugAssign(self, node: ast.AugAssign, context: CheckContext) -> None:
+        if isinstance(node.op, ast.Add) and _is_string(node.value) and _loop_depth(context) > 0:
+            self.report(
+                node, context,
+                'every += copies the whole string, append the parts to a list and join them '
+                'after the loop'
+            )
+
+
+register_check(BareExceptCheck)
+register_check(MutableDefaultCheck)
+register_check(NoneComparisonCheck)
+register_check(NestedLoopCheck)
+register_check(StringConcatenationCheck)
@@ -0,0 +1,245 @@
+"""
+Persistent repository-wide index of code sub-trees, used by the duplicate tool
+to find clones of pull request code anywhere in a repository.
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+from typing import Iterable, List, Optional, Tuple
+from .source_cache import SourceCache
+from .duplicate_tool import fingerprint, span
+
+# sqlite limits the number of parameters in a single query
+_QUERY_CHUNK = 500
+# bump when `duplicate_tool.fingerprint` or `span` change, older indexes are built again
+_FORMAT_VERSION = 1
+
+
+class CloneIndex:
+    """On-disk index of the statements of every python file in a repository
+
+    Every statement with at least `min_nodes` child nodes is stored under its structural
+    fingerprint (see `duplicate_tool.fingerprint`) together with the file and lines it spans.
+    The index is stored in a SQLite database and updated incrementally: `update` only
+    re-indexes files whose content changed and drops files that were deleted. The database
+    is best kept outside of the checkout (see `default_path`), so it is never committed or
+    indexed itself.
+
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        repository: str,
+        min_nodes: int = 10,
+        source_cache: Optional[SourceCache] = None,
+        ignore: Iterable[str] = (),
+    ):
+        """
+        Args:
+            index_path (str): the SQLite database file. It and its directory are created if
+                they do not exist.
+            repository (str): the root directory of the repository checkout
+            min_nodes (int, default=10): statements with fewer child nodes are not indexed
+            source_cache (SourceCache, default=None): files are parsed through this cache,
+                so files the tools of the same run already parsed are not parsed again
+            ignore ([str], default=()): names of syntactic constructs that are not indexed,
+                the same as the `ignore` config of the duplicate tool
+
+        """
+        self.__repository = repository
+        self.__min_nodes = min_nodes
+        self.__source_cache = source_cache
+        self.__blacklist = frozenset(ignore)
+        if os.path.dirname(index_path):
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self.__connection = sqlite3.connect(index_path)
+        self.__connection.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS subtrees (
+                fingerprint BLOB NOT NULL,
+                path TEXT NOT NULL,
+                begin_line INTEGER NOT NULL,
+                end_line INTEGER NOT NULL,
+                node_count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS subtrees_fingerprint ON subtrees (fingerprint);
+            CREATE INDEX IF NOT EXISTS subtrees_path ON subtrees (path);
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            '''
+        )
+        # an index built with other settings, another fingerprint format or another python
+        # (whose ast differs) holds other statements, it is built again
+        settings = json.dumps(
+            [_FORMAT_VERSION, list(sys.version_info[:2]), min_nodes, sorted(self.__blacklist)])
+        with self.__connection:
+            row = self.__connection.execute(
+                "SELECT value FROM settings WHERE name = 'statements'").fetchone()
+            if row is None or row[0] != settings:
+                self.__connection.execute('DELETE FROM subtrees')
+                self.__connection.execute('DELETE FROM files')
+                self.__connection.execute(
+                    "INSERT OR REPLACE INTO settings VALUES ('statements', ?)", (settings,))
+
+    @staticmethod
+    def default_path(repository: str) -> str:
+        """Chooses where the index of a repository is stored if no path is given
+
+        The index is kept in the user's cache directory (`$XDG_CACHE_HOME`, or `~/.cache`),
+        outside of the checkout, with one database per repository directory.
+
+        Args:
+            repository (str): the root directory of the repository checkout
+
+        Returns:
+            str: the path of the SQLite database file
+
+        """
+        cache_home = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        name = hashlib.sha256(os.path.abspath(repository).encode()).hexdigest()[:16]
+        return os.path.join(cache_home, 'optimus', 'clone_index', name + '.sqlite')
+
+    def close(self) -> None:
+        """Closes the database connection"""
+        self.__connection.close()
+
+    def update(self) -> Tuple[int, int]:
+        """Brings the index up to date with the repository
+
+        Files are first compared by modification time and size, and only hashed if
+        those changed. Files are only parsed again if their content hash changed.
+
+        Returns:
+            Tuple[int, int]: the number of files (re-)indexed and the number of files removed
+
+        """
+        known = {
+            path: (mtime, size, content_hash)
+            for path, mtime, size, content_hash in self.__connection.execute(
+                'SELECT path, mtime, size, content_hash FROM files'
+            )
+        }
+        indexed = 0
+        seen = set()
+
+        with self.__connection:
+            for path in self.__python_files():
+                seen.add(path)
+                full_path = os.path.join(self.__repository, path)
+                stat = os.stat(full_path)
+                previous = known.get(path)
+                if previous is not None and previous[:2] == (stat.st_mtime, stat.st_size):
+                    continue
+
+                with open(full_path, 'rb') as source:
+                    content = source.read()
+                content_hash = hashlib.sha256(content).hexdigest()
+
+                if previous is None or previous[2] != content_hash:
+                    self.__index_file(path, content)
+                    indexed += 1
+                self.__connection.execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                    (path, stat.st_mtime, stat.st_size, content_hash),
+                )
+
+            removed = [path for path in known if path not in seen]
+            for path in removed:
+                self.__connection.execute('DELETE FROM subtrees WHERE path = ?', (path,))
+                self.__connection.execute('DELETE FROM files WHERE path = ?', (path,))
+
+        return indexed, len(removed)
+
+    def find(self, fingerprints: Iterable[bytes]) -> List[Tuple[bytes, str, int, int]]:
+        """Looks up indexed statements by fingerprint
+
+        Args:
+            fingerprints (Iterable[bytes]): the fingerprints to look for
+
+        Returns:
+            List[Tuple[bytes, str, int, int]]: (fingerprint, path, begin line, end line) of every
+                indexed statement with one of the fingerprints. Paths are relative to the
+                repository root.
+
+        """
+        fingerprints = list(set(fingerprints))
+        matches = []
+        for start in range(0, len(fingerprints), _QUERY_CHUNK):
+            chunk = fingerprints[start:start + _QUERY_CHUNK]
+            matches.extend(self.__connection.execute(
+                'SELECT fingerprint, path, begin_line, end_line FROM subtrees '
+                'WHERE fingerprint IN (%s) ORDER BY path, begin_line' % ', '.join('?' * len(chunk)),
+                chunk,
+            ))
+        return matches
+
+    def relative_path(self, file_path: str) -> str:
+        """Converts a local file path to the path used in the index
+
+        Args:
+            file_path (str): a path relative to the working directory
+
+        Returns:
+            str: the path relative to the repository root
+
+        """
+        return os.path.relpath(os.path.abspath(file_path), os.path.abspath(self.__repository))
+
+    def statements(self, tree: ast.AST) -> Iterable[Tuple[bytes, ast.AST, int, int, int]]:
+        """Lists the statements of a parsed file that are large enough to be indexed
+
+        Statements whose construct is ignored are left out, their children are still listed.
+
+        Args:
+            tree (ast.AST): the parsed file
+
+        Returns:
+            Iterable[Tuple[bytes, ast.AST, int, int, int]]: fingerprint, node, begin line, end
+                line and number of child nodes of every statement with at least `min_nodes`
+                child nodes
+
+        """
+        for node in ast.walk(tree):
+            if isinstance(node, ast.stmt) and node.__class__.__name__ not in self.__blacklist:
+                position = span(node)
+                if position.node_count >= self.__min_nodes:
+                    yield (fingerprint(node), node, position.begin_line,
+                           position.end_line, position.node_count)
+
+    def __python_files(self) -> Iterable[str]:
+        for root, dirs, files in os.walk(self.__repository):
+            dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    yield os.path.relpath(os.path.join(root, name), self.__repository)
+
+    def __index_file(self, path: str, content: bytes) -> None:
+        self.__connection.execute('DELETE FROM subtrees WHERE path = ?', (path,))
+        try:
+            if self.__source_cache is None:
+                tree = ast.parse(content)
+            else:
+                full_path = os.path.join(self.__repository, path)
+                tree = self.__source_cache.get(full_path, content).tree
+        except (SyntaxError, ValueError):
+            logging.warning('clone index could not parse [%s], it is not indexed', path)
+            return
+
+        self.__connection.executemany(
+            'INSERT INTO subtrees VALUES (?, ?, ?, ?, ?)',
+            ((fp, path, begin, end, count) for fp, _, begin, end, count in self.statements(tree)),
+        )
@@ -0,0 +1,239 @@
+"""
+Changed line ranges of a pull request, used to restrict analysis to the code a pull
+request touched.
+"""
+
+import bisect
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from . import StaticError
+
+# "@@ -old_start[,old_count] +new_start[,new_count] @@"
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+# the end of the range of a file whose changes are unknown, such as a file without a patch
+WHOLE_FILE: int = 2 ** 62
+
+
+def parse_patch(patch: str) -> List[Tuple[int, int]]:
+    """Finds the lines of the new version of a file that were added or changed by a patch
+
+    Removed lines do not exist in the new version of the file and are not included.
+
+    Args:
+        patch (str): the hunks of a unified diff of one file, such as the `patch` field of
+            the GitHub pull request files API
+
+    Returns:
+        [Tuple[int, int]]: the first and last line (inclusive) of every run of changed lines,
+            in order
+
+    """
+    ranges: List[Tuple[int, int]] = []
+    line_no: int = 0
+    for line in patch.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            line_no = int(header.group(1))
+        elif line.startswith('+'):
+            if ranges and ranges[-1][1] == line_no - 1:
+                ranges[-1] = (ranges[-1][0], line_no)
+            else:
+                ranges.append((line_no, line_no))
+            line_no += 1
+        elif line.startswith(' ') or line == '':
+            line_no += 1
+        # removed lines and "\ No newline at end of file" do not move the new file's lines
+    return ranges
+
+
+class ChangedLines:
+    """Index of the changed line ranges of every file in a pull request
+
+    The ranges of each file are kept sorted and merged so that looking up a line or a
+    range takes logarithmic time. Files are looked up by the path used in the diff, or by
+    a local path that ends with it, such as the path of a file downloaded into a directory.
+
+    Example:
+    ```python
+    changed_lines: ChangedLines = ChangedLines.from_files_metadata(
+        await Github.get_pull_request_files_metadata(pull_request_url)
+    )
+    static_analyzer: StaticAnalyzer = StaticAnalyzer(changed_lines=changed_lines)
+    ```
+
+    """
+
+    def __init__(self):
+        self.__begins: Dict[str, List[int]] = {}
+        self.__ends: Dict[str, List[int]] = {}
+        self.__resolved: Dict[str, Optional[str]] = {}
+
+    @staticmethod
+    def from_patches(patches: Dict[str, Optional[str]]) -> 'ChangedLines':
+        """Creates the index from the patch of every changed file
+
+        Args:
+            patches (Dict[str, str]): the patch of each file path. A file without a patch
+                (None), for example because the diff is too large, counts as changed entirely.
+
+        Returns:
+            ChangedLines: the changed lines of the files
+
+        """
+        changed_lines: ChangedLines = ChangedLines()
+        for file_path, patch in patches.items():
+            if patch is None:
+                changed_lines.add(file_path, 1, WHOLE_FILE)
+                continue
+            changed_lines.add_file(file_path)
+            for begin, end in parse_patch(patch):
+                changed_lines.add(file_path, begin, end)
+        return changed_lines
+
+    @staticmethod
+    def from_files_metadata(files_metadata: Iterable[Dict[str, Any]]) -> 'ChangedLines':
+        """Creates the index from the response of `Github.get_pull_request_files_metadata`
+
+        Removed files are skipped.
+
+        Args:
+            files_metadata (Iterable[Dict[str, Any]]): the file objects of the GitHub pull
+                request files API, with the fields "filename", "status" and "patch"
+
+        Returns:
+            ChangedLines: the changed lines of the files
+
+        """
+        return ChangedLines.from_patches({
+            file['filename']: file.get('patch')
+            for file in files_metadata if file.get('status') != 'removed'
+        })
+
+    def add_file(self, file_path: str) -> None:
+        """Adds a file without changed lines, such as a file that was only renamed
+
+        Args:
+            file_path (str): the path of the file in the diff
+
+        """
+        file_path = os.path.normpath(file_path)
+        self.__begins.setdefault(file_path, [])
+        self.__ends.setdefault(file_path, [])
+        self.__resolved.clear()
+
+    def add(self, file_path: str, begin: int, end: int) -> None:
+        """Marks lines of a file as changed
+
+        Args:
+            file_path (str): the path of the file in the diff
+            begin (int): the first changed line
+            end (int): the last changed line (inclusive)
+
+        """
+        self.add_file(file_path)
+        file_path = os.path.normpath(file_path)
+        begins: List[int] = self.__begins[file_path]
+        ends: List[int] = self.__ends[file_path]
+
+        # merge with every range that overlaps or touches [begin, end]
+        first: int = bisect.bisect_left(ends, begin - 1)
+        last: int = bisect.bisect_right(begins, end + 1)
+        if first < last:
+            begin = min(begin, begins[first])
+            end = max(end, ends[last - 1])
+        begins[first:last] = [begin]
+        ends[first:last] = [end]
+
+    @property
+    def files(self) -> List[str]:
+        """[str]: The paths of the changed files, as used in the diff"""
+        return list(self.__begins)
+
+    def ranges(self, file_path: str) -> List[Tuple[int, int]]:
+        """Gets the changed ranges of a file
+
+        Args:
+            file_path (str): the path of the file in the diff or a local path ending with it
+
+        Returns:
+            [Tuple[int, int]]: the first and last line of every changed range, in order.
+                Empty if the file did not change.
+
+        """
+        key: Optional[str] = self.__resolve(file_path)
+        if key is None:
+            return []
+        return list(zip(self.__begins[key], self.__ends[key]))
+
+    def __contains__(self, file_path: str) -> bool:
+        key: Optional[str] = self.__resolve(file_path)
+        return key is not None and len(self.__begins[key]) > 0
+
+    def intersects(self, file_path: str, begin: int, end: Optional[int] = None) -> bool:
+        """Checks if any of the lines `begin` to `end` of a file changed
+
+        Args:
+            file_path (str): the path of the file in the diff or a local path ending with it
+            begin (int): the first line
+            end (int, default=None): the last line (inclusive). Defaults to `begin`.
+
+        Returns:
+            bool: true if one of the lines changed
+
+        """
+        key: Optional[str] = self.__resolve(file_path)
+        if key is None:
+            return False
+        if end is None:
+            end = begin
+        # the first range ending at or after `begin` is the only one that can overlap
+        position: int = bisect.bisect_left(self.__ends[key], begin)
+        return position < len(self.__begins[key]) and self.__begins[key][position] <= end
+
+    def filter(self, errors: Iterable[StaticError]) -> List[StaticError]:
+        """Selects the errors reported on changed lines
+
+        Errors that do not belong to a file, such as a "Timeout Error", are always kept. Errors
+        about a whole file, without a line number, are kept if the file changed.
+
+        Args:
+            errors (Iterable[StaticError]): the errors being filtered
+
+        Returns:
+            [StaticError]: the errors on changed lines, in their original order
+
+        """
+        return [
+            error for error in errors
+            if not error.file_path
+            or (error.file_path in self if error.line_no is None
+                else self.intersects(error.file_path, error.line_no))
+        ]
+
+    def to_dict(self) -> Dict[str, List[Tuple[int, int]]]:
+        """Converts the index to a JSON serializable dictionary
+
+        Returns:
+            Dict[str, [Tuple[int, int]]]: the changed ranges of every file
+
+        """
+        return {file_path: self.ranges(file_path) for file_path in sorted(self.__begins)}
+
+    def __resolve(self, file_path: str) -> Optional[str]:
+        if file_path in self.__resolved:
+            return self.__resolved[file_path]
+
+        path: str = os.path.normpath(file_path)
+        key: Optional[str] = None
+        if path in self.__begins:
+            key = path
+        else:
+            # a local copy of a file is usually stored below some directory, the path in
+            # the diff is then a suffix of the local path. the longest match wins.
+            for candidate in self.__begins:
+                if path.endswith(os.sep + candidate) and (key is None or len(candidate) > len(key)):
+                    key = candidate
+        self.__resolved[file_path] = key
+        return key
@@ -5,9 +5,12 @@ Duplicate code detection tool - implemented using abstract syntax trees (AST)
 import ast
 import collections
 import argparse
+import hashlib
+import heapq
 import itertools
 import json
 from . import StaticError
+from . import SourceFile
 from . import StaticTool
 from . import StaticAnalyzer
 from typing import List
@@ -16,6 +19,9 @@ class DuplicateTool(StaticTool):
     Base class for duplicate tool
     """
 
+    # clones span several lines, they are reported if any of them changed
+    filters_changed_lines = True
+
     def __init__(self):
         # self.__name = name
         super(DuplicateTool, self).__init__('duplicate')
@@ -28,78 +34,223 @@ class DuplicateTool(StaticTool):
         and prepare the tool for execution (calling the ``run``
         method)
 
+        Configs:
+            FilePath (str): The file to search for clones
+            FilePaths ([str]): Several files to search together, clones are also
+                found between the files
+            Directory (str): A directory, every ".py" file inside it is searched
+            ignore ([str]): Names of syntactic constructs to ignore
+            min (int): Minimum number of clones before reporting as error
+            one_error_per_line (int): Set to 1 to report only one error per line
+            Repository (str, optional): Root of the repository checkout. If set, the
+                files are also compared against every python file in the repository
+                using a persistent clone index (see `clone_index.CloneIndex`)
+            IndexPath (str, optional): The clone index database. Defaults to a file in
+                the user's cache directory, outside of the checkout (see
+                `clone_index.CloneIndex.default_path`)
+            index_min_nodes (int, optional): Statements with fewer child nodes are
+                not compared against the repository. Defaults to 10
+            near_miss (bool, optional): Also report blocks that are similar but not
+                identical, such as copies with renamed variables or a few changed
+                lines (see `near_duplicate`). Defaults to false
+            similarity_threshold (float, optional): Minimum similarity (0 to 1) of two
+                blocks reported as near duplicates. Defaults to 0.8
+            near_miss_min_nodes (int, optional): Blocks with fewer nodes are not
+                compared as near duplicates. Defaults to 20
+            max_reports (int, optional): Only report the given number of clone
+                groups with the highest score (see `Clones.score`). Defaults to all
+
         Args:
             config (json): It is up to the subclass to define this
             dictionary.
 
+        Raises:
+            ValueError: If [min] or [max_reports] is not a positive integer
+            ValueError: If [similarity_threshold] is not greater than 0 and at most 1
+
         """
-        self.file_path = config['FilePath'] # File Path
+        self.load_file_paths(config, 'FilePath', 'FilePaths', 'Directory') # File Paths
         self.ignore = config['ignore']      # ignore predefined syntatic constructs ex. ignore all Add(), print(), assign() parameters
         self.min = int(config['min'])            # minimum number of clones before reporting as error
         self.one_error_per_line = int(config['one_error_per_line']) # report only one error per line
+        self.repository = config.get('Repository')   # repository searched for clones of the files
+        self.index_path = config.get('IndexPath')
+        self.index_min_nodes = int(config.get('index_min_nodes', 10))
+        self.near_miss = bool(config.get('near_miss', False))
+        self.similarity_threshold = float(config.get('similarity_threshold', 0.8))
+        self.near_miss_min_nodes = int(config.get('near_miss_min_nodes', 20))
+        self.max_reports = config.get('max_reports') # report only the highest scoring clone groups
+        if self.max_reports is not None:
+            self.max_reports = int(self.max_reports)
+
+        if self.min <= 0:
+            raise ValueError('Invalid config file. [min] must be a positive integer.')
+        if self.max_reports is not None and self.max_reports <= 0:
+            raise ValueError('Invalid config file. [max_reports] must be a positive integer.')
+        if not 0 < self.similarity_threshold <= 1:
+            raise ValueError('Invalid config file. [similarity_threshold] must be greater than 0 '
+                             'and at most 1.')
         return
 
     def run(self) -> List[StaticError]:
         """
         Main function
+
+        If the tool is restricted to the changes of a pull request, all
+        files are still searched but only clones with a changed line are
+        reported. Nothing is searched if none of the files changed.
         """
+        if not self.changed_files(self.file_paths):
+            return []
+
         sources = Index(self.ignore)
-        sources.add(self.file_path)
+        for file_path in self.file_paths:
+            sources.add(file_path, self.read_source(file_path))
         error_list = []
-        line_error = []
+        line_error = set()
 
         if self.one_error_per_line == 1:
             one_error_per_ln = True
         else:
             one_error_per_ln = False
 
-        for expr, clones in sources.clones():
+        region = None
+        if self.changed_lines is not None:
+            region = lambda clone: self.in_changed_lines(clone.file.name, clone.position)
+
+        for expr, clones in sources.clones(self.max_reports, self.min, region):
             repetitions = len(clones)
+            if region is not None:
+                clones = [clone for clone in clones if region(clone)]
             if repetitions >= self.min:
                 for filepath, group in itertools.groupby(clones, lambda clone: clone.file.name):
                     for clone in group:
                         begin, end, source = clone.source(' '*8)
                         if (one_error_per_ln == True):
-                            if (begin not in line_error):
+                            if ((filepath, begin) not in line_error):
                                 static_error: StaticError = StaticError(
-                                file_path = self.file_path,
+                                file_path = filepath,
                                 line_no = begin,
                                 error_name= "Duplicate code",
                                 error_description= ("%d repeated instances of: '%s'" %(repetitions, expr)),
                                 code= source.lstrip()
                                 )
-                                line_error.append(begin)
+                                line_error.add((filepath, begin))
                                 error_list.append(static_error)
                         else:
                             static_error: StaticError = StaticError(
-                            file_path = self.file_path,
+                            file_path = filepath,
                             line_no = begin,
                             error_name= "Duplicate code",
                             error_description= ("%d repeated instances of: '%s'" %(repetitions, expr)),
                             code= source.lstrip()
                             )
                             error_list.append(static_error)
-    
+
+        if self.near_miss:
+            error_list.extend(self.near_duplicates(sources, line_error if one_error_per_ln else None))
+
+        if self.repository:
+            error_list.extend(self.repository_clones(sources, line_error if one_error_per_ln else None))
+
+        return error_list
+
+    def in_changed_lines(self, file_path, position) -> bool:
+        '''
+        True if no changed lines are set or a line of `position` changed.
+        '''
+        return (self.changed_lines is None or self.changed_lines.intersects(
+            file_path, position.begin_line, position.end_line))
+
+    def input_files(self) -> List[str]:
+        '''
+        The results depend on the whole repository when `Repository` is
+        set, so they are not cached in that case.
+        '''
+        if self.repository:
+            return []
+        return super(DuplicateTool, self).input_files()
+
+    def near_duplicates(self, sources, line_error = None) -> List[StaticError]:
+        '''
+        Report blocks that are similar but not identical to another block.
+        Identical blocks are left to the exact clone report.
+        '''
+        from .near_duplicate import find_near_duplicates
+
+        near_duplicates = find_near_duplicates(
+            sources.trees, threshold = self.similarity_threshold,
+            min_nodes = self.near_miss_min_nodes)
+        error_list = []
+        for unit, other, similarity in sorted(near_duplicates,
+                key = lambda n: (n[0].file.name, n[0].begin)):
+            if not self.in_changed_lines(unit.file.name, span(unit.node)):
+                continue
+            if line_error is not None:
+                if (unit.file.name, unit.begin) in line_error:
+                    continue
+                line_error.add((unit.file.name, unit.begin))
+            error_list.append(StaticError(
+                file_path = unit.file.name,
+                line_no = unit.begin,
+                error_name= "Near-duplicate code",
+                error_description= ("%d%% similar to lines %d-%d of %s" %(
+                    similarity * 100, other.begin, other.end, other.file.name)),
+                code= unit.file.source[unit.begin-1].strip()
+            ))
         return error_list
+
+    def repository_clones(self, sources, line_error = None) -> List[StaticError]:
+        '''
+        Report statements of the indexed files that also appear in another
+        file of the repository. The repository index is updated first, which
+        only re-indexes files that changed since the previous run.
+        '''
+        from .clone_index import CloneIndex
+
+        index_path = self.index_path or CloneIndex.default_path(self.repository)
+        index = CloneIndex(index_path, self.repository, self.index_min_nodes,
+            self.source_cache, self.ignore)
+        try:
+            index.update()
+            error_list = []
+            for file, tree in sources.trees:
+                own_path = index.relative_path(file.name)
+                # unchanged statements are not looked up at all
+                statements = [statement for statement in index.statements(tree)
+                    if self.in_changed_lines(file.name, span(statement[1]))]
+                matches = collections.defaultdict(list)
+                for fp, path, begin, end in index.find(fp for fp, *_ in statements):
+                    if path != own_path:
+                        matches[fp].append('%s:%d-%d' % (path, begin, end))
+
+                # statements are listed outermost first, nested clones of a
+                # reported statement are not reported again
+                reported = []
+                for fp, node, begin, end, count in statements:
+                    if not matches[fp] or any(b <= begin and end <= e for b, e in reported):
+                        continue
+                    if line_error is not None:
+                        if (file.name, begin) in line_error:
+                            continue
+                        line_error.add((file.name, begin))
+                    reported.append((begin, end))
+                    error_list.append(StaticError(
+                        file_path = file.name,
+                        line_no = begin,
+                        error_name= "Duplicate code",
+                        error_description= ("clone of code in %s" % ', '.join(matches[fp][:3])),
+                        code= file.source[begin-1].strip()
+                    ))
+            return error_list
+        finally:
+            index.close()
         
-class Position(ast.NodeVisitor):
+class Position(collections.namedtuple('Position', 'begin_line end_line node_count')):
     '''
-    Find a clone position in the code (its line-span).
-    Count child nodes.
+    A clone position in the code (its line-span) and its number
+    of child nodes. See span().
     '''
-    def init(self, clone):
-        self.begin_line = self.end_line = clone.node.lineno
-        self.node_count = 0
-        self.generic_visit(clone.node)
-    def visit(self, node):
-        '''
-        Find node's line and column span
-        '''
-        if hasattr(node, 'lineno'):
-            self.begin_line = min(self.begin_line, node.lineno)
-            self.end_line = max(self.end_line, node.lineno)
-            self.node_count += 1
-            self.generic_visit(node)
 
 class Clone(collections.namedtuple('Clone', 'node file position')):
     '''
@@ -109,8 +260,6 @@ class Clone(collections.namedtuple('Clone', 'node file position')):
         '''
         Retrieve original source code.
         '''
-        if not hasattr(self.position, 'begin_line'):
-            self.position.init(self)
         lines = self.file.source[
             self.position.begin_line-1:self.position.end_line]
         return (self.position.begin_line, self.position.end_line,
@@ -124,31 +273,90 @@ class Clones(list):
         '''
         Provide a score for ordering clones while reporting.
         This sorts by number of nodes in the subtree, number
-        of clones of the node, and code size.
+        of clones of the node, and code size. The code size is
+        the length of the clone's source, taken from the line
+        lengths of its file instead of building the source.
         '''
         candidate = self[0] # Pick the first clone.
-        size = len(candidate.source()[-1])
-        return (candidate.position.node_count, len(self), size)
+        position = candidate.position
+        sizes = candidate.file.line_sizes()
+        size = (sizes[position.end_line] - sizes[position.begin_line - 1]
+                + position.end_line - position.begin_line)
+        return (position.node_count, len(self), size)
 
 class File: # SOURCE FILE
     def __init__(self, name, source):
         self.name = name
         self.source = source
+        self.__line_sizes = None
+
+    def line_sizes(self):
+        '''
+        return the total length of the first n lines without their
+        trailing whitespace, for every n. Computed once per file.
+        '''
+        if self.__line_sizes is None:
+            self.__line_sizes = [0]
+            for line in self.source:
+                self.__line_sizes.append(self.__line_sizes[-1] + len(line.rstrip()))
+        return self.__line_sizes
             
 def digest(node):
     '''
     return string representation of a sub-tree in the node.
     Emulates ast.dump(node, False).
+    Only used for reporting, sub-trees are compared with fingerprint().
     '''
     if isinstance(node, ast.AST):
-        if not hasattr(node, '_cached'):
-            node._cached = '%s(%s)' % (node.__class__.__name__, ', '.join(
-                digest(b) for a, b in ast.iter_fields(node)))
-        return node._cached
+        return '%s(%s)' % (node.__class__.__name__, ', '.join(
+            digest(b) for a, b in ast.iter_fields(node)))
     elif isinstance(node, list):
         return '[%s]' % ', '.join(digest(x) for x in node)
     return repr(node)
 
+def span(node):
+    '''
+    return the Position of a sub-tree in the node: the first and last
+    line of the node and its descendants, and the number of descendants.
+    Only descendants reachable through nodes with a line number count.
+    Computed bottom-up and cached on the node like fingerprint().
+    '''
+    cached = getattr(node, '_span', None)
+    if cached is None:
+        begin_line = end_line = node.lineno
+        node_count = 0
+        for child in ast.iter_child_nodes(node):
+            if hasattr(child, 'lineno'):
+                child_span = span(child)
+                begin_line = min(begin_line, child_span.begin_line)
+                end_line = max(end_line, child_span.end_line)
+                node_count += child_span.node_count + 1
+        cached = node._span = Position(begin_line, end_line, node_count)
+    return cached
+
+def fingerprint(node):
+    '''
+    return a 128-bit structural hash of a sub-tree in the node.
+    Two sub-trees have the same fingerprint exactly when their digest()
+    strings are equal (up to hash collisions). A node's hash is built
+    from the fixed-size hashes of its children and cached on the node,
+    so hashing a whole tree visits every node once.
+    '''
+    if isinstance(node, ast.AST):
+        cached = getattr(node, '_fingerprint', None)
+        if cached is None:
+            h = hashlib.blake2b(b'N' + node.__class__.__name__.encode(), digest_size=16)
+            for a, b in ast.iter_fields(node):
+                h.update(fingerprint(b))
+            cached = node._fingerprint = h.digest()
+        return cached
+    elif isinstance(node, list):
+        h = hashlib.blake2b(b'L%d' % len(node), digest_size=16)
+        for x in node:
+            h.update(fingerprint(x))
+        return h.digest()
+    return hashlib.blake2b(b'V' + repr(node).encode(), digest_size=16).digest()
+
 class Index(ast.NodeVisitor):
     '''
     A source code repository.
@@ -159,13 +367,17 @@ class Index(ast.NodeVisitor):
         '''
         self.nodes = collections.defaultdict(Clones)
         self.blacklist = frozenset(exclude)
-    def add(self, file):
+        self.trees = []
+    def add(self, file, source_file = None):
         '''
-        Add a file to the index and parse it.
+        Add a file to the index and parse it. An already read
+        `source_file` (see `StaticTool.read_source`) is not parsed again.
         '''
-        source = open(file).readlines()
-        tree = ast.parse(''.join(source))
-        self._file = File(file, source)
+        if source_file is None:
+            source_file = SourceFile.read(file)
+        tree = source_file.tree
+        self._file = File(file, source_file.lines)
+        self.trees.append((self._file, tree))
         self.generic_visit(tree)
     def visit(self, node):
         '''
@@ -173,14 +385,22 @@ class Index(ast.NodeVisitor):
         '''
         if hasattr(node, 'lineno'):
             if node.__class__.__name__ not in self.blacklist:
-                expr = digest(node)
-                self.nodes[expr].append(
-                    Clone(node, self._file, Position()))
+                self.nodes[fingerprint(node)].append(
+                    Clone(node, self._file, span(node)))
         self.generic_visit(node)
-    def clones(self):
+    def clones(self, top = None, min_clones = 2, region = None):
         '''
-        Returns a list of duplicate constructs.
+        Returns a list of duplicate constructs with at least `min_clones`
+        clones. If `top` is set only the `top` highest scoring ones are
+        returned. The readable digest() string is only built for these.
+        If `region` is set, only constructs with at least one clone for
+        which region(clone) is true are returned.
         '''
-        return sorted(((expr, nodes) 
-            for expr, nodes in self.nodes.items() if len(nodes) > 1),
-                key = lambda n: n[1].score(), reverse = True)        
\ No newline at end of file
+        duplicates = (nodes for nodes in self.nodes.values()
+            if len(nodes) >= max(min_clones, 2)
+            and (region is None or any(region(clone) for clone in nodes)))
+        if top is None:
+            duplicates = sorted(duplicates, key = lambda n: n.score(), reverse = True)
+        else:
+            duplicates = heapq.nlargest(top, duplicates, key = lambda n: n.score())
+        return [(digest(nodes[0].node), nodes) for nodes in duplicates]
@@ -1,12 +1,32 @@
+from typing import Any, Dict
+
+
 class StaticError:
     """Data structure class for error report information.
     
+    Note:
+        Errors use `__slots__` and have no per-instance `__dict__`, large runs create
+        many of them. To store many errors compactly see `ErrorBatch`.
+
     TODO:
         Replace error names with enums. This is to better help data 
             collection metrics
 
     """
 
+    __slots__ = (
+        '__file_path',
+        '__line_no',
+        '__code',
+        '__error_id',
+        '__error_name',
+        '__error_description',
+        '__tool_name',
+        '__is_false_positive',
+        '__pull_request',
+        '__commit_hash',
+    )
+
     def __init__(
         self,
         file_path: str = '',
@@ -94,4 +114,37 @@ class StaticError:
 
         md: str = f"{self.error_name} reported on line {self.line_no}: {self.error_description}\n`{self.code}`"
 
-        return md
\ No newline at end of file
+        return md
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this error to a JSON serializable dictionary
+
+        Returns:
+            Dict[str, Any]: the fields of this error keyed by their constructor argument names
+
+        """
+        return {
+            'file_path': self.file_path,
+            'line_no': self.line_no,
+            'code': self.code,
+            'error_id': self.error_id,
+            'error_name': self.error_name,
+            'error_description': self.error_description,
+            'tool_name': self.tool_name,
+            'is_false_positive': self.is_false_positive,
+            'pull_request': self.pull_request,
+            'commit_hash': self.commit_hash,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'StaticError':
+        """Creates an error from a dictionary created by `to_dict`
+
+        Args:
+            data (Dict[str, Any]): the fields of the error
+
+        Returns:
+            StaticError: the error described by `data`
+
+        """
+        return StaticError(**data)
@@ -0,0 +1,284 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from . import StaticError
+
+# the fields of a StaticError, in the order of its constructor arguments
+FIELDS: Tuple[str, ...] = (
+    'file_path',
+    'line_no',
+    'code',
+    'error_id',
+    'error_name',
+    'error_description',
+    'tool_name',
+    'is_false_positive',
+    'pull_request',
+    'commit_hash',
+)
+
+
+class _StringColumn:
+    """A column of strings that are repeated often, each distinct value is stored once"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.rows: array = array('I')
+
+    def append(self, value: str) -> None:
+        value_id: Optional[int] = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        self.rows.append(value_id)
+
+    def __getitem__(self, row: int) -> str:
+        return self.values[self.rows[row]]
+
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (values[value_id] for value_id in self.rows)
+
+
+class _IntColumn:
+    """A column of integers kept in a typed array
+
+    None, such as the line of an error about a whole file, is stored as a sentinel value. A
+    column that receives any other value that is not an integer falls back to a list.
+    """
+
+    # the smallest 64 bit integer stands for None
+    NONE: int = -2 ** 63
+
+    def __init__(self):
+        self.values: Any = array('q')
+
+    def append(self, value: Any) -> None:
+        if isinstance(self.values, array):
+            if value is None:
+                self.values.append(_IntColumn.NONE)
+                return
+            if isinstance(value, int) and not isinstance(value, bool) and \
+                    _IntColumn.NONE < value < 2 ** 63:
+                self.values.append(value)
+                return
+            self.values = list(self)
+        self.values.append(value)
+
+    def __getitem__(self, row: int) -> Any:
+        value: Any = self.values[row]
+        if value == _IntColumn.NONE and isinstance(self.values, array):
+            return None
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        if not isinstance(self.values, array):
+            return iter(self.values)
+        return (None if value == _IntColumn.NONE else value for value in self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ErrorBatch:
+    """Column-wise storage for a large number of `StaticError`s
+
+    Instead of one object per error, every field is stored in its own column. File paths,
+    error names, tool names and commit hashes repeat across errors and are interned per batch,
+    descriptions and code are nearly always distinct and are kept in plain lists. Numbers are
+    kept in typed arrays, a missing number such as the line of an error about a whole file is
+    kept as None. Errors are only created as `StaticError` objects when they are
+    iterated over or indexed, one at a time.
+
+    Example:
+    ```python
+    batch: ErrorBatch = ErrorBatch(errors)
+    for file_path, file_errors in batch.group_by_file().items():
+        for name, line_no in file_errors.rows('error_name', 'line_no'):
+            ...
+    ```
+
+    """
+
+    def __init__(self, errors: Iterable[StaticError] = ()):
+        """
+        Args:
+            errors (Iterable[StaticError], default=()): errors added to the batch
+
+        """
+        self.__file_path: _StringColumn = _StringColumn()
+        self.__line_no: _IntColumn = _IntColumn()
+        self.__code: List[str] = []
+        self.__error_id: _IntColumn = _IntColumn()
+        self.__error_name: _StringColumn = _StringColumn()
+        self.__error_description: List[str] = []
+        self.__tool_name: _StringColumn = _StringColumn()
+        self.__is_false_positive: bytearray = bytearray()
+        self.__pull_request: _IntColumn = _IntColumn()
+        self.__commit_hash: _StringColumn = _StringColumn()
+        self.extend(errors)
+
+    def append(self, error: StaticError) -> None:
+        """Adds an error to the end of this batch
+
+        Args:
+            error (StaticError): the error being added
+
+        """
+        self.__file_path.append(error.file_path)
+        self.__line_no.append(error.line_no)
+        self.__code.append(error.code)
+        self.__error_id.append(error.error_id)
+        self.__error_name.append(error.error_name)
+        self.__error_description.append(error.error_description)
+        self.__tool_name.append(error.tool_name)
+        self.__is_false_positive.append(bool(error.is_false_positive))
+        self.__pull_request.append(error.pull_request)
+        self.__commit_hash.append(error.commit_hash)
+
+    def extend(self, errors: Iterable[StaticError]) -> None:
+        """Adds several errors to the end of this batch
+
+        Args:
+            errors (Iterable[StaticError]): the errors being added. Another `ErrorBatch`
+                is accepted as well.
+
+        """
+        for error in errors:
+            self.append(error)
+
+    def column(self, field: str) -> Iterable:
+        """Gets all values of one field
+
+        Args:
+            field (str): the name of a `StaticError` property, such as "line_no"
+
+        Returns:
+            Iterable: the values of `field`, in the order of the errors
+
+        Raises:
+            ValueError: if `field` is not a field of `StaticError`
+
+        """
+        if field not in FIELDS:
+            raise ValueError('[' + field + '] is not a field of StaticError')
+        if field == 'is_false_positive':
+            return (bool(value) for value in self.__is_false_positive)
+        return getattr(self, '_ErrorBatch__' + field)
+
+    def rows(self, *fields: str) -> Iterator[tuple]:
+        """Iterates over some fields of every error without creating `StaticError` objects
+
+        Args:
+            *fields (str): the names of the fields, all fields if none are given
+
+        Returns:
+            Iterator[tuple]: one tuple per error with the values of `fields`
+
+        """
+        return zip(*(self.column(field) for field in (fields or FIELDS)))
+
+    def filter(
+        self,
+        file_path: Optional[str] = None,
+        tool_name: Optional[str] = None,
+        error_name: Optional[str] = None,
+        min_line: Optional[int] = None,
+        max_line: Optional[int] = None,
+    ) -> 'ErrorBatch':
+        """Selects the errors matching all of the given criteria
+
+        Args:
+            file_path (str, default=None): only errors reported in this file
+            tool_name (str, default=None): only errors reported by this tool
+            error_name (str, default=None): only errors with this name
+            min_line (int, default=None): only errors on or after this line
+            max_line (int, default=None): only errors on or before this line
+
+        Returns:
+            ErrorBatch: a new batch with the matching errors
+
+        """
+        selected: Iterable[int] = range(len(self))
+        for column, value in (
+            (self.__file_path, file_path),
+            (self.__tool_name, tool_name),
+            (self.__error_name, error_name),
+        ):
+            if value is not None:
+                # compare the interned ids instead of the strings
+                value_id: Optional[int] = column.ids.get(value)
+                selected = [row for row in selected if column.rows[row] == value_id]
+        if min_line is not None:
+            selected = [row for row in selected if _line_at_least(self.__line_no[row], min_line)]
+        if max_line is not None:
+            selected = [row for row in selected if _line_at_least(max_line, self.__line_no[row])]
+        return self.__select(selected)
+
+    def group_by_file(self) -> Dict[str, 'ErrorBatch']:
+        """Splits this batch by the file the errors were reported in
+
+        Returns:
+            Dict[str, ErrorBatch]: one batch per file path, in order of first appearance
+
+        """
+        groups: Dict[int, List[int]] = {}
+        for row, value_id in enumerate(self.__file_path.rows):
+            groups.setdefault(value_id, []).append(row)
+        return {
+            self.__file_path.values[value_id]: self.__select(rows)
+            for value_id, rows in groups.items()
+        }
+
+    def to_list(self) -> List[StaticError]:
+        """Creates a `StaticError` for every error in this batch
+
+        Returns:
+            [StaticError]: the errors, in order
+
+        """
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.__line_no)
+
+    def __getitem__(self, row: int) -> StaticError:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('ErrorBatch index out of range')
+        return StaticError(
+            file_path=self.__file_path[row],
+            line_no=self.__line_no[row],
+            code=self.__code[row],
+            error_id=self.__error_id[row],
+            error_name=self.__error_name[row],
+            error_description=self.__error_description[row],
+            tool_name=self.__tool_name[row],
+            is_false_positive=bool(self.__is_false_positive[row]),
+            pull_request=self.__pull_request[row],
+            commit_hash=self.__commit_hash[row],
+        )
+
+    def __iter__(self) -> Iterator[StaticError]:
+        return (StaticError(*row) for row in self.rows())
+
+    def __select(self, rows: Iterable[int]) -> 'ErrorBatch':
+        batch: ErrorBatch = ErrorBatch()
+        for row in rows:
+            batch.__file_path.append(self.__file_path[row])
+            batch.__line_no.append(self.__line_no[row])
+            batch.__code.append(self.__code[row])
+            batch.__error_id.append(self.__error_id[row])
+            batch.__error_name.append(self.__error_name[row])
+            batch.__error_description.append(self.__error_description[row])
+            batch.__tool_name.append(self.__tool_name[row])
+            batch.__is_false_positive.append(self.__is_false_positive[row])
+            batch.__pull_request.append(self.__pull_request[row])
+            batch.__commit_hash.append(self.__commit_hash[row])
+        return batch
+
+
+def _line_at_least(line_no: Any, min_line: Any) -> bool:
+    # errors without a line number are never selected by a line range
+    return isinstance(line_no, int) and isinstance(min_line, int) and line_no >= min_line
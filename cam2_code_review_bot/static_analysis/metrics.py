@@ -0,0 +1,194 @@
+"""
+Resource usage of the runs of static tools, recorded by `StaticAnalyzer`.
+"""
+
+import collections
+import resource
+import time
+from typing import Any, Dict, Sequence
+
+# the CPU time of the calling thread only, so tools run in parallel are told apart. the whole
+# process is measured where per thread usage is not supported.
+_RUSAGE_THREAD: int = getattr(resource, 'RUSAGE_THREAD', resource.RUSAGE_SELF)
+
+
+class ResourceSnapshot(collections.namedtuple(
+    'ResourceSnapshot', 'wall_time user_time system_time'
+)):
+    """The clock and resource usage at one point of a tool run, see `ResourceSnapshot.take`"""
+    __slots__ = ()
+
+    @staticmethod
+    def take() -> 'ResourceSnapshot':
+        """Reads the clock and the resource usage of this thread
+
+        Returns:
+            ResourceSnapshot: the current usage, subtracted from a later snapshot by
+                `ToolMetrics.measured`
+
+        """
+        thread = resource.getrusage(_RUSAGE_THREAD)
+        return ResourceSnapshot(time.perf_counter(), thread.ru_utime, thread.ru_stime)
+
+
+class ToolMetrics:
+    """Time, CPU and memory used by one run of a static tool
+
+    Note:
+        The subprocess CPU time and the peak memory only include the processes the tool
+        started through `StaticTool.run_command`, each measured on its own when it exited
+        (see `measure_processes`), so tools run in parallel are told apart. The memory of
+        tools running inside the bot's process is not measured, their peak is 0.
+
+    """
+
+    __slots__ = (
+        '__tool_name',
+        '__wall_time',
+        '__user_time',
+        '__system_time',
+        '__children_user_time',
+        '__children_system_time',
+        '__peak_rss_kb',
+        '__error_count',
+        '__cache_hit',
+        '__failed',
+    )
+
+    def __init__(
+        self,
+        tool_name: str,
+        wall_time: float = 0.0,
+        user_time: float = 0.0,
+        system_time: float = 0.0,
+        children_user_time: float = 0.0,
+        children_system_time: float = 0.0,
+        peak_rss_kb: int = 0,
+        error_count: int = 0,
+        cache_hit: bool = False,
+        failed: bool = False,
+    ):
+        self.__tool_name = tool_name
+        self.__wall_time = wall_time
+        self.__user_time = user_time
+        self.__system_time = system_time
+        self.__children_user_time = children_user_time
+        self.__children_system_time = children_system_time
+        self.__peak_rss_kb = peak_rss_kb
+        self.__error_count = error_count
+        self.__cache_hit = cache_hit
+        self.__failed = failed
+
+    @staticmethod
+    def measured(
+        tool_name: str,
+        before: ResourceSnapshot,
+        after: ResourceSnapshot,
+        processes: Sequence[Any] = (),
+        error_count: int = 0,
+        cache_hit: bool = False,
+        failed: bool = False,
+    ) -> 'ToolMetrics':
+        """Creates the metrics of a run from the snapshots taken before and after it
+
+        Args:
+            tool_name (str): the name of the tool that ran
+            before (ResourceSnapshot): taken right before the run, on the thread running it
+            after (ResourceSnapshot): taken right after the run, on the same thread
+            processes ([resource.struct_rusage], default=()): the usage of the processes the
+                run started, see `measure_processes`
+            error_count (int, default=0): the number of errors the run reported
+            cache_hit (bool, default=False): true if the errors came from a `ResultCache`
+            failed (bool, default=False): true if the tool raised an exception
+
+        Returns:
+            ToolMetrics: the usage between the snapshots and of the processes
+
+        """
+        return ToolMetrics(
+            tool_name,
+            wall_time=after.wall_time - before.wall_time,
+            user_time=after.user_time - before.user_time,
+            system_time=after.system_time - before.system_time,
+            children_user_time=sum(usage.ru_utime for usage in processes),
+            children_system_time=sum(usage.ru_stime for usage in processes),
+            peak_rss_kb=max((usage.ru_maxrss for usage in processes), default=0),
+            error_count=error_count,
+            cache_hit=cache_hit,
+            failed=failed,
+        )
+
+    @property
+    def tool_name(self) -> str:
+        """str: The name of the tool that ran. """
+        return self.__tool_name
+
+    @property
+    def wall_time(self) -> float:
+        """float: The seconds the run took. """
+        return self.__wall_time
+
+    @property
+    def user_time(self) -> float:
+        """float: The user mode CPU seconds of the thread running the tool. """
+        return self.__user_time
+
+    @property
+    def system_time(self) -> float:
+        """float: The kernel mode CPU seconds of the thread running the tool. """
+        return self.__system_time
+
+    @property
+    def children_user_time(self) -> float:
+        """float: The user mode CPU seconds of the subprocesses the tool ran. """
+        return self.__children_user_time
+
+    @property
+    def children_system_time(self) -> float:
+        """float: The kernel mode CPU seconds of the subprocesses the tool ran. """
+        return self.__children_system_time
+
+    @property
+    def cpu_time(self) -> float:
+        """float: The total CPU seconds of the run, including subprocesses. """
+        return self.user_time + self.system_time + self.children_user_time + self.children_system_time
+
+    @property
+    def peak_rss_kb(self) -> int:
+        """int: The peak resident memory in kilobytes of the largest subprocess the tool ran. """
+        return self.__peak_rss_kb
+
+    @property
+    def error_count(self) -> int:
+        """int: The number of errors the run reported. """
+        return self.__error_count
+
+    @property
+    def cache_hit(self) -> bool:
+        """bool: True if the errors were taken from the cache instead of running the tool. """
+        return self.__cache_hit
+
+    @property
+    def failed(self) -> bool:
+        """bool: True if the tool raised an exception. """
+        return self.__failed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts these metrics to a JSON serializable dictionary
+
+        Returns:
+            Dict[str, Any]: the fields of these metrics keyed by their constructor argument names
+
+        """
+        return {
+            'tool_name': self.tool_name,
+            'wall_time': self.wall_time,
+            'user_time': self.user_time,
+            'system_time': self.system_time,
+            'children_user_time': self.children_user_time,
+            'children_system_time': self.children_system_time,
+            'peak_rss_kb': self.peak_rss_kb,
+            'error_count': self.error_count,
+            'cache_hit': self.cache_hit,
+            'failed': self.failed,
+        }
@@ -1,7 +1,21 @@
 import json
-import subprocess
-from typing import List, Dict, Any
-from . import StaticError, StaticAnalyzer, StaticTool
+import logging
+import os
+from typing import List, Dict, Any, Optional
+from . import StaticError, StaticAnalyzer, StaticTool, ProcessResult, run_process
+
+# the files mypy reads its configs from, in the directory it is run in
+_CONFIG_FILES: List[str] = ["mypy.ini", ".mypy.ini", "pyproject.toml", "setup.cfg"]
+# seconds without a check after which a daemon exits by itself
+_DAEMON_IDLE_TIMEOUT: int = 3600
+
+
+def _checked(result: ProcessResult) -> bool:
+    # true if mypy checked the files, a run with errors ends with "Found N errors in ..."
+    if result.returncode == 0:
+        return True
+    lines: List[bytes] = result.stdout.splitlines()
+    return result.returncode == 1 and bool(lines) and lines[-1].startswith(b'Found ')
 
 
 class MyPyTool(StaticTool):
@@ -9,6 +23,13 @@ class MyPyTool(StaticTool):
 
     MyPy is a static analysis tool designed to typecheck python code
 
+    In daemon mode the checks are sent to a long-lived mypy daemon (dmypy), one per repository
+    checkout. The daemon keeps the analysis of typeshed and all dependencies in memory and only
+    re-checks the files that changed since its last run. A daemon exits by itself once it
+    was idle for `daemon_idle_timeout` seconds, `stop_daemon` stops it right away. The daemon
+    skips imported modules that are not checked themselves. If it can not run the check, the
+    files are checked by a regular mypy run instead.
+
     """
 
     def __init__(self):
@@ -19,54 +40,158 @@ class MyPyTool(StaticTool):
 
         Configs:
             file_path (str): The relative path to the file to run mypy on. This must be a ".py" file
+            file_paths ([str]): Several files to check in a single mypy run. These must be ".py" files
+            directory (str): A directory, every ".py" file inside it is checked
+            daemon (bool, optional): If true mypy is run through a dmypy daemon. Defaults to false.
+            root (str, optional): The repository checkout the daemon belongs to. Each root gets its
+                own daemon, which is run inside it. Defaults to the current directory.
+            daemon_idle_timeout (int, optional): Seconds without a check after which the daemon
+                exits. Defaults to one hour.
+            cache_dir (str, optional): The persistent mypy cache directory used by the daemon.
+                Defaults to ".mypy_cache" inside `root`.
+            timeout (float, optional): Seconds after which mypy is stopped. The errors reported
+                until then are returned along with a "Timeout Error". By default there is no timeout.
 
         Args:
             config (Dict[str, Any]): Configs for mypy, (see above)
 
         Raises:
-            ValueError: If "file_path" config is not included in the config file
-            ValueError: If "file_path" config is not a python file (".py" extension)
+            ValueError: If none of "file_path", "file_paths" or "directory" is included in the config
+            ValueError: If a file is not a python file (".py" extension)
 
         """
-        if not "file_path" in config:
-            raise ValueError('Invalid config file. [file_type] not defined.')
+        self.load_file_paths(config)
+        self.load_timeout(config)
 
-        self.file_path = config["file_path"]
-
-        if not '.py' in self.file_path:
-            raise ValueError('Invalid file type provided. File must have the extension ".py"')
+        self.daemon: bool = bool(config.get("daemon", False))
+        self.root: str = config.get("root", ".")
+        self.daemon_idle_timeout: int = int(config.get("daemon_idle_timeout", _DAEMON_IDLE_TIMEOUT))
+        self.cache_dir: str = config.get("cache_dir", os.path.join(self.root, ".mypy_cache"))
 
     def run(self) -> List[StaticError]:
         """Runs mypy with the given configs set by `load_config`
 
+        Only files with changed lines are checked if the tool is restricted to the changes
+        of a pull request, mypy still follows their imports.
+
         Returns:
             [StaticError]: a list of all dead code errors reported by mypy
 
         """
+        # list of static errors reported by mypy
+        error_list = []
+
+        file_paths: List[str] = self.changed_files(self.file_paths)
+        if not file_paths:
+            return error_list
+
+        if self.daemon:
+            stdout: Optional[bytes] = self.__run_daemon(file_paths, error_list)
+            if stdout is not None:
+                # the daemon runs inside `root` and reports the files relative to it
+                root: str = os.path.abspath(self.root)
+                paths: Dict[str, str] = {
+                    os.path.relpath(os.path.abspath(path), root): path for path in file_paths
+                }
+                return self.__parse_output(stdout, error_list, paths)
+
+        stdout = self.run_command(["mypy"] + file_paths, error_list).stdout
+
+        return self.__parse_output(stdout, error_list)
+
+    def dependency_files(self) -> List[str]:
+        """The mypy configs and the other python files of the packages of the checked files
+
+        mypy follows imports, so an error can come from a change to a module the checked files
+        import (see `StaticTool.package_modules`). Installed packages are not included.
+
+        Returns:
+            [str]: the paths of the files
+
+        """
+        config_files: List[str] = _CONFIG_FILES
+        if self.daemon:
+            # the daemon is run inside `root` and reads the configs there
+            config_files = [os.path.join(self.root, config_file) for config_file in _CONFIG_FILES]
+        return config_files + self.package_modules()
+
+    def stop_daemon(self) -> None:
+        """Stops the daemon started for the configured `root`, if it is running"""
+        run_process(
+            ["dmypy", "--status-file", self.__status_file(), "stop"],
+            self.timeout,
+            cwd=self.root,
+        )
 
-        process = subprocess.Popen(
-            "mypy " + self.file_path, shell=True, stdout=subprocess.PIPE
+    def __status_file(self) -> str:
+        # the status file identifies the daemon, keeping it in the cache directory gives
+        # every repository checkout its own daemon
+        return os.path.abspath(os.path.join(self.cache_dir, "dmypy.json"))
+
+    def __run_daemon(self, file_paths: List[str], error_list: List[StaticError]) -> Optional[bytes]:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        root: str = os.path.abspath(self.root)
+
+        # `dmypy run` starts the daemon if it is not running yet and otherwise only
+        # re-checks the files that changed since the previous run. The daemon is run
+        # inside `root`, so it reads the configs of that checkout only. It refuses to
+        # start unless imported modules that are not checked are skipped.
+        result: ProcessResult = self.run_command(
+            [
+                "dmypy",
+                "--status-file",
+                self.__status_file(),
+                "run",
+                "--timeout",
+                str(self.daemon_idle_timeout),
+                "--",
+                "--cache-dir",
+                os.path.abspath(self.cache_dir),
+                "--follow-imports=skip",
+            ]
+            + [os.path.relpath(os.path.abspath(path), root) for path in file_paths],
+            error_list,
+            cwd=root,
         )
-        stdout, _ = process.communicate()
 
-        # list of static errors reported by vulture
-        error_list = []
-        
+        # a full run would take even longer than the daemon did
+        if result.timed_out:
+            return result.stdout
+
+        # 0 means the check found no errors, 1 with a summary line means it found errors.
+        # dmypy also exits with 1 when the daemon could not start or run the check
+        if not _checked(result):
+            logging.warning(
+                'mypy daemon failed, falling back to a full mypy run: %s', result.stderr.decode()
+            )
+            return None
+
+        return result.stdout
+
+    def __parse_output(
+        self, stdout: bytes, error_list: List[StaticError], paths: Optional[Dict[str, str]] = None
+    ) -> List[StaticError]:
         for output_encoded in stdout.splitlines():
 
             # decode the string output
             output:str = output_encoded.decode()
-            
+
             if output.startswith('Found'):
                 continue
 
             partition: str = output.partition(':')
             file_path: str = partition[0]
+            if paths is not None:
+                file_path = paths.get(file_path, file_path)
 
             # remove the output that was parsed
             output = partition[2]
             partition = output.partition(':')
-            
+
+            # lines such as "Success: ..." or "Daemon started" are not error reports
+            if not partition[0].isdigit():
+                continue
+
             line_number: int = int(partition[0])
 
             output = partition[2]
@@ -84,3 +209,4 @@ class MyPyTool(StaticTool):
             error_list.append(static_error)
 
         return error_list
+
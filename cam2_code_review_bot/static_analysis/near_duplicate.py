@@ -0,0 +1,210 @@
+"""
+Near-miss (Type-2/Type-3) clone detection for the duplicate tool.
+
+Code blocks are normalized so identifier names and literal values do not
+matter, cut into overlapping shingles, and compared through MinHash
+signatures. Locality-sensitive hashing buckets the signatures so only
+blocks that are likely to be similar are ever compared with each other.
+"""
+
+import ast
+import collections
+import hashlib
+import random
+from typing import Dict, List, Set, Tuple
+from .duplicate_tool import fingerprint, span
+
+# node types whose sub-trees are compared with each other
+UNIT_TYPES = (
+    ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.For, ast.AsyncFor,
+    ast.While, ast.If, ast.With, ast.AsyncWith, ast.Try,
+)
+
+# a Mersenne prime larger than every 64-bit shingle hash
+_PRIME = (1 << 61) - 1
+
+
+class Unit:
+    '''
+    A block of code compared for near duplicates.
+    '''
+    def __init__(self, file, node, tokens):
+        self.file = file
+        self.node = node
+        self.begin = node.lineno
+        self.end = span(node).end_line
+        self.size = len(tokens)
+        self.shingles: Set[int] = set()
+        self.signature: Tuple[int, ...] = ()
+
+    def contains(self, other):
+        '''
+        True if `other` lies inside this unit (or is the same unit).
+        '''
+        return (self.file is other.file and self.begin <= other.begin
+                and other.end <= self.end)
+
+    def overlaps(self, other):
+        '''
+        True if both units share lines of the same file.
+        '''
+        return (self.file is other.file and self.begin <= other.end
+                and other.begin <= self.end)
+
+
+def normalized_tokens(node):
+    '''
+    return the node types of a sub-tree in depth-first order.
+    Identifiers, literal values and expression contexts are dropped,
+    so renamed copies of a block produce the same tokens.
+    '''
+    tokens = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ast.expr_context):
+            continue
+        tokens.append(current.__class__.__name__)
+        stack.extend(reversed(list(ast.iter_child_nodes(current))))
+    return tokens
+
+
+def shingles(tokens, size):
+    '''
+    return the 64-bit hashes of all runs of `size` consecutive tokens.
+    '''
+    return {
+        int.from_bytes(hashlib.blake2b(
+            ' '.join(tokens[i:i + size]).encode(), digest_size=8).digest(), 'big')
+        for i in range(max(len(tokens) - size + 1, 1))
+    }
+
+
+class MinHash:
+    '''
+    MinHash signatures with `num_perm` random hash functions.
+    '''
+    def __init__(self, num_perm, seed=1):
+        generator = random.Random(seed)
+        self.permutations = [
+            (generator.randrange(1, _PRIME), generator.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, values):
+        '''
+        return the signature of a set of 64-bit hashes.
+        '''
+        return tuple(
+            min((a * value + b) % _PRIME for value in values)
+            for a, b in self.permutations
+        )
+
+
+def jaccard(first, second):
+    '''
+    return the Jaccard similarity of two shingle sets.
+    '''
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def find_near_duplicates(files, threshold=0.8, shingle_size=5, num_perm=64,
+                         bands=16, min_nodes=20, max_bucket_size=100):
+    '''
+    Find similar but not identical code blocks in parsed files.
+
+    Args:
+        files: (File, tree) pairs as collected by duplicate_tool.Index
+        threshold (float): minimum Jaccard similarity of two blocks' shingles
+        shingle_size (int): number of consecutive tokens in a shingle
+        num_perm (int): number of hash functions in a MinHash signature
+        bands (int): number of LSH bands. Must divide `num_perm`. More bands
+            find more candidates with a lower similarity
+        min_nodes (int): blocks with fewer nodes are ignored
+        max_bucket_size (int): LSH buckets with more distinct blocks are
+            skipped, they hold boilerplate rather than copies and comparing
+            all of their pairs would be quadratic
+
+    Returns:
+        a list of (unit, most similar other unit, similarity), one entry per
+        unit that has a near duplicate, largest blocks first. Blocks nested
+        in an already reported block are not reported again.
+    '''
+    if num_perm % bands != 0:
+        raise ValueError('num_perm must be a multiple of bands')
+    rows = num_perm // bands
+
+    units: List[Unit] = []
+    unit_tokens: List[List[str]] = []
+    for file, tree in files:
+        for node in ast.walk(tree):
+            if isinstance(node, UNIT_TYPES):
+                tokens = normalized_tokens(node)
+                if len(tokens) >= min_nodes:
+                    units.append(Unit(file, node, tokens))
+                    unit_tokens.append(tokens)
+
+    # exact copies have the same tokens and so the same shingles. only one
+    # unit of every group of copies is hashed and compared, its matches are
+    # shared by the whole group
+    copies: Dict[bytes, List[int]] = collections.defaultdict(list)
+    for position, unit in enumerate(units):
+        copies[fingerprint(unit.node)].append(position)
+    groups: List[List[int]] = list(copies.values())
+
+    minhash = MinHash(num_perm)
+    buckets: Dict[Tuple, List[int]] = collections.defaultdict(list)
+    for group, positions in enumerate(groups):
+        unit = units[positions[0]]
+        unit.shingles = shingles(unit_tokens[positions[0]], shingle_size)
+        unit.signature = minhash.signature(unit.shingles)
+        for band in range(bands):
+            buckets[(band, unit.signature[band * rows:(band + 1) * rows])].append(group)
+
+    # every pair of groups sharing a bucket is verified once, even if both
+    # are already known to be similar to a third group, so the match of a
+    # block does not depend on the order the pairs are visited in
+    def key(position):
+        return units[position].file.name, units[position].begin
+
+    compared: Set[Tuple[int, int]] = set()
+    best: Dict[int, Tuple[int, float]] = {}
+    for members in buckets.values():
+        if len(members) > max_bucket_size:
+            continue
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                pair = (min(first, second), max(first, second))
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                similarity = jaccard(units[groups[first][0]].shingles,
+                                     units[groups[second][0]].shingles)
+                if similarity < threshold:
+                    continue
+                for group, other in ((first, second), (second, first)):
+                    for position in groups[group]:
+                        # a block is not a near duplicate of the lines it spans
+                        match = next((candidate for candidate in groups[other]
+                                      if not units[position].overlaps(units[candidate])), None)
+                        if match is None:
+                            continue
+                        # ties go to the first block in the files, whichever was visited first
+                        current = best.get(position)
+                        if (current is None or similarity > current[1] or (
+                                similarity == current[1]
+                                and key(match) < key(current[0]))):
+                            best[position] = (match, similarity)
+    reported: Dict[int, List[Unit]] = collections.defaultdict(list)
+    near_duplicates = []
+    for position in sorted(best, key=lambda p: (-units[p].size, units[p].file.name,
+                                               units[p].begin)):
+        unit = units[position]
+        if any(outer.contains(unit) for outer in reported[id(unit.file)]):
+            continue
+        reported[id(unit.file)].append(unit)
+        other, similarity = best[position]
+        near_duplicates.append((unit, units[other], similarity))
+    return near_duplicates
@@ -1,8 +1,67 @@
+import ast
 import json
-import subprocess
-import re
-from typing import List, Dict, Any
-from . import StaticError, StaticTool
+import logging
+import math
+import os
+import statistics
+import pstats
+import sys
+import tempfile
+from typing import List, Dict, Any, Optional, Tuple
+from . import StaticError, StaticTool, ProcessResult, SourceCache, SourceFile
+from .duplicate_tool import span
+
+
+def _function_spans(file_path: str, source_cache: Optional[SourceCache] = None) -> Dict[int, int]:
+    """Maps the first line of every function in a file to its last line
+
+    The first line is the line cProfile reports for the function, the line of its first
+    decorator if it has any. The file is parsed through `source_cache` if one is given.
+
+    """
+    try:
+        source_file: SourceFile = (
+            SourceFile.read(file_path) if source_cache is None else source_cache.get(file_path)
+        )
+        tree: ast.AST = source_file.tree
+    except (OSError, SyntaxError, ValueError):
+        return {}
+    spans: Dict[int, int] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            first_line: int = min(
+                [node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])]
+            )
+            spans[first_line] = max(spans.get(first_line, 0), span(node).end_line)
+    return spans
+
+
+def _binomial(n: int, k: int) -> int:
+    return math.factorial(n) // (math.factorial(k) * math.factorial(n - k))
+
+
+def _median_confidence_interval(samples: List[float], confidence: float) -> Tuple[float, float]:
+    """Distribution free confidence interval of the median of `samples`
+
+    The bounds are order statistics of the samples, chosen with the binomial distribution so
+    the interval holds the true median with at least `confidence` probability. With too few
+    samples for that confidence the full range of the samples is returned.
+
+    """
+    ordered: List[float] = sorted(samples)
+    n: int = len(ordered)
+    alpha: float = 1.0 - confidence
+
+    # the k-th smallest and k-th largest samples enclose the median with probability
+    # 1 - 2 * P(Binomial(n, 1/2) < k)
+    k: int = 1
+    tail: float = 0.0
+    while k < (n + 1) // 2:
+        tail += _binomial(n, k - 1) / 2 ** n
+        if 2 * (tail + _binomial(n, k) / 2 ** n) > alpha:
+            break
+        k += 1
+    return ordered[k - 1], ordered[n - k]
 
 class PerformanceProfilerTool(StaticTool):
     """Implements the cProfile module using the StaticTool interface.
@@ -14,9 +73,17 @@ class PerformanceProfilerTool(StaticTool):
 
     """
 
-    file_path: str = ''
+    file_paths: List[str] = []
     number_of_calls_thresh: int = 0
     cumulative_time_thresh: float = 0.0
+    sort: str = 'stdname'
+    top_n: Optional[int] = None
+    # a function is reported on its first line, but is kept if any of its lines changed
+    filters_changed_lines: bool = True
+    baseline_file_path: Optional[str] = None
+    repetitions: int = 5
+    regression_threshold: float = 0.1
+    confidence: float = 0.95
 
     def __init__(self):
         super(PerformanceProfilerTool, self).__init__("performance-profiler")
@@ -29,35 +96,62 @@ class PerformanceProfilerTool(StaticTool):
             can be present in the config file. If a config is excluded then it is ignored when the 
             profiler is run. 
 
+            If `baseline_file_path` is set the profiler runs in comparison mode instead: the same
+            entry script is profiled `repetitions` times in the checkout of the base commit and
+            in the checkout of the head commit. Functions whose median cumulative time or number
+            of calls grew by more than `regression_threshold` are reported, time regressions
+            only if the confidence intervals of the two medians do not overlap. In this mode
+            the thresholds are optional and `cumulative_time_thresh` is the minimum median time
+            of a function at head for it to be compared.
+
         Configs:
             file_path (str): The relative path to the file to run the profiler on. This must be a
                 ".py" file
+            file_paths ([str]): Several scripts to profile. Each one is run on its own. These must
+                be ".py" files
+            directory (str): A directory, every ".py" file inside it is profiled
             number_of_calls_thresh (int): the minimum number of calls needed to classify a piece 
                 of code as a performance error. This must be a postive value, negative values are
                 ignored.
             cumulative_time_thresh (float): the minimum amount of execution time in seconds needed
                 to classify a piece of code as a performance error. This must be a postive value, 
                 negative values are ignored.
+            sort (str, optional): the order the profiled functions are checked in, any sort key
+                accepted by `pstats.Stats.sort_stats` such as "cumulative", "tottime" or "calls".
+                Defaults to "stdname", the order of the file and line.
+            top_n (int, optional): only the first `top_n` functions of the profiled file, in the
+                order of `sort`, are checked. By default every function is checked.
+            baseline_file_path (str, optional): The entry script in a checkout of the base commit.
+                Enables comparison mode, `file_path` is then the same script at the head commit.
+            repetitions (int, optional): how often each version is profiled in comparison mode.
+                Defaults to 5.
+            regression_threshold (float, optional): the minimum relative growth of a median
+                reported as a regression, 0.1 is 10%. Defaults to 0.1.
+            confidence (float, optional): the confidence level of the median confidence
+                intervals. Defaults to 0.95.
+            timeout (float, optional): Seconds after which a profiled script is stopped. No
+                profile is written then and a "Timeout Error" is reported instead. By default
+                there is no timeout.
 
         Args:
             config (Dict[str, Any]): Configs for performance profiler, (see above)
 
         Raises:
-            ValueError: If "file_path" config is not included in the config file
-            ValueError: If "file_path" config is not a python file (".py" extension)
+            ValueError: If none of "file_path", "file_paths" or "directory" is included in the config
+            ValueError: If a file is not a python file (".py" extension)
             ValueError: If "number_of_calls_thresh" and "cumulative_time_thresh" are not included
                 in the config file.
+            ValueError: If "sort" is not a pstats sort key or "top_n" is not a positive integer
+            ValueError: If comparison mode is given more than one file or invalid settings
         """
 
-        if not "file_path" in config:
-            raise ValueError('Invalid config file. [file_type] not defined.')
-
-        self.file_path = config['file_path']
+        self.load_file_paths(config)
+        self.load_timeout(config)
 
-        if not '.py' in self.file_path:
-            raise ValueError('Invalid file type provided. File must have the extension ".py"')
-
-        if not "number_of_calls_thresh" in config and not "cumulative_time_thresh" in config:
+        self.baseline_file_path = config.get('baseline_file_path')
+        if self.baseline_file_path is not None:
+            self.__load_comparison_config(config)
+        elif not "number_of_calls_thresh" in config and not "cumulative_time_thresh" in config:
             raise ValueError('Invalid config file. [number_of_calls_thresh] or \
                 [cumulative_time_thresh] must be defined.')
 
@@ -67,51 +161,100 @@ class PerformanceProfilerTool(StaticTool):
         if "cumulative_time_thresh" in config:
             self.cumulative_time_thresh = config['cumulative_time_thresh']
 
+        self.sort = config.get('sort', 'stdname')
+        if self.sort not in pstats.Stats.sort_arg_dict_default:
+            raise ValueError('Invalid config file. [sort] must be one of: '
+                             + ', '.join(sorted(pstats.Stats.sort_arg_dict_default)))
+
+        self.top_n = config.get('top_n')
+        if self.top_n is not None and (not isinstance(self.top_n, int) or self.top_n <= 0):
+            raise ValueError('Invalid config file. [top_n] must be a positive integer.')
+
+    def __load_comparison_config(self, config: Dict[str, Any]) -> None:
+        if len(self.file_paths) != 1:
+            raise ValueError('Invalid config file. Comparison mode profiles exactly one file.')
+        if not self.baseline_file_path.endswith('.py'):
+            raise ValueError('Invalid file type provided. File must have the extension ".py"')
+
+        self.repetitions = config.get('repetitions', 5)
+        if not isinstance(self.repetitions, int) or self.repetitions <= 0:
+            raise ValueError('Invalid config file. [repetitions] must be a positive integer.')
+
+        self.regression_threshold = float(config.get('regression_threshold', 0.1))
+        if self.regression_threshold < 0.0:
+            raise ValueError('Invalid config file. [regression_threshold] must not be negative.')
+
+        self.confidence = float(config.get('confidence', 0.95))
+        if not 0.0 < self.confidence < 1.0:
+            raise ValueError('Invalid config file. [confidence] must be between 0 and 1.')
+
+    def input_files(self) -> List[str]:
+        """The results are not cached
+
+        Profiling runs the modules the scripts import and measures time, a cached result
+        would go stale when a library changes and would keep a single noisy sample.
+
+        Returns:
+            [str]: no files, so the analyzer never caches this tool
+
+        """
+        return []
+
     def run(self) -> List[StaticError]:
         """Runs cProfile with the given configs set by `load_config`
 
+        If the tool is restricted to the changes of a pull request, scripts without changed
+        lines are not profiled and only functions with a changed line are checked. Regressions
+        found in comparison mode are always reported, a change can slow down code that did
+        not change itself.
+
         Returns:
             List[StaticError]: a list of all performance errors reported by cProfile
 
         """
+        if self.baseline_file_path is not None:
+            return self.__compare(self.baseline_file_path, self.file_paths[0])
+
         error_list = []
-        # this is run via the subshell so it can be executed on an entire python file.
-        process = subprocess.Popen(
-            "python -m cProfile " + self.file_path, shell=True, stdout=subprocess.PIPE
-        )
-        stdout, _ = process.communicate()
-
-        for output_encoded in stdout.splitlines():
-
-            # the output from stdouy is a byte array so it must be decoded
-            output: str = output_encoded.decode()
-            
-            # this selects only lines that contain a full data entry to a python file from the
-            # output from provided by the profiler. If this regex is not matched then either, 
-            # 1. the output is not a direct result of source code being reviewed and is irrelevant
-            # 2. the output is missing a statistic that is needed for the report.
-            match = re.search(r'(\d+(\/|\.)?(\d*))\s+(\d+(\/|\.)?(\d*))\s+(\d+(\/| |\.)?(\d*))\s+(\d+(\/| |\.)?(\d*))\s+(\d+(\/| |\.)?(\d*)) \w*\.py:\d+\(\w+\)', output)
-            if match == None:
-                # match was not found, skip this entry
-                continue
+        # every script is executed by its own interpreter, profiling them in one process
+        # would let the scripts interfere with each other
+        for file_path in self.changed_files(self.file_paths):
+            error_list.extend(self.__profile(file_path))
+        return error_list
 
-            number_of_calls: int = int(match.group(1))
-            cumulative_time: float = float(re.findall(r'\d+\.\d+', match.group(0))[2])
+    def __profile(self, file_path: str) -> List[StaticError]:
+        error_list = []
 
-            location: str = re.findall(r'\w+\.py', match.group(0))[0]
-            line_number: int = int(re.findall(r':\d+', match.group(0))[0][1:])
-            function: str = re.findall(r'\(\w+\)', match.group(0))[0][1:-1]
-            
-            if not self.file_path.endswith(location):
-                # not the file being tested, skip this entry
-                continue
+        stats: Optional[pstats.Stats] = self.__load_stats(file_path, error_list)
+        if stats is None:
+            return error_list
+
+        stats.sort_stats(self.sort)
+        entries = [
+            function for function in stats.fcn_list if self.__is_profiled_file(function[0], file_path)
+            # the module body covers the whole run of the script, it is not a function
+            and function[2] != '<module>'
+        ]
+        if self.changed_lines is not None:
+            spans: Dict[int, int] = _function_spans(file_path, self.source_cache)
+            entries = [
+                function for function in entries if self.changed_lines.intersects(
+                    file_path, function[1], spans.get(function[1], function[1]))
+            ]
+        if self.top_n is not None:
+            entries = entries[:self.top_n]
+
+        for function in entries:
+            # pstats stores primitive calls, total calls, total time, cumulative time and callers
+            _, number_of_calls, _, cumulative_time, _ = stats.stats[function]
+            _, line_number, function_name = function
 
             # check the number of calls, skip if not defined in config
             if number_of_calls >= self.number_of_calls_thresh and self.number_of_calls_thresh >= 0:
                 static_error: StaticError = StaticError(
-                    file_path=self.file_path,
+                    file_path=file_path,
                     line_no=line_number,
-                    code=function,
+                    code=function_name,
                     error_name='number of calls error',
                     error_description='exceeded the threshhold for maximum number of function calls',
                     tool_name='Performance Profiler'
@@ -121,9 +264,9 @@ class PerformanceProfilerTool(StaticTool):
             # check the cumulative execution time, skip is not defined in config
             if cumulative_time >= self.cumulative_time_thresh and self.cumulative_time_thresh >= 0.0:
                 static_error: StaticError = StaticError(
-                    file_path=self.file_path,
+                    file_path=file_path,
                     line_no=line_number,
-                    code=function,
+                    code=function_name,
                     error_name='execution time error',
                     error_description='exceeded the threshhold for maximum execution time',
                     tool_name='Performance Profiler'
@@ -131,3 +274,120 @@ class PerformanceProfilerTool(StaticTool):
                 error_list.append(static_error)
 
         return error_list
+
+    @staticmethod
+    def __is_profiled_file(profiled_path: str, file_path: str) -> bool:
+        # built-in functions are recorded with the file name "~"
+        return os.path.abspath(profiled_path) == os.path.abspath(file_path)
+
+    def __load_stats(self, file_path: str, error_list: List[StaticError]) -> Optional[pstats.Stats]:
+        with tempfile.TemporaryDirectory() as directory:
+            profile_path: str = os.path.join(directory, 'profile.out')
+
+            # this is run in a subprocess so it can be executed on an entire python file.
+            # the profile is written in the binary pstats format, the output of the script
+            # itself is not needed.
+            result: ProcessResult = self.run_command(
+                [sys.executable, "-m", "cProfile", "-o", profile_path, file_path],
+                error_list,
+                capture_stdout=False,
+            )
+
+            if result.timed_out:
+                return None
+            if not os.path.exists(profile_path):
+                logging.warning('could not profile [%s]: %s', file_path, result.stderr.decode())
+                return None
+
+            return pstats.Stats(profile_path)
+
+    def __sample(
+        self, file_path: str, error_list: List[StaticError]
+    ) -> Optional[Dict[Tuple[str, str], Tuple[int, int, float]]]:
+        # profiles one run of `file_path` and keys its functions on the file relative to the
+        # script's directory and the function name. line numbers are not part of the key, they
+        # move between the base and head commits.
+        stats: Optional[pstats.Stats] = self.__load_stats(file_path, error_list)
+        if stats is None:
+            return None
+
+        root: str = os.path.dirname(os.path.abspath(file_path))
+        sample: Dict[Tuple[str, str], Tuple[int, int, float]] = {}
+        for (path, line_number, function_name), entry in stats.stats.items():
+            path = os.path.abspath(path)
+            # built-in functions, the standard library and installed packages are not
+            # part of the code being reviewed
+            if function_name == '<module>' or not path.startswith(root + os.sep):
+                continue
+            _, number_of_calls, _, cumulative_time, _ = entry
+            sample[(os.path.relpath(path, root), function_name)] = (
+                line_number, number_of_calls, cumulative_time
+            )
+        return sample
+
+    def __compare(self, baseline_path: str, head_path: str) -> List[StaticError]:
+        error_list = []
+        baseline_samples = []
+        head_samples = []
+        # the two versions are run alternately so that changes in the load of the machine
+        # affect both of them alike
+        for _ in range(self.repetitions):
+            for path, samples in ((baseline_path, baseline_samples), (head_path, head_samples)):
+                sample = self.__sample(path, error_list)
+                if sample is None:
+                    return error_list
+                samples.append(sample)
+
+        head_root: str = os.path.dirname(head_path)
+        for key in sorted(set().union(*head_samples)):
+            # functions new in the head commit have nothing to be compared with
+            if not all(key in sample for sample in baseline_samples):
+                continue
+
+            # a function not called in a run of the head commit took no time in it
+            line_number: int = max(sample.get(key, (0, 0, 0.0))[0] for sample in head_samples)
+            head_calls = [sample.get(key, (0, 0, 0.0))[1] for sample in head_samples]
+            head_times = [sample.get(key, (0, 0, 0.0))[2] for sample in head_samples]
+            baseline_calls = [sample[key][1] for sample in baseline_samples]
+            baseline_times = [sample[key][2] for sample in baseline_samples]
+
+            file_path: str = os.path.join(head_root, key[0])
+            function_name: str = key[1]
+
+            baseline_median: float = statistics.median(baseline_calls)
+            head_median: float = statistics.median(head_calls)
+            if head_median > baseline_median * (1.0 + self.regression_threshold):
+                error_list.append(StaticError(
+                    file_path=file_path,
+                    line_no=line_number,
+                    code=function_name,
+                    error_name='number of calls regression',
+                    error_description='median number of calls grew from %g to %g (%+d)' % (
+                        baseline_median, head_median, head_median - baseline_median),
+                    tool_name='Performance Profiler'
+                ))
+
+            baseline_median = statistics.median(baseline_times)
+            head_median = statistics.median(head_times)
+            if head_median < self.cumulative_time_thresh:
+                continue
+            baseline_low, baseline_high = _median_confidence_interval(baseline_times, self.confidence)
+            head_low, head_high = _median_confidence_interval(head_times, self.confidence)
+            if (head_median > baseline_median * (1.0 + self.regression_threshold)
+                    and head_low > baseline_high):
+                error_list.append(StaticError(
+                    file_path=file_path,
+                    line_no=line_number,
+                    code=function_name,
+                    error_name='execution time regression',
+                    error_description=(
+                        'median cumulative time grew from %.4fs to %.4fs (%+.4fs), '
+                        '%d%% confidence intervals [%.4fs, %.4fs] and [%.4fs, %.4fs]' % (
+                            baseline_median, head_median, head_median - baseline_median,
+                            round(self.confidence * 100), baseline_low, baseline_high,
+                            head_low, head_high)
+                    ),
+                    tool_name='Performance Profiler'
+                ))
+
+        return error_list
@@ -1,8 +1,13 @@
 import json
-import subprocess
 from typing import List, Dict, Any
 from abc import ABC, abstractmethod
-from . import StaticError, StaticAnalyzer, StaticTool
+from . import StaticError, StaticAnalyzer, StaticTool, ProcessResult
+
+# the files prospector and pylint read their configs from, in the directory they are run in
+_CONFIG_FILES: List[str] = [
+    ".prospector.yaml", ".prospector.yml", "prospector.yaml", "prospector.yml",
+    ".pylintrc", "pylintrc", "setup.cfg", "pyproject.toml",
+]
 
 
 class ProspectorTool(StaticTool):
@@ -20,41 +25,62 @@ class ProspectorTool(StaticTool):
         Configs:
             file_path (str): The relative path to the file to run prospector on. This must be a 
             ".py" file
+            file_paths ([str]): Several files to analyze in a single prospector run. These must be
+            ".py" files
+            directory (str): A directory, every ".py" file inside it is analyzed
+            timeout (float, optional): Seconds after which prospector is stopped. Only a "Timeout
+                Error" is reported then, prospector writes its json output at the end. By default
+                there is no timeout.
 
         Args:
             config (Dict[str, Any]): Configs for prospector, (see above)
 
         Raises:
-            ValueError: If "file_path" config is not included in the config file
-            ValueError: If "file_path" config is not a python file (".py" extension)
+            ValueError: If none of "file_path", "file_paths" or "directory" is included in the config
+            ValueError: If a file is not a python file (".py" extension)
 
         """
-        if not "file_path" in config:
-            raise ValueError('Invalid config file. [file_type] not defined.')
+        self.load_file_paths(config)
+        self.load_timeout(config)
+
+    def dependency_files(self) -> List[str]:
+        """The prospector configs and the other python files of the packages of the files
+
+        pylint infers types from the modules the analyzed files import, so an error can come
+        from a change to one of them (see `StaticTool.package_modules`).
 
-        self.file_path = config["file_path"]
+        Returns:
+            [str]: the paths of the files
 
-        if not '.py' in self.file_path:
-            raise ValueError('Invalid file type provided. File must have the extension ".py"')
+        """
+        return _CONFIG_FILES + self.package_modules()
 
     def run(self) -> List[StaticError]:
         """Runs Prospector with the given configs set by `load_config`
 
+        Only files with changed lines are analyzed if the tool is restricted to the changes
+        of a pull request.
+
         Returns:
             List[StaticError]: a list of all dead code errors reported by Prospector
 
         """
-        
-        # runs prospector on the configured file and returns the output as a json string
-        process = subprocess.Popen(
-            "prospector -o json --strictness veryhigh --no-autodetect " + self.file_path, shell=True, stdout=subprocess.PIPE
+        error_list = []
+
+        file_paths: List[str] = self.changed_files(self.file_paths)
+        if not file_paths:
+            return error_list
+
+        # runs prospector on the configured files and returns the output as a json string
+        result: ProcessResult = self.run_command(
+            ["prospector", "-o", "json", "--strictness", "veryhigh", "--no-autodetect"] + file_paths,
+            error_list,
         )
-        stdout, _ = process.communicate()
+        if result.timed_out:
+            return error_list
 
         # converts the json string to a readable json object
-        data: Dict[str, Any] = json.loads(stdout)
-
-        error_list = []
+        data: Dict[str, Any] = json.loads(result.stdout)
 
         for error_data in data['messages']:
             static_error: StaticError = StaticError(
@@ -1,8 +1,48 @@
 import json
-import subprocess
+import logging
 from typing import List, Dict, Any
 from abc import ABC, abstractmethod
-from . import StaticError, StaticAnalyzer, StaticTool
+from . import StaticError, StaticAnalyzer, StaticTool, SourceFile
+
+try:
+    import pyflakes.checker
+except ImportError:  # pragma: no cover - pyflakes is only needed for the in-process mode
+    pyflakes = None
+
+
+class _StaticErrorReporter:
+    """Pyflakes reporter that collects `StaticError`s instead of printing to a stream
+
+    Implements the same interface as `pyflakes.reporter.Reporter`.
+
+    """
+
+    def __init__(self):
+        self.errors: List[StaticError] = []
+
+    def unexpectedError(self, filename: str, msg: str) -> None:
+        logging.warning('pyflakes could not check [%s]: %s', filename, msg)
+
+    def syntaxError(self, filename: str, msg: str, lineno: int, offset: int, text: str) -> None:
+        self.errors.append(
+            StaticError(
+                file_path=filename,
+                line_no=max(lineno or 0, 1),
+                code=text.splitlines()[-1].strip() if text else '',
+                error_name='Pyflakes Error',
+                error_description=msg,
+            )
+        )
+
+    def flake(self, message) -> None:
+        self.errors.append(
+            StaticError(
+                file_path=message.filename,
+                line_no=message.lineno,
+                error_name='Pyflakes Error',
+                error_description=message.message % message.message_args,
+            )
+        )
 
 
 class PyflakesTool(StaticTool):
@@ -10,6 +50,9 @@ class PyflakesTool(StaticTool):
 
     Pyflakes is a static analysis tool designed to detect compile time code errors in python
 
+    By default pyflakes is run inside the bot's own interpreter. The `pyflakes` command line
+    tool is used instead if the in-process mode is disabled or pyflakes can not be imported.
+
     """
 
     def __init__(self):
@@ -20,39 +63,93 @@ class PyflakesTool(StaticTool):
 
         Configs:
             file_path (str): The relative path to the file to run Pyflakes on. This must be a ".py" file
+            file_paths ([str]): Several files to check in one call. These must be ".py" files
+            directory (str): A directory, every ".py" file inside it is checked
+            in_process (bool, optional): If false pyflakes is run in a subprocess. Defaults to true.
+            timeout (float, optional): Seconds after which the pyflakes subprocess is stopped. The
+                errors reported until then are returned along with a "Timeout Error". By default
+                there is no timeout.
 
         Args:
             config (Dict[str, Any]): Configs for Pyflakes, (see above)
 
         Raises:
-            ValueError: If "file_path" config is not included in the config file
-            ValueError: If "file_path" config is not a python file (".py" extension)
+            ValueError: If none of "file_path", "file_paths" or "directory" is included in the config
+            ValueError: If a file is not a python file (".py" extension)
 
         """
-        if not "file_path" in config:
-            raise ValueError('Invalid config file. [file_type] not defined.')
-
-        self.file_path = config["file_path"]
+        self.load_file_paths(config)
+        self.load_timeout(config)
 
-        if not '.py' in self.file_path:
-            raise ValueError('Invalid file type provided. File must have the extension ".py"')
+        self.in_process: bool = bool(config.get("in_process", True))
 
     def run(self) -> List[StaticError]:
         """Runs Pyflakes with the given configs set by `load_config`
 
+        Only files with changed lines are checked if the tool is restricted to the changes
+        of a pull request.
+
         Returns:
             [StaticError]: a list of all dead code errors reported by Pyflakes
 
         """
+        file_paths: List[str] = self.changed_files(self.file_paths)
+        if not file_paths:
+            return []
+        return self.check_files(file_paths)
 
-        process = subprocess.Popen(
-            "pyflakes " + self.file_path, shell=True, stdout=subprocess.PIPE
-        )
-        stdout, _ = process.communicate()
+    def check_files(self, file_paths: List[str]) -> List[StaticError]:
+        """Runs Pyflakes on several files at once
+
+        Args:
+            file_paths ([str]): the files to check
+
+        Returns:
+            [StaticError]: the errors reported for all of `file_paths`, in the order
+                of the files
 
-        # list of static errors reported by vulture
+        """
+        if getattr(self, 'in_process', True) and pyflakes is not None:
+            reporter: _StaticErrorReporter = _StaticErrorReporter()
+            for file_path in file_paths:
+                self.__check_file(file_path, reporter)
+            return reporter.errors
+
+        return self.__check_files_subprocess(file_paths)
+
+    def __check_file(self, file_path: str, reporter: _StaticErrorReporter) -> None:
+        # same as `pyflakes.api.checkPath`, but the syntax tree and tokens are shared with the
+        # other tools
+        try:
+            source_file: SourceFile = self.read_source(file_path)
+        except OSError as error:
+            reporter.unexpectedError(file_path, error.args[1])
+            return
+        try:
+            tree = source_file.tree
+        except SyntaxError as error:
+            reporter.syntaxError(file_path, error.args[0], error.lineno, error.offset, error.text)
+            return
+        except Exception:
+            reporter.unexpectedError(file_path, 'problem decoding source')
+            return
+
+        # the tokens are needed for the checks of type comments, as in `pyflakes.api.check`
+        try:
+            file_tokens = source_file.tokens
+        except SyntaxError:
+            file_tokens = ()
+        checker = pyflakes.checker.Checker(tree, file_tokens=file_tokens, filename=file_path)
+        checker.messages.sort(key=lambda message: message.lineno)
+        for message in checker.messages:
+            reporter.flake(message)
+
+    def __check_files_subprocess(self, file_paths: List[str]) -> List[StaticError]:
+        # list of static errors reported by pyflakes
         error_list = []
-        
+
+        stdout: bytes = self.run_command(["pyflakes"] + list(file_paths), error_list).stdout
+
         for output_encoded in stdout.splitlines():
 
             # decode the string output
@@ -68,7 +165,7 @@ class PyflakesTool(StaticTool):
             partition = output.partition(' ')
 
             error_description: str = partition[2]
-            
+
 
             static_error: StaticError = StaticError(
                 file_path=file_path,
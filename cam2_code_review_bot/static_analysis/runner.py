@@ -0,0 +1,366 @@
+"""
+Shared execution layer for the command line tools run by static tools.
+
+Processes are started from an argument list, never through a shell: with
+`asyncio.create_subprocess_exec` by `run_process_async`, with `subprocess.Popen` by
+`run_process`, so the blocking version works in any thread and without an event loop. Every process can be given a timeout after which it is killed,
+the output it wrote until then is still returned. The number of processes running at
+the same time is limited for the whole bot, no matter how many analyzers, threads or
+event loops start them.
+
+The resource usage of every process started by `run_process` without an event loop is
+collected when it is reaped, a thread gets the usage of its own processes from
+`measure_processes`.
+"""
+
+import asyncio
+import collections
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Sequence, Set
+from . import StaticError
+
+ProcessResult = collections.namedtuple(
+    'ProcessResult', 'args returncode stdout stderr timed_out'
+)
+ProcessResult.__doc__ = '''
+The outcome of a process started by `run_process`.
+
+`stdout` and `stderr` are bytes. If `timed_out` is true the process was killed and
+they hold the output written until then, `returncode` is then the kill signal.
+'''
+
+# a threading semaphore, unlike an asyncio one, is shared by every thread and event loop
+_limit: threading.BoundedSemaphore = threading.BoundedSemaphore(os.cpu_count() or 1)
+_limit_lock: threading.Lock = threading.Lock()
+# the threads `run_process_async` waits for a free slot in. They are kept out of the default
+# executor of the event loop, which the other blocking calls of the bot need while they wait
+_limit_waiters: ThreadPoolExecutor = ThreadPoolExecutor(thread_name_prefix='process-limit')
+
+# the list the usage of the processes run by a thread is added to, see `measure_processes`
+_measured: threading.local = threading.local()
+
+# the process groups of the running processes, see `kill_processes`. Once they were killed
+# every process started later is killed right away
+_running: Set[int] = set()
+_running_lock: threading.Lock = threading.Lock()
+_killed: bool = False
+
+
+def _reap(process: subprocess.Popen, deadline: Optional[float]) -> Optional[Any]:
+    # reaps the process with os.wait4, which returns the usage of the process alone, not
+    # mixed with other processes, and sets its exit code so Popen never waits for it itself.
+    # None is returned if the process is still running at `deadline`
+    delay: float = 0.0005
+    while True:
+        pid, status, rusage = os.wait4(process.pid, 0 if deadline is None else os.WNOHANG)
+        if pid == process.pid:
+            process.returncode = (
+                -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+            )
+            return rusage
+        remaining: float = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+
+def _read_pipe(pipe: Any, chunks: List[bytes]) -> None:
+    # reads a pipe until every process writing to it closed it
+    with pipe:
+        chunks.append(pipe.read())
+
+
+def set_max_processes(max_processes: int) -> None:
+    """Sets how many tool processes may run at the same time
+
+    Processes already running are not affected.
+
+    Args:
+        max_processes (int): the maximum number of processes. Defaults to the number of CPUs.
+
+    Raises:
+        ValueError: if `max_processes` is not positive
+
+    """
+    global _limit
+    if max_processes <= 0:
+        raise ValueError('max_processes must be a positive integer')
+    with _limit_lock:
+        _limit = threading.BoundedSemaphore(max_processes)
+
+
+def kill_processes() -> None:
+    """Kills every running process and the processes they started, for good
+
+    The processes run in sessions of their own and outlive the process that started them.
+    A process that is terminated calls this first, processes started afterwards by other
+    threads are killed right away.
+
+    """
+    global _killed
+    with _running_lock:
+        _killed = True
+        process_groups: List[int] = list(_running)
+    for process_group in process_groups:
+        try:
+            os.killpg(process_group, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+async def run_process_async(
+    args: Sequence[str],
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    capture_stdout: bool = True,
+) -> ProcessResult:
+    """Runs a command and collects its output without blocking the event loop
+
+    Waits for a free slot of the global process limit before the process is started.
+
+    Args:
+        args (Sequence[str]): the program and its arguments
+        timeout (float, default=None): seconds after which the process is killed. None
+            waits until the process exits.
+        cwd (str, default=None): the working directory of the process
+        capture_stdout (bool, default=True): if false the standard output of the process is
+            discarded and `stdout` of the result is empty
+
+    Returns:
+        ProcessResult: the exit code and the output of the process
+
+    """
+    limit: threading.BoundedSemaphore = _limit
+    loop = asyncio.get_running_loop()
+    # waiting for the semaphore blocks, it is done in a worker thread to keep the loop free
+    acquired = loop.run_in_executor(_limit_waiters, limit.acquire)
+    try:
+        await asyncio.shield(acquired)
+    except asyncio.CancelledError:
+        # the worker thread still gets the slot, give it back once it does
+        acquired.add_done_callback(lambda _: limit.release())
+        raise
+
+    try:
+        # the process gets its own session so it can be killed together with its children
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=True,
+        )
+        _track(process)
+
+        # the streams are read into buffers as the output arrives, so the output written
+        # before a timeout is kept when the process is killed
+        stdout: List[bytes] = []
+        stderr: List[bytes] = []
+        readers = asyncio.gather(
+            _read(process.stdout, stdout), _read(process.stderr, stderr), process.wait()
+        )
+        timed_out: bool = False
+        try:
+            await asyncio.wait_for(asyncio.shield(readers), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill(process)
+            await readers
+        except asyncio.CancelledError:
+            _kill(process)
+            _untrack(process)
+            raise
+
+        _untrack(process)
+        return ProcessResult(
+            list(args), process.returncode, b''.join(stdout), b''.join(stderr), timed_out
+        )
+    finally:
+        limit.release()
+
+
+def run_process(
+    args: Sequence[str],
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    capture_stdout: bool = True,
+    loop: Optional[Any] = None,
+) -> ProcessResult:
+    """Blocking version of `run_process_async`
+
+    The process is started with `subprocess`, which works from any thread without an event
+    loop. If `loop` is given the process is instead run by `run_process_async` in that loop,
+    this must then be called from another thread than the one running `loop`.
+
+    Args:
+        args (Sequence[str]): the program and its arguments
+        timeout (float, default=None): seconds after which the process is killed. None
+            waits until the process exits.
+        cwd (str, default=None): the working directory of the process
+        capture_stdout (bool, default=True): if false the standard output of the process is
+            discarded and `stdout` of the result is empty
+        loop (asyncio.AbstractEventLoop, default=None): an event loop running in another
+            thread that runs the process
+
+    Returns:
+        ProcessResult: the exit code and the output of the process
+
+    """
+    if loop is not None:
+        return asyncio.run_coroutine_threadsafe(
+            run_process_async(args, timeout, cwd, capture_stdout), loop
+        ).result()
+
+    limit: threading.BoundedSemaphore = _limit
+    limit.acquire()
+    try:
+        # the process gets its own session so it can be killed together with its children
+        process = subprocess.Popen(
+            list(args),
+            stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=True,
+        )
+        _track(process)
+        # the output is read by threads, like communicate does, while the process is reaped
+        # here: communicate would reap it without keeping its resource usage
+        stdout: List[bytes] = []
+        stderr: List[bytes] = []
+        readers: List[threading.Thread] = [
+            threading.Thread(target=_read_pipe, args=(pipe, chunks), daemon=True)
+            for pipe, chunks in ((process.stdout, stdout), (process.stderr, stderr))
+            if pipe is not None
+        ]
+        for reader in readers:
+            reader.start()
+        deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        timed_out: bool = False
+        try:
+            rusage: Optional[Any] = _reap(process, deadline)
+            if rusage is None:
+                timed_out = True
+                _kill(process)
+                rusage = _reap(process, None)
+            for reader in readers:
+                reader.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+                if reader.is_alive():
+                    # a process started by the process still holds the pipe open, the
+                    # output read until then is kept
+                    timed_out = True
+                    _kill_group(process)
+                    reader.join()
+        except BaseException:
+            _kill(process)
+            if process.returncode is None:
+                _reap(process, None)
+            _untrack(process)
+            raise
+        _untrack(process)
+
+        usages: Optional[List[Any]] = getattr(_measured, 'usages', None)
+        if usages is not None:
+            usages.append(rusage)
+        return ProcessResult(
+            list(args), process.returncode, b''.join(stdout), b''.join(stderr), timed_out
+        )
+    finally:
+        limit.release()
+
+
+@contextlib.contextmanager
+def measure_processes() -> Iterator[List[Any]]:
+    """Collects the resource usage of the processes the calling thread runs inside the block
+
+    Only processes started by `run_process` without an event loop are measured, the processes
+    of other threads are not included.
+
+    Example:
+    ```python
+    with measure_processes() as usages:
+        tool.run()
+    peak_rss_kb: int = max((usage.ru_maxrss for usage in usages), default=0)
+    ```
+
+    Returns:
+        Iterator[List[resource.struct_rusage]]: a list the usage of every finished process
+            is added to
+
+    """
+    previous: Optional[List[Any]] = getattr(_measured, 'usages', None)
+    usages: List[Any] = []
+    _measured.usages = usages
+    try:
+        yield usages
+    finally:
+        _measured.usages = previous
+
+
+def timeout_error(tool_name: str, result: ProcessResult, timeout: Optional[float]) -> StaticError:
+    """Creates the error reported when a tool's process was killed after its timeout
+
+    Args:
+        tool_name (str): the name of the tool that started the process
+        result (ProcessResult): the result of the killed process
+        timeout (float): the timeout the process exceeded
+
+    Returns:
+        StaticError: an error describing the timeout. Errors parsed from the partial output
+            of the process should be reported along with it.
+
+    """
+    return StaticError(
+        error_name='Timeout Error',
+        error_description='[%s] was stopped after %g seconds, its results are incomplete' % (
+            ' '.join(result.args), timeout),
+        tool_name=tool_name,
+    )
+
+
+async def _read(stream: Optional[asyncio.StreamReader], chunks: List[bytes]) -> None:
+    while stream is not None:
+        chunk: bytes = await stream.read(65536)
+        if not chunk:
+            return
+        chunks.append(chunk)
+
+
+def _kill_group(process: Any) -> None:
+    # kills the processes started by a process that was already reaped, its process group
+    # and so its id are kept until all of them exited
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _kill(process: Any) -> None:
+    # kills an asyncio or a subprocess process and every process it started
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        # no process groups on this platform, or the group is already gone
+        process.kill()
+
+
+def _track(process: Any) -> None:
+    # adds the process group of a process that was just started to the running ones
+    with _running_lock:
+        _running.add(process.pid)
+        if not _killed:
+            return
+    _kill(process)
+
+
+def _untrack(process: Any) -> None:
+    with _running_lock:
+        _running.discard(process.pid)
@@ -0,0 +1,215 @@
+"""
+Shared source, syntax tree and token cache of the in-process tools, so every file is read
+and parsed once per analyzer run instead of once per tool.
+"""
+
+import ast
+import hashlib
+import io
+import os
+import threading
+import tokenize
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+
+class SourceFile:
+    """The content of a python file with its lines, syntax tree and tokens
+
+    The lines, tree and tokens are computed the first time they are used. The tree and
+    tokens are shared by every tool reading the file and must not be modified. Adding
+    attributes to the nodes, as `duplicate_tool.span` does, is fine.
+
+    """
+
+    def __init__(self, path: str, content: bytes):
+        """
+        Args:
+            path (str): the path of the file, used in syntax errors
+            content (bytes): the content of the file
+
+        """
+        self.__path = path
+        self.__content = content
+        self.__content_hash: str = hashlib.sha256(content).hexdigest()
+        self.__lock = threading.Lock()
+        self.__lines: Optional[List[str]] = None
+        self.__tree: Any = None
+        self.__tokens: Any = None
+
+    @staticmethod
+    def read(file_path: str) -> 'SourceFile':
+        """Reads a file without caching it
+
+        Args:
+            file_path (str): the path of the file
+
+        Returns:
+            SourceFile: the content of the file
+
+        Raises:
+            OSError: If the file can not be read
+
+        """
+        with open(file_path, 'rb') as source:
+            return SourceFile(file_path, source.read())
+
+    @property
+    def path(self) -> str:
+        """str: The path of the file. """
+        return self.__path
+
+    @property
+    def content(self) -> bytes:
+        """bytes: The content of the file. """
+        return self.__content
+
+    @property
+    def content_hash(self) -> str:
+        """str: The SHA-256 hex digest of the content. """
+        return self.__content_hash
+
+    @property
+    def lines(self) -> List[str]:
+        """[str]: The decoded lines of the file with their line endings, like `readlines`. """
+        with self.__lock:
+            if self.__lines is None:
+                encoding, _ = tokenize.detect_encoding(io.BytesIO(self.__content).readline)
+                self.__lines = io.TextIOWrapper(io.BytesIO(self.__content), encoding).readlines()
+            return self.__lines
+
+    @property
+    def tree(self) -> ast.AST:
+        """ast.AST: The syntax tree of the file.
+
+        Raises:
+            SyntaxError: If the file is not valid python, raised again on every access
+            ValueError: If the file contains null bytes
+
+        """
+        with self.__lock:
+            if self.__tree is None:
+                try:
+                    self.__tree = ast.parse(self.__content, filename=self.__path)
+                except (SyntaxError, ValueError) as error:
+                    self.__tree = error
+        if isinstance(self.__tree, Exception):
+            raise self.__tree
+        return self.__tree
+
+    @property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        """[tokenize.TokenInfo]: The tokens of the file, starting with the encoding token.
+
+        Raises:
+            SyntaxError: If the file can not be tokenized, raised again on every access
+
+        """
+        with self.__lock:
+            if self.__tokens is None:
+                try:
+                    self.__tokens = list(tokenize.tokenize(io.BytesIO(self.__content).readline))
+                except (SyntaxError, tokenize.TokenError) as error:
+                    self.__tokens = SyntaxError(str(error))
+        if isinstance(self.__tokens, Exception):
+            raise self.__tokens
+        return self.__tokens
+
+
+class SourceCache:
+    """Least recently used cache of `SourceFile`s keyed by path and content hash
+
+    The analyzer gives every tool running inside the bot's process the same cache during a
+    run (see `StaticTool.read_source`), so a file analyzed by several tools is parsed once.
+    A file that changed on disk is read and parsed again.
+
+    Files are evicted once the content of the cached files exceeds `max_bytes`. Their
+    syntax trees and tokens usually take ten to twenty times as much memory as the content.
+
+    Example:
+    ```python
+    source_cache: SourceCache = SourceCache(max_bytes=16 * 2 ** 20)
+    tree: ast.AST = source_cache.get('file.py').tree
+    ```
+
+    """
+
+    def __init__(self, max_bytes: int = 8 * 2 ** 20):
+        """
+        Args:
+            max_bytes (int, default=8 MiB): the total size of the content of the cached files.
+                The most recently used file is always kept, even if it is larger.
+
+        Raises:
+            ValueError: if `max_bytes` is not a positive number
+
+        """
+        if max_bytes < 1:
+            raise ValueError('max_bytes must be a positive number')
+
+        self.__max_bytes = max_bytes
+        self.__files: OrderedDict = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, file_path: str, content: Optional[bytes] = None) -> SourceFile:
+        """Gets a file from the cache, reading it if it is not cached or changed
+
+        Args:
+            file_path (str): the path of the file
+            content (bytes, default=None): the content of the file if it was already read,
+                the file is read otherwise
+
+        Returns:
+            SourceFile: the file, shared with every other caller getting the same content
+
+        Raises:
+            OSError: If the file can not be read
+
+        """
+        if content is None:
+            with open(file_path, 'rb') as source:
+                content = source.read()
+        source_file: SourceFile = SourceFile(file_path, content)
+        key: Tuple[str, str] = (os.path.abspath(file_path), source_file.content_hash)
+
+        with self.__lock:
+            cached: Optional[SourceFile] = self.__files.get(key)
+            if cached is not None:
+                self.__files.move_to_end(key)
+                self.__hits += 1
+                return cached
+
+            self.__misses += 1
+            self.__files[key] = source_file
+            self.__size += len(content)
+            while self.__size > self.__max_bytes and len(self.__files) > 1:
+                _, evicted = self.__files.popitem(last=False)
+                self.__size -= len(evicted.content)
+        return source_file
+
+    def clear(self) -> None:
+        """Removes every file from the cache"""
+        with self.__lock:
+            self.__files.clear()
+            self.__size = 0
+
+    @property
+    def size(self) -> int:
+        """int: The total size in bytes of the content of the cached files. """
+        return self.__size
+
+    @property
+    def hits(self) -> int:
+        """int: The number of lookups answered from the cache. """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """int: The number of lookups that had to read a file. """
+        return self.__misses
+
+    def __len__(self) -> int:
+        return len(self.__files)
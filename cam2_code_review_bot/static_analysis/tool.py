@@ -1,13 +1,30 @@
+import asyncio
 import json
-from typing import List
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
 from abc import ABC, abstractmethod
-from . import StaticError
+from . import StaticError, ProcessResult, run_process, ChangedLines, SourceCache, SourceFile
+from .runner import timeout_error
+
+# the event loop of the `run_async` call running in the current thread, if there is one
+_running = threading.local()
+# the threads `run_async` calls `run` in. They block until the event loop ran the processes of
+# the tool, so they are kept out of the loop's default executor
+_run_executor: ThreadPoolExecutor = ThreadPoolExecutor(thread_name_prefix='static-tool')
 
 class StaticTool(ABC):
     """Base class for all static analysis tools
 
     """
 
+    timeout: Optional[float] = None
+    changed_lines: Optional[ChangedLines] = None
+    # true for tools that only report errors on changed lines themselves, see `set_changed_lines`
+    filters_changed_lines: bool = False
+    source_cache: Optional[SourceCache] = None
+
     def __init__(self, name: str = 'OPTIMUS'):
         self.__name = name
 
@@ -27,13 +44,30 @@ class StaticTool(ABC):
 
         """
 
+        self.load_config(StaticTool.read_config_file(config_file_path))
+
+    @staticmethod
+    def read_config_file(config_file_path: str) -> json:
+        """Reads configs from a JSON file without loading them into a tool.
+
+        Args:
+            config_file_path (str): relative file path of the config file.
+
+        Returns:
+            json: the configs stored in the file
+
+        Raises:
+            ValueError: If `config_file_path` is not a JSON file.
+
+        """
+
         if not config_file_path.endswith('.json'):
             raise ValueError('Config file must be a JSON file')
 
         json_file = open(config_file_path, 'r')
         data: json = json.load(json_file)
         json_file.close()
-        self.load_config(data)
+        return data
         
     @abstractmethod
     def load_config(self, config: json) -> None:
@@ -64,8 +98,278 @@ class StaticTool(ABC):
         """
         return []
 
+    async def run_async(self) -> List[StaticError]:
+        """Runs this tool without blocking the running event loop
+
+        By default `run` is called in a thread pool shared by all tools, not in the default
+        executor of the event loop. The processes it starts with `run_command` are awaited by
+        the running event loop through `run_process_async`, the thread does not start an event
+        loop of its own.
+
+        Returns:
+            [StaticError]: the same errors as `run`
+
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_run_executor, self.__run_for_loop, loop)
+
+    def __run_for_loop(self, loop: asyncio.AbstractEventLoop) -> List[StaticError]:
+        _running.loop = loop
+        try:
+            return self.run()
+        finally:
+            _running.loop = None
+
+    def input_files(self) -> List[str]:
+        """The files this tool reads when `run` is called.
+
+        The analyzer uses the content of these files to decide if a cached result
+        can be reused. A tool that does not report any input files is never cached.
+        By default this is the `file_path` set by `load_config`, if there is one.
+
+        Returns:
+            [str]: the paths of the files analyzed by this tool
+
+        """
+        file_paths: List[str] = getattr(self, 'file_paths', [])
+        if file_paths:
+            return list(file_paths)
+        file_path: str = getattr(self, 'file_path', '')
+        return [file_path] if file_path else []
+
+    def dependency_files(self) -> List[str]:
+        """Other files the results of this tool depend on.
+
+        Tools that follow imports, such as mypy, report errors in a file because of
+        the content of other files. The analyzer adds the content of these files to
+        the cache key of the tool, next to its `input_files`, so a cached result is
+        not reused after one of them changed. By default there are none.
+
+        Returns:
+            [str]: the paths of the files, files that do not exist are allowed
+
+        """
+        return []
+
+    def package_modules(self) -> List[str]:
+        """The other python modules of the packages of the `input_files`
+
+        Every module of the top-level package of an input file is listed, or the modules
+        next to it if it is not in a package. Tools that follow imports can return these
+        from `dependency_files`.
+
+        Returns:
+            [str]: the paths of the ".py" and ".pyi" files, without the input files
+
+        """
+        input_files = set(os.path.normpath(file_path) for file_path in self.input_files())
+        modules: List[str] = []
+        for directory in sorted(set(_package_root(file_path) for file_path in input_files)):
+            for module in _modules(directory, recursive=os.path.isfile(
+                    os.path.join(directory, '__init__.py'))):
+                if os.path.normpath(module) not in input_files:
+                    modules.append(module)
+        return modules
+
+    def load_file_paths(
+        self,
+        config: Dict[str, Any],
+        file_key: str = 'file_path',
+        files_key: str = 'file_paths',
+        directory_key: str = 'directory',
+    ) -> List[str]:
+        """Reads the files a tool should analyze from its configs and stores them in `file_paths`
+
+        The files can be given as a single file, a list of files, a directory or any
+        combination of them. Directories are searched recursively for ".py" files.
+
+        Configs:
+            file_path (str): The relative path to a single file. This must be a ".py" file
+            file_paths ([str]): The relative paths to several files. These must be ".py" files
+            directory (str): A directory, every ".py" file inside it is analyzed
+
+        Args:
+            config (Dict[str, Any]): The configs of the tool
+            file_key (str, default='file_path'): The config name used for a single file
+            files_key (str, default='file_paths'): The config name used for a list of files
+            directory_key (str, default='directory'): The config name used for a directory
+
+        Returns:
+            [str]: The files found, in the order they were given without duplicates
+
+        Raises:
+            ValueError: If none of the configs above is included in the config file
+            ValueError: If a file is not a python file (".py" extension)
+
+        """
+        if file_key not in config and files_key not in config and directory_key not in config:
+            raise ValueError('Invalid config file. [' + file_key + '] not defined.')
+
+        file_paths: List[str] = []
+        if file_key in config:
+            file_paths.append(config[file_key])
+        file_paths.extend(config.get(files_key, []))
+
+        for file_path in file_paths:
+            if not '.py' in file_path:
+                raise ValueError('Invalid file type provided. File must have the extension ".py"')
+
+        if directory_key in config:
+            for root, dirs, files in os.walk(config[directory_key]):
+                dirs.sort()
+                file_paths.extend(
+                    os.path.join(root, name) for name in sorted(files) if name.endswith('.py')
+                )
+
+        self.file_paths: List[str] = list(dict.fromkeys(file_paths))
+        return self.file_paths
+
+    def load_timeout(self, config: Dict[str, Any], timeout_key: str = 'timeout') -> Optional[float]:
+        """Reads the timeout of the tool's processes from its configs and stores it in `timeout`
+
+        Configs:
+            timeout (float, optional): Seconds after which a process started by the tool is
+                killed. By default processes are not stopped.
+
+        Args:
+            config (Dict[str, Any]): The configs of the tool
+            timeout_key (str, default='timeout'): The config name used for the timeout
+
+        Returns:
+            float: The timeout, None if there is none
+
+        Raises:
+            ValueError: If the timeout is not a positive number
+
+        """
+        timeout: Any = config.get(timeout_key)
+        if timeout is not None and (
+            isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0
+        ):
+            raise ValueError('Invalid config file. [' + timeout_key + '] must be a positive number.')
+        self.timeout = timeout
+        return self.timeout
+
+    def run_command(
+        self,
+        args: Sequence[str],
+        errors: List[StaticError],
+        capture_stdout: bool = True,
+        cwd: Optional[str] = None,
+    ) -> ProcessResult:
+        """Runs a command line tool with the timeout set by `load_timeout`
+
+        The process is started through the shared runner, which limits how many tool
+        processes run at the same time. If the process is killed after the timeout a
+        "Timeout Error" is appended to `errors`, the output written until then can
+        still be parsed for partial results. A last line that was cut off is dropped
+        from that output.
+
+        Args:
+            args (Sequence[str]): the program and its arguments
+            errors ([StaticError]): the errors of the current run
+            capture_stdout (bool, default=True): if false the standard output of the process
+                is discarded
+            cwd (str, default=None): the working directory of the process
+
+        Returns:
+            ProcessResult: the exit code and the output of the process
+
+        """
+        result: ProcessResult = run_process(
+            args,
+            self.timeout,
+            cwd=cwd,
+            capture_stdout=capture_stdout,
+            loop=getattr(_running, 'loop', None),
+        )
+        if result.timed_out:
+            errors.append(timeout_error(self.name, result, self.timeout))
+            result = result._replace(stdout=result.stdout[:result.stdout.rfind(b'\n') + 1])
+        return result
+
+    def set_changed_lines(self, changed_lines: Optional[ChangedLines]) -> None:
+        """Restricts the next runs of this tool to the lines changed by a pull request
+
+        The analyzer removes errors on unchanged lines from the results of every tool. Tools
+        can use `changed_lines` to skip work on files or regions that did not change. Tools
+        that also filter their errors themselves, for example because an error covers more
+        lines than the one it is reported on, set `filters_changed_lines`.
+
+        Args:
+            changed_lines (ChangedLines): the changed lines, None analyzes everything
+
+        """
+        self.changed_lines = changed_lines
+
+    def set_source_cache(self, source_cache: Optional[SourceCache]) -> None:
+        """Shares parsed files with the other tools of an analyzer run, see `read_source`
+
+        Args:
+            source_cache (SourceCache): the cache of the run, None reads every file again
+
+        """
+        self.source_cache = source_cache
+
+    def read_source(self, file_path: str) -> SourceFile:
+        """Reads a file through the cache set by `set_source_cache`
+
+        Tools that read or parse python files themselves should use this instead of opening
+        the files, so every file is parsed only once per analyzer run.
+
+        Args:
+            file_path (str): the path of the file
+
+        Returns:
+            SourceFile: the content of the file with its lines, syntax tree and tokens
+
+        Raises:
+            OSError: If the file can not be read
+
+        """
+        if self.source_cache is None:
+            return SourceFile.read(file_path)
+        return self.source_cache.get(file_path)
+
+    def changed_files(self, file_paths: Sequence[str]) -> List[str]:
+        """Selects the files with changed lines, see `set_changed_lines`
+
+        Args:
+            file_paths (Sequence[str]): the files configured for the tool
+
+        Returns:
+            [str]: the files that changed, all of `file_paths` if no changed lines are set
+
+        """
+        if self.changed_lines is None:
+            return list(file_paths)
+        return [file_path for file_path in file_paths if file_path in self.changed_lines]
+
     @property
     def name(self):
         """str: The name of this tool. default is `OPTIMUS`"""
         return self.__name
 
+
+def _package_root(file_path: str) -> str:
+    # the directory of the top-level package of a file, or its own directory
+    directory: str = os.path.dirname(file_path) or os.curdir
+    while os.path.isfile(os.path.join(directory, '__init__.py')):
+        parent: str = os.path.normpath(os.path.join(directory, os.pardir))
+        if not os.path.isfile(os.path.join(parent, '__init__.py')) or \
+                os.path.abspath(parent) == os.path.abspath(directory):
+            break
+        directory = parent
+    return directory
+
+
+def _modules(directory: str, recursive: bool) -> List[str]:
+    # the python files and stubs in a directory, and in its sub-directories if `recursive`
+    modules: List[str] = []
+    for root, directories, files in os.walk(directory):
+        directories[:] = sorted(name for name in directories if not name.startswith('.')) \
+            if recursive else []
+        modules.extend(
+            os.path.join(root, name) for name in sorted(files) if name.endswith(('.py', '.pyi'))
+        )
+    return modules
@@ -1,6 +1,5 @@
 import json
 import vulture
-import subprocess
 from typing import List, Dict, Any
 from abc import ABC, abstractmethod
 from . import StaticError, StaticAnalyzer, StaticTool
@@ -22,38 +21,38 @@ class VultureTool(StaticTool):
 
         Configs:
             file_path (str): The relative path to the file to run vulture on. This must be a ".py" file
+            file_paths ([str]): Several files to scan together, code used in any of them is not
+                reported as dead. These must be ".py" files
+            directory (str): A directory, every ".py" file inside it is scanned
+            timeout (float, optional): Seconds after which vulture is stopped. The errors reported
+                until then are returned along with a "Timeout Error". By default there is no timeout.
 
         Args:
             config (Dict[str, Any]): Configs for vulture, (see above)
 
         Raises:
-            ValueError: If "file_path" config is not included in the config file
-            ValueError: If "file_path" config is not a python file (".py" extension)
+            ValueError: If none of "file_path", "file_paths" or "directory" is included in the config
+            ValueError: If a file is not a python file (".py" extension)
 
         """
-        if not "file_path" in config:
-            raise ValueError('Invalid config file. [file_type] not defined.')
-
-        self.file_path = config["file_path"]
-
-        if not '.py' in self.file_path:
-            raise ValueError('Invalid file type provided. File must have the extension ".py"')
+        self.load_file_paths(config)
+        self.load_timeout(config)
 
     def run(self) -> List[StaticError]:
         """Runs Vulture with the given configs set by `load_config`
 
+        All configured files are scanned even if the tool is restricted to the changes of a
+        pull request, code is only dead if none of the files uses it.
+
         Returns:
             [StaticError]: a list of all dead code errors reported by Vulture
 
         """
 
-        process = subprocess.Popen(
-            "vulture " + self.file_path, shell=True, stdout=subprocess.PIPE
-        )
-        stdout, _ = process.communicate()
-
         # list of static errors reported by vulture
         error_lst = []
+
+        stdout: bytes = self.run_command(["vulture"] + self.file_paths, error_lst).stdout
         
         # Vulture returns output string in this form:
         # folder/file.py:[line number]: unused [function, property, variable] '[name of said dead code type]' ([probability of false positive] confidence)
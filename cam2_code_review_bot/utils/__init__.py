@@ -2,3 +2,6 @@ from .extract_command_and_args import extract_command_and_args
 from .status import status
 from .permissions import is_admin, is_requester
 from .github import Github
+from .task_scheduler import TaskScheduler, ScheduledTask
+from .ttl_cache import TTLCache
+from .metrics import Counter, Gauge, Histogram, MetricsRegistry
@@ -1,29 +1,113 @@
 import json
+import os
 import asyncio
+import time
 import aiohttp
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional, Mapping, Tuple
 from gidgethub.aiohttp import GitHubAPI
+from .metrics import GITHUB_SECONDS, route_template
+
+
+class MeasuredGitHubAPI(GitHubAPI):
+    """A `GitHubAPI` that records the time and status of every request in `GITHUB_SECONDS`"""
+
+    async def _request(
+        self, method: str, url: str, headers: Mapping[str, str], body: bytes = b""
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+        status: str = "error"
+        start: float = time.perf_counter()
+        try:
+            response: Tuple[int, Mapping[str, str], bytes] = await super(
+                MeasuredGitHubAPI, self
+            )._request(method, url, headers, body)
+            status = str(response[0])
+            return response
+        finally:
+            GITHUB_SECONDS.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=route_template(url),
+                status=status,
+            )
 
 
 class Github:
-    """API for interacting with github 
+    """API for interacting with github
 
     The goal of this class is to abstract github developer endpoints into functions
 
+    The bot creates one session with `create_session` and one `GitHubAPI` object on start up
+    and shares them with every command, so the connections to GitHub are kept alive and reused
+    instead of being opened again for every request.
+
     Note:
-        This class is not complete. 
+        This class is not complete.
     """
 
     _github_api: GitHubAPI = None
+    _session: aiohttp.ClientSession = None
 
     @staticmethod
-    def initialize(github_api: GitHubAPI) -> None:
+    def create_session(
+        limit: int = 100,
+        limit_per_host: int = 30,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        timeout: float = 60.0,
+    ) -> aiohttp.ClientSession:
+        """Creates a session whose connections are pooled and kept alive between requests
+
+        The session must be created inside the event loop it is used in and closed when the
+        bot stops.
+
+        Args:
+            limit (int, default=100): the number of connections open at the same time
+            limit_per_host (int, default=30): the number of connections open to the same host
+            dns_cache_ttl (int, default=300): seconds host names are cached
+            keepalive_timeout (float, default=30.0): seconds an idle connection is kept open
+            timeout (float, default=60.0): seconds a request may take in total
+
+        Returns:
+            aiohttp.ClientSession: the new session
+        """
+        connector: aiohttp.TCPConnector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            ttl_dns_cache=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+        )
+        return aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)
+        )
+
+    @staticmethod
+    def create_api(session: aiohttp.ClientSession) -> GitHubAPI:
+        """Creates a `GitHubAPI` object for the bot's account using `session`
+
+        The account is read from the "BOT_NAME" and "GITHUBTOKEN" environment variables. The
+        requests of the object are measured, see `MeasuredGitHubAPI`.
+
+        Args:
+            session (aiohttp.ClientSession): the session of the requests, see `create_session`
+
+        Returns:
+            GitHubAPI: the new object
+        """
+        return MeasuredGitHubAPI(
+            session, os.getenv("BOT_NAME"), oauth_token=os.getenv("GITHUBTOKEN")
+        )
+
+    @staticmethod
+    def initialize(github_api: GitHubAPI, session: Optional[aiohttp.ClientSession] = None) -> None:
         """Sets the `GitHubAPI` object to use when fulfilling requests
 
         Args:
             github_api (GitHubAPI): The github object this module should use.
+            session (aiohttp.ClientSession, optional): The session used to download files. This
+                should be the session of `github_api`.
         """
         Github._github_api = github_api
+        Github._session = session
 
     @staticmethod
     def _get_valid_api_object() -> GitHubAPI:
@@ -41,15 +125,35 @@ class Github:
         else:
             return Github._github_api
 
+    @staticmethod
+    async def download(url: str) -> str:
+        """Downloads a file, such as the "download_url" of a file of a pull request
+
+        Args:
+            url (str): The url of the file
+
+        Raises:
+            RuntimeError: No session is defined. (see init)
+            aiohttp.ClientResponseError: The download failed.
+
+        Returns:
+            str: The content of the file
+        """
+        if Github._session is None:
+            raise RuntimeError("No session is defined. Please call initialize first.")
+        async with Github._session.get(url) as response:
+            response.raise_for_status()
+            return await response.text()
+
     @staticmethod
     async def get_pull_request_files_metadata(pull_request_url: str) -> Dict[str, Any]:
         """Gets pull request file metadata from github
 
-        See [github developer docs](https://developer.github.com/v3/pulls/#list-pull-requests-files) 
+        See [github developer docs](https://developer.github.com/v3/pulls/#list-pull-requests-files)
         for more information.
 
         Args:
-            pull_request_url (str): The url endpoint for a pull request. This should have the format 
+            pull_request_url (str): The url endpoint for a pull request. This should have the format
                 "/repos/{owner}/{repo}/pulls/{pull_number}" where:
                 - {owner} is the repo owner
                 - {repo} is the name of the repo
@@ -62,18 +166,18 @@ class Github:
             json: The response object from the GitHub Developer AP (see github developer docs).
 
         """
-        github_api: GitHubAPI = _get_valid_api_object()
+        github_api: GitHubAPI = Github._get_valid_api_object()
         return await github_api.getitem(pull_request_url + "/files")
 
     @staticmethod
     async def get_pull_request_files_rawdata(pull_request_url: str) -> tuple:
         """Gets pull request file raw data from github
 
-        Raw data is the content of the files. However because a http response is returned, alongside
-        the raw data, the files encoding and if it was successfully downloaded are returned as well. 
+        Raw data is the content of the files. The files are downloaded at the same time using the
+        shared session.
 
         Args:
-            pull_request_url (str): The url endpoint for a pull request. This should have the format 
+            pull_request_url (str): The url endpoint for a pull request. This should have the format
                 "/repos/{owner}/{repo}/pulls/{pull_number}" where:
                 - {owner} is the repo owner
                 - {repo} is the name of the repo
@@ -83,38 +187,36 @@ class Github:
             RuntimeError: The GitHubAPI object is not defined. (see init)
 
         Returns:
-            tuple: A tuple of the http responses from downloading each file
+            tuple: A tuple of the content of each file
 
         """
-        github_api: GitHubAPI = _get_valid_api_object()
-        file_metadata: Dict[str, Any] = get_pull_request_files_metadata(
-            pull_request_url, github_api
+        github_api: GitHubAPI = Github._get_valid_api_object()
+        file_metadata: Dict[str, Any] = await Github.get_pull_request_files_metadata(
+            pull_request_url
         )
 
         file_data_list: tuple = await asyncio.gather(
-            [github_api.getitem(file["contents_url"]) for file in file_metadata]
+            *[github_api.getitem(file["contents_url"]) for file in file_metadata]
         )
-        response: tuple = await asyncio.gather(
-            [aiohttp.get(file_data["download_url"]) for file_data in file_data_list]
+        return await asyncio.gather(
+            *[Github.download(file_data["download_url"]) for file_data in file_data_list]
         )
 
-        return response
-
     @staticmethod
     async def save_pull_request_files_to_dir(pull_request_url: str, directory: str) -> List[str]:
         """Saves pull request files from github to a relative local directory
 
-        See [github developer docs](https://developer.github.com/v3/pulls/#list-pull-requests-files) 
+        See [github developer docs](https://developer.github.com/v3/pulls/#list-pull-requests-files)
         for more information.
 
         Args:
-            pull_request_url (str): The url endpoint for a pull request. This should have the format 
+            pull_request_url (str): The url endpoint for a pull request. This should have the format
                 "/repos/{owner}/{repo}/pulls/{pull_number}" where:
                 - {owner} is the repo owner
                 - {repo} is the name of the repo
                 - {pull_number} is the number of the pull request
 
-            directory (str): The directory to save the files. This should be relative to the 
+            directory (str): The directory to save the files. This should be relative to the
                 root directory of this project.
 
         Raises:
@@ -128,21 +230,22 @@ class Github:
         if not directory.endswith("/"):
             directory = directory + "/"
 
-        github_api: GitHubAPI = _get_valid_api_object()
-        file_metadata: Dict[str, Any] = get_pull_request_files_metadata(
-            pull_request_url, github_api
+        github_api: GitHubAPI = Github._get_valid_api_object()
+        file_metadata: Dict[str, Any] = await Github.get_pull_request_files_metadata(
+            pull_request_url
         )
 
         file_data_list: tuple = await asyncio.gather(
-            [github_api.getitem(file["contents_url"]) for file in file_metadata]
+            *[github_api.getitem(file["contents_url"]) for file in file_metadata]
         )
-        response: tuple = await asyncio.gather(
-            [aiohttp.get(file_data["download_url"]) for file_data in file_data_list]
+        contents: tuple = await asyncio.gather(
+            *[Github.download(file_data["download_url"]) for file_data in file_data_list]
         )
 
         file_list: List[str] = [file_data["name"] for file_data in file_data_list]
 
-        with open(directory + file_name, "w+", encoding=response.encoding) as local_file:
-            local_file.write(response.text)
+        for file_name, content in zip(file_list, contents):
+            with open(directory + file_name, "w+", encoding="utf-8") as local_file:
+                local_file.write(content)
 
         return file_list
@@ -0,0 +1,498 @@
+"""
+Counters, gauges and histograms exposed by the bot at `/metrics` in the Prometheus text format.
+
+The metrics of the bot are defined at the end of this module. They are kept in memory by the
+process that records them. The worker processes do not expose their metrics, the GitHub and
+DynamoDB calls of a job are sent to the webhook with the attempt of the job instead (see
+`drain_worker_metrics` and `merge_worker_metrics`).
+"""
+
+import bisect
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# the upper bounds of the buckets of histograms, in seconds. Commands run for minutes.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+class MetricsRegistry:
+    """The metrics rendered together at one endpoint
+
+    Example:
+    ```python
+    registry: MetricsRegistry = MetricsRegistry()
+    requests: Counter = Counter("requests_total", "Requests", ("route",), registry=registry)
+    requests.inc(route="/webhook")
+    registry.render()  # the text served at /metrics
+    ```
+
+    """
+
+    def __init__(self):
+        self.__metrics: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        """Adds a metric to this registry
+
+        Args:
+            metric (Metric): the metric
+
+        Raises:
+            ValueError: If a metric with the same name is already registered
+        """
+        with self.__lock:
+            if metric.name in self.__metrics:
+                raise ValueError("metric [%s] is already registered" % metric.name)
+            self.__metrics[metric.name] = metric
+
+    def get(self, name: str) -> "Metric":
+        """Looks up a metric by name
+
+        Raises:
+            KeyError: If no metric is registered with `name`
+        """
+        return self.__metrics[name]
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text format
+
+        Returns:
+            str: the metrics, in the order they were registered
+        """
+        with self.__lock:
+            metrics: List[Metric] = list(self.__metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+# the registry of the bot's metrics, rendered at `/metrics`
+REGISTRY: MetricsRegistry = MetricsRegistry()
+
+
+class Metric:
+    """Base class of the metrics. Every combination of label values is a separate series."""
+
+    kind: str = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        registry: Optional[MetricsRegistry] = REGISTRY,
+    ):
+        """
+        Args:
+            name (str): the name of the metric, such as "optimus_webhook_seconds"
+            description (str): the help text of the metric
+            labels ([str], default=()): the names of the labels of every series
+            registry (MetricsRegistry, default=REGISTRY): the registry the metric is added to,
+                None does not add it to any
+
+        Raises:
+            ValueError: If `name` or a label is not a valid Prometheus name
+            ValueError: If a metric with the same name is already registered in `registry`
+        """
+        for label_name in (name,) + tuple(labels):
+            if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", label_name):
+                raise ValueError("[%s] is not a valid metric or label name" % label_name)
+
+        self.__name = name
+        self.__description = description
+        self.__labels: Tuple[str, ...] = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: OrderedDict = OrderedDict()
+        if registry is not None:
+            registry.register(self)
+
+    @property
+    def name(self) -> str:
+        """str: The name of the metric"""
+        return self.__name
+
+    @property
+    def labels(self) -> Tuple[str, ...]:
+        """Tuple[str, ...]: The names of the labels of every series"""
+        return self.__labels
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        # the label values, in the order of the label names
+        if set(labels) != set(self.__labels):
+            raise ValueError(
+                "metric [%s] takes the labels %s, got %s"
+                % (self.__name, list(self.__labels), sorted(labels))
+            )
+        return tuple(str(labels[label_name]) for label_name in self.__labels)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs: List[str] = [
+            '%s="%s"' % (label_name, _escape(value))
+            for label_name, value in zip(self.__labels, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _render_series(self) -> List[str]:
+        with self._lock:
+            return [
+                "%s%s %s" % (self.__name, self._format_labels(key), _format_value(value))
+                for key, value in self._series.items()
+            ]
+
+    def render(self) -> str:
+        """Renders the metric in the Prometheus text format
+
+        Returns:
+            str: the help and type lines and one line per series
+        """
+        lines: List[str] = [
+            "# HELP %s %s" % (self.__name, self.__description.replace("\n", " ")),
+            "# TYPE %s %s" % (self.__name, self.kind),
+        ]
+        return "\n".join(lines + self._render_series()) + "\n"
+
+
+class Counter(Metric):
+    """A value that only goes up, such as the number of handled webhooks"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Adds `amount` to the series of `labels`
+
+        Raises:
+            ValueError: If `amount` is negative or `labels` are not the labels of the metric
+        """
+        if amount < 0:
+            raise ValueError("counters can not decrease")
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """float: The current value of the series of `labels`"""
+        return self._series.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    """A value that goes up and down, such as the number of queued jobs"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Sets the series of `labels` to `value`
+
+        Raises:
+            ValueError: If `labels` are not the labels of the metric
+        """
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._series[key] = float(value)
+
+    def value(self, **labels: Any) -> float:
+        """float: The current value of the series of `labels`"""
+        return self._series.get(self._key(labels), 0.0)
+
+
+class Histogram(Metric):
+    """Counts observations, such as durations, in cumulative buckets
+
+    Example:
+    ```python
+    with COMMAND_SECONDS.time(command="lint") as labels:
+        labels["outcome"] = "succeeded" if await command.call(payload) else "failed"
+    ```
+
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[MetricsRegistry] = REGISTRY,
+    ):
+        """
+        Args:
+            name (str): see `Metric`
+            description (str): see `Metric`
+            labels ([str], default=()): see `Metric`
+            buckets ([float], default=DEFAULT_BUCKETS): the upper bounds of the buckets, the
+                "+Inf" bucket is always added
+            registry (MetricsRegistry, default=REGISTRY): see `Metric`
+
+        Raises:
+            ValueError: If `buckets` is empty or not sorted
+        """
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise ValueError("buckets must be sorted, distinct upper bounds")
+        super(Histogram, self).__init__(name, description, labels, registry)
+        self.__buckets: Tuple[float, ...] = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Adds one observation to the series of `labels`
+
+        Raises:
+            ValueError: If `labels` are not the labels of the metric
+        """
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            series: Optional[List[Any]] = self._series.get(key)
+            if series is None:
+                # the count of each bucket (not cumulative, the last one is +Inf) and the sum
+                series = [[0] * (len(self.__buckets) + 1), 0.0]
+                self._series[key] = series
+            series[0][bisect.bisect_left(self.__buckets, value)] += 1
+            series[1] += value
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Measures the time spent inside a `with` block
+
+        The labels of the observation can be changed inside the block through the dictionary
+        returned by the `with` statement, such as to record the outcome of the block. If the
+        block raises an exception and the labels have an "outcome" that was not set inside the
+        block, it is set to "error".
+
+        Returns:
+            _Timer: a context manager
+        """
+        return _Timer(self, labels)
+
+    def count(self, **labels: Any) -> int:
+        """int: The number of observations of the series of `labels`"""
+        series: Optional[List[Any]] = self._series.get(self._key(labels))
+        return sum(series[0]) if series is not None else 0
+
+    def drain(self) -> List[List[Any]]:
+        """Removes every series, to be added to the same histogram of another process
+
+        Returns:
+            [[[str], [int], float]]: the label values, the count of every bucket and the sum of
+                every series, JSON serializable. See `merge`.
+        """
+        with self._lock:
+            series: List[List[Any]] = [
+                [list(key), counts, total] for key, (counts, total) in self._series.items()
+            ]
+            self._series.clear()
+        return series
+
+    def merge(self, series: List[List[Any]]) -> None:
+        """Adds the series drained from the same histogram of another process
+
+        Args:
+            series ([[[str], [int], float]]): the series returned by `drain`
+
+        Raises:
+            ValueError: If a series does not have the labels or buckets of this histogram
+        """
+        for key, counts, total in series:
+            if len(key) != len(self.labels) or len(counts) != len(self.__buckets) + 1:
+                raise ValueError("series do not match the histogram [%s]" % self.name)
+            with self._lock:
+                merged: Optional[List[Any]] = self._series.get(tuple(key))
+                if merged is None:
+                    merged = [[0] * (len(self.__buckets) + 1), 0.0]
+                    self._series[tuple(key)] = merged
+                merged[0] = [count + added for count, added in zip(merged[0], counts)]
+                merged[1] += total
+
+    def _render_series(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            for key, (counts, total) in self._series.items():
+                cumulative: int = 0
+                for bound, count in zip(self.__buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le: str = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(bound))
+                    lines.append(
+                        "%s_bucket%s %d" % (self.name, self._format_labels(key, le), cumulative)
+                    )
+                lines.append("%s_sum%s %s" % (self.name, self._format_labels(key), repr(total)))
+                lines.append("%s_count%s %d" % (self.name, self._format_labels(key), cumulative))
+        return lines
+
+
+class _Timer:
+    # the context manager returned by `Histogram.time`
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.__histogram = histogram
+        self.__labels = dict(labels)
+        self.__start: float = 0.0
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.__start = time.perf_counter()
+        return self.__labels
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        if error_type is not None and "outcome" in self.__histogram.labels:
+            self.__labels.setdefault("outcome", "error")
+        self.__histogram.observe(time.perf_counter() - self.__start, **self.__labels)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def route_template(url: str) -> str:
+    """Replaces the owner, repository, numbers and names in a GitHub API url by placeholders
+
+    Series are labelled by route instead of url, so the number of series does not grow with
+    the number of repositories, issues and users.
+
+    Args:
+        url (str): a GitHub API url or path, such as "/repos/owner/repo/issues/12/comments"
+
+    Returns:
+        str: the route, such as "/repos/{owner}/{repo}/issues/{number}/comments"
+    """
+    path: str = re.sub(r"^https?://[^/]+", "", url).split("?")[0]
+    segments: List[str] = [segment for segment in path.split("/") if segment]
+    route: List[str] = []
+    for position, segment in enumerate(segments):
+        previous: str = segments[position - 1] if position > 0 else ""
+        if previous == "contents":
+            route.append("{path}")
+            break
+        if position in (1, 2) and segments[0] == "repos":
+            route.append("{owner}" if position == 1 else "{repo}")
+        elif segment.isdigit():
+            route.append("{number}")
+        elif re.match(r"^[0-9a-f]{40}$", segment):
+            route.append("{sha}")
+        elif previous in ("users", "collaborators", "assignees"):
+            route.append("{username}")
+        else:
+            route.append(segment)
+    return "/" + "/".join(route)
+
+
+def measure_dynamodb(resource: Any) -> None:
+    """Records the time of every operation of a boto3 DynamoDB resource in `DYNAMODB_SECONDS`
+
+    Args:
+        resource (boto3.resources.base.ServiceResource): the resource, such as
+            `session.resource("dynamodb")`
+    """
+    events = resource.meta.client.meta.events
+
+    def start(params: Dict[str, Any], context: Dict[str, Any], **_: Any) -> None:
+        context["metrics_start"] = time.perf_counter()
+        context["metrics_table"] = params.get("TableName", "")
+
+    def finish(http_response: Any, model: Any, context: Dict[str, Any], **_: Any) -> None:
+        if "metrics_start" not in context:
+            return
+        DYNAMODB_SECONDS.observe(
+            time.perf_counter() - context["metrics_start"],
+            table=context["metrics_table"],
+            operation=model.name,
+            outcome="ok" if http_response.status_code < 300 else "error",
+        )
+
+    events.register("provide-client-params.dynamodb", start)
+    events.register("after-call.dynamodb", finish)
+
+
+# the metrics of the bot
+WEBHOOK_SECONDS: Histogram = Histogram(
+    "optimus_webhook_seconds", "Time to handle a webhook delivery, until GitHub is answered"
+)
+WEBHOOK_DELIVERIES: Counter = Counter(
+    "optimus_webhook_deliveries_total",
+    "Webhook deliveries, by result: handled or duplicate",
+    ("result",),
+)
+COALESCED_COMMANDS: Counter = Counter(
+    "optimus_coalesced_commands_total",
+    "Commands not started because the same command was started shortly before",
+    ("command",),
+)
+COMMAND_SECONDS: Histogram = Histogram(
+    "optimus_command_seconds",
+    "Run time of the commands run by the bot, by outcome: succeeded, failed or error",
+    ("command", "outcome"),
+)
+JOB_SECONDS: Histogram = Histogram(
+    "optimus_job_seconds",
+    "Run time of the attempts of queued commands, by outcome: succeeded, failed or lost",
+    ("command", "outcome"),
+)
+GITHUB_SECONDS: Histogram = Histogram(
+    "optimus_github_request_seconds",
+    "Time of the GitHub API requests, by route and HTTP status",
+    ("method", "route", "status"),
+)
+DYNAMODB_SECONDS: Histogram = Histogram(
+    "optimus_dynamodb_operation_seconds",
+    "Time of the DynamoDB operations, by table, operation and outcome",
+    ("table", "operation", "outcome"),
+)
+QUEUE_DEPTH: Gauge = Gauge(
+    "optimus_job_queue_jobs", "Jobs in the job queue of the worker pool, by status", ("status",)
+)
+TASKS: Gauge = Gauge(
+    "optimus_tasks", "Background tasks known to the task scheduler, by status", ("status",)
+)
+
+# the metrics recorded by the worker processes that are reported to the webhook
+WORKER_HISTOGRAMS: Tuple[Histogram, ...] = (GITHUB_SECONDS, DYNAMODB_SECONDS)
+
+
+def drain_worker_metrics() -> Dict[str, List[List[Any]]]:
+    """Removes the series of `WORKER_HISTOGRAMS` recorded since the last call
+
+    A worker calls this when it finished a job and stores the result with the attempt of the
+    job, the webhook adds it to its own metrics with `merge_worker_metrics`.
+
+    Returns:
+        Dict[str, List[List[Any]]]: the drained series by metric name, JSON serializable
+    """
+    metrics: Dict[str, List[List[Any]]] = {}
+    for histogram in WORKER_HISTOGRAMS:
+        series: List[List[Any]] = histogram.drain()
+        if series:
+            metrics[histogram.name] = series
+    return metrics
+
+
+def merge_worker_metrics(metrics: Dict[str, List[List[Any]]]) -> None:
+    """Adds the metrics drained by a worker with `drain_worker_metrics` to `REGISTRY`
+
+    Raises:
+        KeyError: If a metric is not registered
+        ValueError: If the series do not match the registered histogram
+    """
+    for name, series in metrics.items():
+        histogram: Metric = REGISTRY.get(name)
+        if not isinstance(histogram, Histogram):
+            raise ValueError("metric [%s] is not a histogram" % name)
+        histogram.merge(series)
@@ -0,0 +1,233 @@
+import asyncio
+import functools
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+# the states of a task, in the order a task usually goes through them
+PENDING: str = "pending"
+RUNNING: str = "running"
+SUCCEEDED: str = "succeeded"
+FAILED: str = "failed"
+CANCELLED: str = "cancelled"
+
+
+class ScheduledTask:
+    """A coroutine run in the background by a `TaskScheduler`"""
+
+    def __init__(self, task_id: int, name: str):
+        self.__task_id = task_id
+        self.__name = name
+        self.status: str = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def task_id(self) -> int:
+        """int: The id of this task in its scheduler"""
+        return self.__task_id
+
+    @property
+    def name(self) -> str:
+        """str: A description of the task used in logs, such as the name of a command"""
+        return self.__name
+
+    @property
+    def done(self) -> bool:
+        """bool: True if the task succeeded, failed or was cancelled"""
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this task to a JSON serializable dictionary
+
+        Returns:
+            Dict[str, Any]: the id, name, status, result, error and timestamps of this task
+        """
+        return {
+            "task_id": self.task_id,
+            "name": self.name,
+            "status": self.status,
+            "result": self.result if isinstance(self.result, (bool, int, float, str)) else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class TaskScheduler:
+    """Runs coroutines in the background of the bot's event loop
+
+    The webhook hands its commands to the scheduler and answers GitHub right away, however
+    long the command takes. At most `max_concurrency` tasks run at the same time, the others
+    wait in the order they were submitted. A task that raises an exception is logged and
+    marked as failed, it never affects other tasks or the webhook.
+
+    Tasks submitted with the same `lane`, such as the url of a pull request, run one after the
+    other in the order they were submitted. Tasks of different lanes run in parallel, a task
+    waiting for its lane does not take one of the `max_concurrency` slots.
+
+    The scheduler must be created inside the event loop it is used in, such as in a
+    `before_serving` function.
+
+    Example:
+    ```python
+    task_scheduler: TaskScheduler = TaskScheduler(max_concurrency=4)
+    task_id: int = task_scheduler.submit("lint", command.call, command_payload, lane=issue_url)
+    task_scheduler.get(task_id).status  # "pending" or "running"
+    ```
+
+    """
+
+    def __init__(self, max_concurrency: int = 8, history: int = 1000):
+        """
+        Args:
+            max_concurrency (int, default=8): the number of tasks run at the same time
+            history (int, default=1000): the number of finished tasks whose status is kept
+
+        Raises:
+            ValueError: If `max_concurrency` or `history` is not positive
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+        if history <= 0:
+            raise ValueError("history must be a positive integer")
+
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+        self.__history = history
+        self.__ids = itertools.count(1)
+        self.__tasks: OrderedDict = OrderedDict()
+        self.__running: Dict[int, asyncio.Task] = {}
+        # lane -> the last task submitted to the lane, while it is not done
+        self.__lanes: Dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def lanes(self) -> int:
+        """int: The number of lanes with pending or running tasks"""
+        return len(self.__lanes)
+
+    def submit(
+        self,
+        name: str,
+        function: Callable[..., Awaitable[Any]],
+        *args: Any,
+        lane: Optional[Hashable] = None,
+        **kwargs: Any
+    ) -> int:
+        """Schedules `function(*args, **kwargs)` to run in the background
+
+        Args:
+            name (str): a description of the task used in logs, such as the name of a command
+            function (Callable[..., Awaitable[Any]]): the async function run by the task
+            *args: the positional arguments of `function`
+            lane (Hashable, default=None): the task starts once the tasks submitted before it
+                with the same lane are done. None runs the task without waiting for others.
+            **kwargs: the keyword arguments of `function`
+
+        Returns:
+            int: the id of the task, see `get`
+        """
+        task: ScheduledTask = ScheduledTask(next(self.__ids), name)
+        previous: Optional[asyncio.Task] = self.__lanes.get(lane) if lane is not None else None
+        future: asyncio.Task = asyncio.ensure_future(
+            self.__run(task, previous, function, args, kwargs)
+        )
+        self.__tasks[task.task_id] = task
+        self.__running[task.task_id] = future
+        if lane is not None:
+            self.__lanes[lane] = future
+            future.add_done_callback(functools.partial(self.__leave_lane, lane))
+        return task.task_id
+
+    def get(self, task_id: int) -> Optional[ScheduledTask]:
+        """Looks up a task
+
+        Args:
+            task_id (int): the id returned by `submit`
+
+        Returns:
+            ScheduledTask: the task, None if there is no task with `task_id` or it finished
+                too long ago
+        """
+        return self.__tasks.get(task_id)
+
+    def counts(self) -> Dict[str, int]:
+        """Counts the known tasks in every status
+
+        Returns:
+            Dict[str, int]: the number of "pending", "running", "succeeded", "failed" and
+                "cancelled" tasks
+        """
+        counts: Dict[str, int] = {PENDING: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0, CANCELLED: 0}
+        for task in self.__tasks.values():
+            counts[task.status] += 1
+        return counts
+
+    async def join(self) -> None:
+        """Waits until every submitted task is done"""
+        while self.__running:
+            await asyncio.wait(list(self.__running.values()))
+
+    async def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Waits for the submitted tasks and cancels those still running after `timeout`
+
+        Args:
+            timeout (float, default=None): seconds to wait. None waits until every task is done.
+        """
+        running: List[asyncio.Task] = list(self.__running.values())
+        if not running:
+            return
+        _, pending = await asyncio.wait(running, timeout=timeout)
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    async def __run(
+        self,
+        task: ScheduledTask,
+        previous: Optional[asyncio.Task],
+        function: Callable[..., Awaitable[Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+    ) -> None:
+        try:
+            if previous is not None:
+                # waits without being affected by the result of the previous task of the lane
+                await asyncio.wait([previous])
+            async with self.__semaphore:
+                task.status = RUNNING
+                task.started_at = time.time()
+                task.result = await function(*args, **kwargs)
+                task.status = SUCCEEDED
+        except asyncio.CancelledError:
+            task.status = CANCELLED
+            raise
+        except Exception as error:
+            logging.exception("task [%d] [%s] failed", task.task_id, task.name)
+            task.status = FAILED
+            task.error = repr(error)
+        finally:
+            task.finished_at = time.time()
+            del self.__running[task.task_id]
+            self.__forget_finished()
+
+    def __leave_lane(self, lane: Hashable, future: asyncio.Task) -> None:
+        # the lane is removed once its last task is done
+        if self.__lanes.get(lane) is future:
+            del self.__lanes[lane]
+
+    def __forget_finished(self) -> None:
+        # only the most recent finished tasks are kept, running tasks are never dropped
+        finished: int = len(self.__tasks) - len(self.__running)
+        for task_id in list(self.__tasks):
+            if finished <= self.__history:
+                break
+            if self.__tasks[task_id].done:
+                del self.__tasks[task_id]
+                finished -= 1
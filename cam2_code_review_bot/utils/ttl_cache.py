@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """A bounded mapping whose entries expire `ttl` seconds after they were set
+
+    Once `max_entries` is reached the oldest entries are evicted first. Expired entries are
+    removed whenever the cache is changed, so it never holds more than `max_entries` entries.
+
+    The webhook uses one cache to drop the deliveries GitHub sends again and one to merge
+    identical commands asked for on the same pull request within a short window.
+
+    Example:
+    ```python
+    deliveries: TTLCache = TTLCache(max_entries=10000, ttl=3600.0)
+    if not deliveries.add(request.headers["X-GitHub-Delivery"]):
+        pass  # this delivery was already handled
+    ```
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_entries (int, default=10000): the number of entries kept
+            ttl (float, default=3600.0): seconds after which an entry expires
+            clock (Callable[[], float], default=time.monotonic): the current time in seconds
+
+        Raises:
+            ValueError: If `max_entries` or `ttl` is not positive
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be a positive integer")
+        if ttl <= 0:
+            raise ValueError("ttl must be a positive number")
+
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__clock = clock
+        # key -> (expiry time, value), in the order the entries expire
+        self.__entries: OrderedDict = OrderedDict()
+
+    @property
+    def ttl(self) -> float:
+        """float: Seconds after which an entry expires"""
+        return self.__ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Looks up the value of `key`
+
+        Args:
+            key (Hashable): the key of the entry
+            default (Any, default=None): the value returned if there is no entry
+
+        Returns:
+            Any: the value of the entry, `default` if there is none or it expired
+        """
+        entry: Optional[tuple] = self.__entries.get(key)
+        if entry is None or entry[0] <= self.__clock():
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any = True) -> None:
+        """Sets the value of `key`, it expires `ttl` seconds from now
+
+        Args:
+            key (Hashable): the key of the entry
+            value (Any, default=True): the value of the entry
+        """
+        now: float = self.__clock()
+        self.__entries.pop(key, None)
+        self.__entries[key] = (now + self.__ttl, value)
+        self.__evict(now)
+
+    def add(self, key: Hashable) -> bool:
+        """Sets `key` unless it is already in the cache
+
+        Args:
+            key (Hashable): the key of the entry
+
+        Returns:
+            bool: True if the key was added, False if it was already in the cache
+        """
+        if key in self:
+            return False
+        self.set(key)
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry: Optional[tuple] = self.__entries.get(key)
+        return entry is not None and entry[0] > self.__clock()
+
+    def __len__(self) -> int:
+        self.__evict(self.__clock())
+        return len(self.__entries)
+
+    def __evict(self, now: float) -> None:
+        # every entry lives for the same time, so the first entry always expires first
+        while self.__entries:
+            key, (expires_at, _) = next(iter(self.__entries.items()))
+            if expires_at > now and len(self.__entries) <= self.__max_entries:
+                break
+            del self.__entries[key]
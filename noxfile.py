@@ -2,12 +2,15 @@ import nox
 
 FILEPATHS = [
     "noxfile.py",
+    "benchmarks",
     "cam2_code_review_bot/dynamodb",
     "cam2_code_review_bot/commands",
     "cam2_code_review_bot/cam2_code_review_bot.py",
+    "cam2_code_review_bot/jobs",
     "cam2_code_review_bot/utils",
     "tests",
     "setup.py",
+    "worker.py",
 ]
 
 
@@ -19,6 +22,13 @@ def tests(session):
     session.run("pytest")
 
 
+@nox.session(python="3.7")
+def benchmarks(session):
+    session.run("pip", "install", "-e", ".")
+    session.run("pip", "install", "-r", "requirements.txt")
+    session.run("python", "-m", "benchmarks.run", *session.posargs)
+
+
 @nox.session(python="3.7")
 def lint(session):
     session.install("black")
@@ -0,0 +1,62 @@
+import logging
+import os
+import signal
+import subprocess
+import sys
+
+# stopping gives each process this many seconds to exit before it is killed
+STOP_TIMEOUT = 30
+
+
+def supervise(commands):
+    """Runs the commands side by side until one of them exits, then stops the others
+
+    SIGTERM and SIGINT are forwarded to every process. The exit code is the one of the
+    process that exited first, so the container stops and can be restarted when either
+    the webhook or the worker pool dies.
+
+    Args:
+        commands ([[str]]): the arguments of each process
+
+    Returns:
+        int: the exit code of the first process to exit
+
+    """
+    processes = [subprocess.Popen(command) for command in commands]
+
+    def forward(signal_number, frame):
+        # no process is reaped before os.wait returns, their pids are still theirs
+        for process in processes:
+            os.kill(process.pid, signal_number)
+
+    handlers = {
+        signal_number: signal.signal(signal_number, forward)
+        for signal_number in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        pid, status = os.wait()
+    finally:
+        for signal_number, handler in handlers.items():
+            signal.signal(signal_number, handler)
+    first = next(process for process in processes if process.pid == pid)
+    # the process is already reaped, Popen would not find its exit code any more
+    first.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else 128 + os.WTERMSIG(status)
+    logging.info("%s exited with %d, stopping the others", first.args[0], first.returncode)
+
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return first.returncode
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    bind = ":" + os.getenv("PORT", "8080")
+    webhook = ["hypercorn", "--bind", bind, "--workers", "1", "entry:app"]
+    sys.exit(supervise([[sys.executable, "worker.py"], webhook]))
@@ -0,0 +1,280 @@
+import asyncio
+import resource
+import sys
+import time
+import pytest
+from typing import List
+from cam2_code_review_bot.static_analysis import (
+    StaticTool,
+    StaticError,
+    StaticAnalyzer,
+    ResultCache,
+    ToolMetrics,
+)
+
+
+class SleepyTool(StaticTool):
+    """Mocks a tool that takes `delay` seconds to report a single error
+    """
+
+    def __init__(self, name: str, delay: float):
+        self.delay = delay
+        super(SleepyTool, self).__init__(name)
+
+    def load_config(self, config) -> None:
+        pass
+
+    def run(self) -> List[StaticError]:
+        time.sleep(self.delay)
+        return [StaticError(error_name=self.name, tool_name=self.name)]
+
+
+class FileTool(StaticTool):
+    """Mocks a tool that reports one error per line of the file in its configs
+    """
+
+    def __init__(self):
+        self.runs = 0
+        super(FileTool, self).__init__("file-tool")
+
+    def load_config(self, config) -> None:
+        self.file_paths = [config["file_path"]]
+
+    def run(self) -> List[StaticError]:
+        self.runs += 1
+        with open(self.file_paths[0], "r") as source:
+            return [
+                StaticError(line_no=line_no, tool_name=self.name)
+                for line_no, _ in enumerate(source, 1)
+            ]
+
+
+class BrokenTool(StaticTool):
+    """Mocks a tool that crashes when it is run
+    """
+
+    def __init__(self):
+        super(BrokenTool, self).__init__("broken-tool")
+
+    def load_config(self, config) -> None:
+        pass
+
+    def run(self) -> List[StaticError]:
+        raise RuntimeError("this tool is broken")
+
+
+def test_parallel_keeps_tool_order():
+    """Tools finishing out of order still report in the order they were added
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(SleepyTool("slow-tool", 0.2))
+    sa.add_tool(SleepyTool("fast-tool", 0.0))
+
+    errors: List[StaticError] = sa.run_raw(parallel=True, max_workers=2)
+
+    assert [error.tool_name for error in errors] == ["slow-tool", "fast-tool"]
+
+
+def test_parallel_isolates_failing_tool():
+    """A tool raising an exception does not stop the other tools from reporting
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(SleepyTool("first-tool", 0.0))
+    sa.add_tool(BrokenTool())
+    sa.add_tool(SleepyTool("last-tool", 0.0))
+
+    errors: List[StaticError] = sa.run_raw(parallel=True)
+
+    assert [error.tool_name for error in errors] == ["first-tool", "last-tool"]
+
+
+def test_parallel_skips_single_failing_tool():
+    """A failing tool is skipped in parallel mode even when it is the only tool
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(BrokenTool())
+
+    assert sa.run_raw(parallel=True) == []
+    assert sa.run_md(parallel=True) == "No static errors reported."
+    assert sa.metrics["broken-tool"].failed
+
+
+def test_sequential_raises_on_failing_tool():
+    """The default sequential mode keeps propagating tool failures
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(BrokenTool())
+
+    with pytest.raises(RuntimeError):
+        sa.run_raw()
+
+
+def test_stream_yields_fastest_tool_first():
+    """Streaming reports each tool as soon as it finishes
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(SleepyTool("slow-tool", 0.3))
+    sa.add_tool(BrokenTool())
+    sa.add_tool(SleepyTool("fast-tool", 0.0))
+
+    chunks = list(sa.run_stream())
+
+    assert [name for name, _ in chunks] == ["fast-tool", "slow-tool"]
+    assert [error.tool_name for error in chunks[0][1]] == ["fast-tool"]
+
+
+def test_stream_async_yields_fastest_tool_first():
+    """The async stream reports tools in the order they finish
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(SleepyTool("slow-tool", 0.3))
+    sa.add_tool(BrokenTool())
+    sa.add_tool(SleepyTool("fast-tool", 0.0))
+
+    async def collect():
+        return [name async for name, _ in sa.run_stream_async()]
+
+    assert asyncio.run(collect()) == ["fast-tool", "slow-tool"]
+
+
+class CacheCheckingTool(SleepyTool):
+    """Mocks a tool that records whether the source cache is still set when it finishes
+    """
+
+    def run(self) -> List[StaticError]:
+        errors: List[StaticError] = super(CacheCheckingTool, self).run()
+        self.had_cache = self.source_cache is not None
+        return errors
+
+
+def test_stream_stopped_early_waits_for_running_tools():
+    """Stopping a stream early keeps the state of the run until the running tools finish
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    slow_tool: CacheCheckingTool = CacheCheckingTool("slow-tool", 0.3)
+    sa.add_tool(slow_tool)
+    sa.add_tool(SleepyTool("fast-tool", 0.0))
+
+    for name, _ in sa.run_stream():
+        break
+
+    assert name == "fast-tool"
+    assert slow_tool.had_cache
+    assert set(sa.metrics) == {"slow-tool", "fast-tool"}
+
+
+def test_stream_async_stopped_early_waits_for_running_tools():
+    """Stopping an async stream early keeps the state of the run until the running tools finish
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    slow_tool: CacheCheckingTool = CacheCheckingTool("slow-tool", 0.3)
+    sa.add_tool(slow_tool)
+    sa.add_tool(SleepyTool("fast-tool", 0.0))
+
+    async def first():
+        stream = sa.run_stream_async()
+        async for name, _ in stream:
+            await stream.aclose()
+            return name
+
+    assert asyncio.run(first()) == "fast-tool"
+    assert slow_tool.had_cache
+    assert set(sa.metrics) == {"slow-tool", "fast-tool"}
+
+
+def test_metrics_of_each_tool():
+    """Every tool run records its time and error count, failed tools included
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(SleepyTool("slow-tool", 0.2))
+    sa.add_tool(BrokenTool())
+    sa.add_tool(SleepyTool("fast-tool", 0.0))
+
+    sa.run_raw(parallel=True)
+    metrics = sa.metrics
+
+    assert list(metrics) == ["slow-tool", "broken-tool", "fast-tool"]
+    assert metrics["slow-tool"].wall_time >= 0.2
+    assert metrics["slow-tool"].error_count == 1
+    assert metrics["slow-tool"].peak_rss_kb == 0
+    assert not metrics["slow-tool"].failed
+    assert metrics["broken-tool"].failed
+    assert metrics["fast-tool"].wall_time < metrics["slow-tool"].wall_time
+
+
+class ProcessTool(StaticTool):
+    """Mocks a tool that runs a Python program
+    """
+
+    def __init__(self, name: str, program: str):
+        self.program = program
+        super(ProcessTool, self).__init__(name)
+
+    def load_config(self, config) -> None:
+        pass
+
+    def run(self) -> List[StaticError]:
+        errors: List[StaticError] = []
+        self.run_command([sys.executable, "-c", self.program], errors)
+        return errors
+
+
+def test_metrics_of_parallel_processes():
+    """The processes of tools run in parallel are measured separately
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    # a process starts out with the peak memory of the process it was forked from
+    peak_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + (100 << 10)
+    busy: str = "import time\nb = bytearray(%d << 10)\nt = time.process_time()\n" % peak_kb
+    busy += "while time.process_time() - t < 0.3: pass"
+    sa.add_tool(ProcessTool("busy-tool", busy))
+    sa.add_tool(ProcessTool("idle-tool", "import time; time.sleep(1.0)"))
+
+    sa.run_raw(parallel=True)
+    busy_metrics: ToolMetrics = sa.metrics["busy-tool"]
+    idle_metrics: ToolMetrics = sa.metrics["idle-tool"]
+
+    assert busy_metrics.children_user_time + busy_metrics.children_system_time >= 0.25
+    assert idle_metrics.children_user_time + idle_metrics.children_system_time < 0.2
+    assert busy_metrics.peak_rss_kb - idle_metrics.peak_rss_kb > 50 << 10
+    assert idle_metrics.peak_rss_kb > 0
+
+
+def test_metrics_cache_hit(tmp_path):
+    """A result taken from the cache is marked as a cache hit
+    """
+    source = tmp_path / "source.py"
+    source.write_text("a = 1\nb = 2\n")
+    tool: FileTool = FileTool()
+    sa: StaticAnalyzer = StaticAnalyzer(cache=ResultCache())
+    sa.add_tool(tool)
+    sa.configure_tool("file-tool", {"file_path": str(source)})
+
+    sa.run_raw()
+    assert not sa.metrics["file-tool"].cache_hit
+    sa.run_raw()
+    assert sa.metrics["file-tool"].cache_hit
+    assert sa.metrics["file-tool"].error_count == 2
+    assert tool.runs == 1
+
+
+def test_run_md_timing_table():
+    """The timing table is only appended when asked for
+    """
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(SleepyTool("sleepy-tool", 0.0))
+
+    assert "<details>" not in sa.run_md()
+    md: str = sa.run_md(include_timing=True)
+    assert md.startswith("| Error Type")
+    assert "<summary>Timing</summary>" in md
+    assert "| sleepy-tool " in md
+    assert md.endswith("</details>")
+
+
+def test_format_metrics_md_marks_failures():
+    md: str = StaticAnalyzer.format_metrics_md(
+        [ToolMetrics("broken-tool", wall_time=1.5, failed=True)]
+    )
+    assert "broken-tool (failed)" in md
+    assert "1.50" in md
@@ -0,0 +1,93 @@
+import json
+import os
+import pytest
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import compare, main, run_benchmarks
+
+
+def read_corpus(file_paths):
+    contents = []
+    for file_path in file_paths:
+        with open(file_path, "r") as corpus_file:
+            contents.append(corpus_file.read())
+    return contents
+
+
+def test_corpus_is_deterministic(tmp_path):
+    first = generate_corpus(str(tmp_path / "first"), files=3, lines=100, seed=7)
+    second = generate_corpus(str(tmp_path / "second"), files=3, lines=100, seed=7)
+    other = generate_corpus(str(tmp_path / "other"), files=3, lines=100, seed=8)
+
+    assert [os.path.basename(path) for path in first] == [
+        "module_000.py",
+        "module_001.py",
+        "module_002.py",
+    ]
+    assert read_corpus(first) == read_corpus(second)
+    assert read_corpus(first) != read_corpus(other)
+
+
+def test_corpus_is_valid_python(tmp_path):
+    for content in read_corpus(generate_corpus(str(tmp_path), files=2, lines=300)):
+        compile(content, "<corpus>", "exec")
+        assert len(content.splitlines()) >= 300
+
+
+def test_corpus_clone_density(tmp_path):
+    without_clones = "".join(read_corpus(generate_corpus(str(tmp_path / "a"), clone_density=0.0)))
+    only_clones = "".join(read_corpus(generate_corpus(str(tmp_path / "b"), clone_density=1.0)))
+
+    assert "def clone_" not in without_clones
+    assert "def clone_" in only_clones
+    assert "def function_" not in only_clones
+
+    with pytest.raises(ValueError):
+        generate_corpus(str(tmp_path / "c"), clone_density=1.5)
+
+
+def test_run_benchmarks(tmp_path):
+    file_paths = generate_corpus(str(tmp_path), files=2, lines=100)
+    results = run_benchmarks(file_paths, ["duplicate", "pyflakes"], repeat=1)
+
+    assert set(results) == {"duplicate", "pyflakes", "analyzer", "analyzer-parallel"}
+    for result in results.values():
+        assert result["wall_time"] > 0
+        assert result["peak_rss_kb"] > 0
+        assert result["runs"] == 1
+    assert results["duplicate"]["errors"] > 0
+    assert results["analyzer"]["errors"] == (
+        results["duplicate"]["errors"] + results["pyflakes"]["errors"]
+    )
+
+
+def test_compare():
+    baseline = {"results": {"pyflakes": {"wall_time": 1.0}, "mypy": {"wall_time": 2.0}}}
+
+    assert compare({"results": {"pyflakes": {"wall_time": 1.05}}}, baseline, 0.1)
+    assert not compare({"results": {"pyflakes": {"wall_time": 1.2}}}, baseline, 0.1)
+    # cases missing from the baseline are never regressions
+    assert compare({"results": {"vulture": {"wall_time": 9.0}}}, baseline, 0.1)
+
+
+def test_main_writes_results(tmp_path):
+    output = str(tmp_path / "results.json")
+    code = main(
+        [
+            "--files",
+            "2",
+            "--lines",
+            "50",
+            "--tools",
+            "pyflakes",
+            "--repeat",
+            "1",
+            "--output",
+            output,
+        ]
+    )
+
+    assert code == 0
+    with open(output, "r") as results_file:
+        results = json.load(results_file)
+    assert results["metadata"]["corpus"]["total_files"] == 2
+    assert list(results["results"]) == ["pyflakes"]
@@ -0,0 +1,240 @@
+import pytest
+from typing import List
+from cam2_code_review_bot.static_analysis import (
+    ChangedLines,
+    StaticTool,
+    StaticError,
+    StaticAnalyzer,
+    ResultCache,
+    MyPyTool,
+    ProspectorTool,
+    PerformanceProfilerTool,
+)
+
+
+class CountingTool(StaticTool):
+    """Mocks a tool that reports one error per line of `file_path` and counts its runs
+    """
+
+    def __init__(self):
+        self.runs = 0
+        super(CountingTool, self).__init__("counting-tool")
+
+    def load_config(self, config) -> None:
+        self.file_path = config["file_path"]
+
+    def run(self) -> List[StaticError]:
+        self.runs += 1
+        with open(self.file_path, "r") as source:
+            return [
+                StaticError(file_path=self.file_path, line_no=line_no, code=line.rstrip())
+                for line_no, line in enumerate(source, 1)
+            ]
+
+
+def _analyzer(cache: ResultCache, file_path: str, **kwargs) -> StaticAnalyzer:
+    sa: StaticAnalyzer = StaticAnalyzer(cache, **kwargs)
+    sa.add_tool(CountingTool())
+    sa.configure_tool("counting-tool", {"file_path": file_path})
+    return sa
+
+
+def test_cache_reuses_unchanged_file(tmp_path):
+    """A second run over the same file content is served from the cache
+    """
+    source = tmp_path / "input.py"
+    source.write_text("a = 1\nb = 2\n")
+    cache: ResultCache = ResultCache()
+    sa: StaticAnalyzer = _analyzer(cache, str(source))
+
+    first: List[StaticError] = sa.run_raw()
+    second: List[StaticError] = sa.run_raw()
+
+    assert sa.get_tool("counting-tool").runs == 1
+    assert [error.to_dict() for error in first] == [error.to_dict() for error in second]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_misses_on_changed_file(tmp_path):
+    """Changing the analyzed file invalidates the cached result
+    """
+    source = tmp_path / "input.py"
+    source.write_text("a = 1\n")
+    cache: ResultCache = ResultCache()
+    sa: StaticAnalyzer = _analyzer(cache, str(source))
+
+    sa.run_raw()
+    source.write_text("a = 1\nb = 2\n")
+    errors: List[StaticError] = sa.run_raw()
+
+    assert sa.get_tool("counting-tool").runs == 2
+    assert len(errors) == 2
+    assert cache.misses == 2
+
+
+def test_cache_reuses_results_of_another_checkout(tmp_path):
+    """The same file saved in another root is served from the cache, with its errors in that root
+    """
+    first_root = tmp_path / "first"
+    second_root = tmp_path / "second"
+    for root in [first_root, second_root]:
+        root.mkdir()
+        (root / "input.py").write_text("a = 1\nb = 2\n")
+    cache: ResultCache = ResultCache()
+
+    _analyzer(cache, str(first_root / "input.py"), root=str(first_root)).run_raw()
+    sa: StaticAnalyzer = _analyzer(cache, str(second_root / "input.py"), root=str(second_root))
+    errors: List[StaticError] = sa.run_raw()
+
+    assert sa.get_tool("counting-tool").runs == 0
+    assert [error.file_path for error in errors] == [str(second_root / "input.py")] * 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_filters_changed_lines_after_lookup(tmp_path):
+    """Runs on other changed lines of the same file share the cached result
+    """
+    source = tmp_path / "input.py"
+    source.write_text("a = 1\nb = 2\n")
+    cache: ResultCache = ResultCache()
+    first_lines: ChangedLines = ChangedLines()
+    first_lines.add("input.py", 1, 1)
+    second_lines: ChangedLines = ChangedLines()
+    second_lines.add("input.py", 2, 2)
+
+    first: List[StaticError] = _analyzer(
+        cache, str(source), root=str(tmp_path), changed_lines=first_lines
+    ).run_raw()
+    second: List[StaticError] = _analyzer(
+        cache, str(source), root=str(tmp_path), changed_lines=second_lines
+    ).run_raw()
+
+    assert [error.code for error in first] == ["a = 1"]
+    assert [error.code for error in second] == ["b = 2"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_misses_on_changed_dependency(tmp_path):
+    """Changing a file the tool depends on invalidates the cached result
+    """
+    source = tmp_path / "input.py"
+    source.write_text("a = 1\n")
+    dependency = tmp_path / "imported.py"
+    cache: ResultCache = ResultCache()
+    sa: StaticAnalyzer = _analyzer(cache, str(source))
+    sa.get_tool("counting-tool").dependency_files = lambda: [str(dependency)]
+
+    sa.run_raw()
+    dependency.write_text("b = 2\n")
+    sa.run_raw()
+    sa.run_raw()
+
+    assert sa.get_tool("counting-tool").runs == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_mypy_depends_on_its_package(tmp_path, monkeypatch):
+    """mypy results depend on its configs and the other modules of the checked packages
+    """
+    package = tmp_path / "package"
+    (package / "sub").mkdir(parents=True)
+    for name in ["__init__.py", "a.py", "b.py", "sub/__init__.py", "sub/c.pyi"]:
+        (package / name).write_text("")
+    (tmp_path / "script.py").write_text("")
+    (tmp_path / "other.py").write_text("")
+    monkeypatch.chdir(tmp_path)
+    tool: MyPyTool = MyPyTool()
+
+    tool.load_config({"file_paths": ["package/sub/__init__.py", "script.py"]})
+
+    assert tool.dependency_files() == [
+        "mypy.ini",
+        ".mypy.ini",
+        "pyproject.toml",
+        "setup.cfg",
+        "./other.py",
+        "package/__init__.py",
+        "package/a.py",
+        "package/b.py",
+        "package/sub/c.pyi",
+    ]
+
+
+class CountingProspectorTool(ProspectorTool):
+    """Mocks prospector without running it, the cache key is still the one of prospector
+    """
+
+    def __init__(self):
+        self.runs = 0
+        super(CountingProspectorTool, self).__init__()
+
+    def run(self) -> List[StaticError]:
+        self.runs += 1
+        return []
+
+
+def test_cache_misses_on_changed_import(tmp_path, monkeypatch):
+    """Editing a module imported by the analyzed file invalidates the cached result
+    """
+    (tmp_path / "main.py").write_text("import helper\n")
+    (tmp_path / "helper.py").write_text("def f():\n    return 1\n")
+    monkeypatch.chdir(tmp_path)
+    cache: ResultCache = ResultCache()
+    sa: StaticAnalyzer = StaticAnalyzer(cache)
+    sa.add_tool(CountingProspectorTool())
+    sa.configure_tool("prospector", {"file_path": "main.py"})
+
+    sa.run_raw()
+    sa.run_raw()
+    (tmp_path / "helper.py").write_text("def f():\n    return '1'\n")
+    sa.run_raw()
+
+    assert sa.get_tool("prospector").runs == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_profiler_is_not_cached():
+    """Profiles are timed and run imported modules, they are never taken from the cache
+    """
+    cache: ResultCache = ResultCache()
+    sa: StaticAnalyzer = StaticAnalyzer(cache)
+    sa.add_tool(PerformanceProfilerTool())
+    sa.configure_tool_from_file(
+        "performance-profiler", "tests/test_performance_profiler/config_01.json"
+    )
+
+    sa.run_raw()
+    sa.run_raw()
+
+    assert not sa.metrics["performance-profiler"].cache_hit
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_cache_disk_tier(tmp_path):
+    """Results written to disk are found by a new cache using the same directory
+    """
+    source = tmp_path / "input.py"
+    source.write_text("a = 1\n")
+    directory: str = str(tmp_path / "cache")
+
+    _analyzer(ResultCache(directory=directory), str(source)).run_raw()
+    sa: StaticAnalyzer = _analyzer(ResultCache(directory=directory), str(source))
+    errors: List[StaticError] = sa.run_raw()
+
+    assert sa.get_tool("counting-tool").runs == 0
+    assert errors[0].code == "a = 1"
+    assert sa.cache.hits == 1
+
+
+def test_cache_lru_eviction():
+    """The least recently used entry is evicted once the cache is full
+    """
+    cache: ResultCache = ResultCache(max_entries=2)
+    cache.put("a", [])
+    cache.put("b", [])
+    cache.get("a")
+    cache.put("c", [])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == []
+    assert len(cache) == 2
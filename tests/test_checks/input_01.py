@@ -0,0 +1,30 @@
+def load(path, cache={}, *, seen=[]):
+    try:
+        return cache[path]
+    except:
+        return None
+
+
+def compare(value):
+    if value == None:
+        return 0
+    return 1 if None != value else 2
+
+
+def grid(rows, columns, depth):
+    total = 0
+    for row in range(rows):
+        for column in range(columns):
+            for level in range(depth):
+                while total < level:
+                    for step in range(2):
+                        total += step
+    return total
+
+
+def render(items):
+    text = ""
+    for item in items:
+        text += f"{item}, "
+    text += "done"
+    return text
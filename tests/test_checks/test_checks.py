@@ -0,0 +1,97 @@
+import ast
+import pytest
+from typing import List
+from cam2_code_review_bot.static_analysis import (
+    Check,
+    CheckContext,
+    CheckTool,
+    SourceFile,
+    StaticAnalyzer,
+    StaticError,
+    register_check,
+)
+
+
+class RecordingCheck(Check):
+    """Records the nodes it is called for and the depth of their ancestors
+    """
+
+    name = "test-recording"
+    error_name = "Recorded"
+
+    def start_file(self, context: CheckContext) -> None:
+        self.calls = []
+
+    def visit_Name(self, node: ast.Name, context: CheckContext) -> None:
+        self.calls.append(("Name", node.id, [type(parent).__name__ for parent in context.parents]))
+
+    def visit_stmt(self, node: ast.stmt, context: CheckContext) -> None:
+        self.calls.append(("stmt", type(node).__name__, len(context.parents)))
+
+    def finish_file(self, context: CheckContext) -> None:
+        self.parents_after = list(context.parents)
+        self.report(context.source_file.tree, context, "done")
+
+
+register_check(RecordingCheck)
+
+
+def test_checks():
+    """Runs the built-in checks on a file with one instance of every error
+    """
+
+    static_analyzer: StaticAnalyzer = StaticAnalyzer()
+    static_analyzer.add_tool(CheckTool())
+    static_analyzer.configure_tool_from_file("checks", "tests/test_checks/config_01.json")
+    output: str = static_analyzer.run_md()
+
+    fp = open("tests/test_checks/expected_01.txt", "r")
+    expected: str = "".join(fp.readlines())
+    fp.close()
+
+    assert type(output) is str and output == expected
+
+
+def test_single_traversal_dispatch():
+    """Handlers are called once per node, for the node type and its base classes
+    """
+
+    tool: CheckTool = CheckTool()
+    tool.load_config({"file_path": "tests/test_checks/input_01.py", "checks": ["test-recording"]})
+    source_file: SourceFile = SourceFile("example.py", b"if a:\n    b = a\n")
+    errors: List[StaticError] = tool.check_tree("example.py", source_file, source_file.tree)
+
+    assert tool.checks[0].calls == [
+        ("stmt", "If", 1),
+        ("Name", "a", ["Module", "If"]),
+        ("stmt", "Assign", 2),
+        ("Name", "b", ["Module", "If", "Assign"]),
+        ("Name", "a", ["Module", "If", "Assign"]),
+    ]
+    assert tool.checks[0].parents_after == []
+    assert [(error.error_description, error.line_no) for error in errors] == [("done", 1)]
+    assert errors[0].tool_name == "checks"
+
+
+def test_check_configs():
+    """Checks are selected, disabled and configured by name
+    """
+
+    tool: CheckTool = CheckTool()
+    tool.load_config(
+        {
+            "file_path": "tests/test_checks/input_01.py",
+            "checks": ["nested-loops", "bare-except"],
+            "disable": ["bare-except"],
+            "check_configs": {"nested-loops": {"max_depth": 1}},
+        }
+    )
+    errors: List[StaticError] = tool.run()
+
+    # only the outermost loop that is too deep is reported
+    assert [(error.error_name, error.line_no) for error in errors] == [("Deeply Nested Loop", 17)]
+
+    with pytest.raises(ValueError):
+        tool.load_config({"file_path": "tests/test_checks/input_01.py", "checks": ["unknown"]})
+    with pytest.raises(ValueError):
+        register_check(RecordingCheck)
@@ -0,0 +1,92 @@
+import asyncio
+import os
+from typing import Any, Dict, List
+from cam2_code_review_bot.commands import get_command
+from cam2_code_review_bot.commands import analyze as analyze_module
+from cam2_code_review_bot.commands.analyze import analyze
+from cam2_code_review_bot.static_analysis import ResultCache
+from cam2_code_review_bot.utils import Github
+
+CODE: str = "import os\nimport sys\n\nprint(sys.argv)\nprint(undefined)\n"
+FILES: List[Dict[str, Any]] = [
+    {
+        "filename": "src/module.py",
+        "status": "modified",
+        "contents_url": "src/module.py",
+        "patch": "@@ -4,1 +4,2 @@\n print(sys.argv)\n+print(undefined)",
+    },
+    {"filename": "gone.py", "status": "removed", "contents_url": "gone.py"},
+]
+
+
+class FakeGitHubAPI:
+    """Serves the files of a pull request and records the comments posted
+    """
+
+    def __init__(self, files: List[Dict[str, Any]]):
+        self.files = files
+        self.posts: List[Dict[str, Any]] = []
+
+    async def getitem(self, url: str) -> Any:
+        if url.endswith("/files"):
+            return self.files
+        return {"name": os.path.basename(url), "download_url": url}
+
+    async def post(self, url: str, data: Dict[str, Any]) -> None:
+        self.posts.append(data)
+
+
+def test_analyze_reports_changed_lines(tmp_path, monkeypatch):
+    """Only the errors on the lines changed by the pull request are reported, by file
+    """
+
+    async def download(url: str) -> str:
+        return CODE
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Github, "download", download)
+    monkeypatch.setattr(analyze_module, "_result_cache", ResultCache())
+    gh: FakeGitHubAPI = FakeGitHubAPI(FILES)
+
+    assert asyncio.run(analyze(gh, "/repos/o/r/pulls/1", []))
+    bodies: Dict[str, str] = {
+        post["body"].split(":")[0].split()[-1]: post["body"] for post in gh.posts[:-1]
+    }
+    assert sorted(bodies) == ["mypy", "pyflakes", "vulture"]
+    body: str = bodies["pyflakes"]
+    assert "#### src/module.py" in body
+    assert "undefined name 'undefined'" in body
+    assert "'os' imported but unused" not in body
+    assert "<summary>Timing</summary>" in gh.posts[-1]["body"]
+    assert get_command("analyze").queued
+
+
+def test_analyze_reuses_results_of_unchanged_files(tmp_path, monkeypatch):
+    """A second push with the same files is served from the cache, although it is saved in a new
+    temporary directory
+    """
+
+    async def download(url: str) -> str:
+        return CODE
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Github, "download", download)
+    cache: ResultCache = ResultCache(directory=str(tmp_path / "cache"))
+    monkeypatch.setattr(analyze_module, "_result_cache", cache)
+    first: FakeGitHubAPI = FakeGitHubAPI(FILES)
+    second: FakeGitHubAPI = FakeGitHubAPI(FILES)
+
+    assert asyncio.run(analyze(first, "/repos/o/r/pulls/1", []))
+    assert asyncio.run(analyze(second, "/repos/o/r/pulls/1", []))
+
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert sorted(post["body"] for post in first.posts[:-1]) == sorted(
+        post["body"] for post in second.posts[:-1]
+    )
+
+
+def test_analyze_issue_fails():
+    gh: FakeGitHubAPI = FakeGitHubAPI([])
+
+    assert not asyncio.run(analyze(gh, "/repos/o/r/issues/1", []))
+    assert "Command failed" in gh.posts[0]["body"]
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from typing import Any, Dict, List
+from cam2_code_review_bot.dynamodb import entry_count
+import cam2_code_review_bot.dynamodb as dynamodb
+from cam2_code_review_bot.commands.defect import logicDefect
+
+
+class FakeCounterTable:
+    """Adds to the defect counter atomically, like a DynamoDB update expression
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def update_item(self, **kwargs: Any) -> Dict[str, Any]:
+        assert kwargs["UpdateExpression"] == "ADD Entry_Count :one"
+        with self.lock:
+            self.count += kwargs["ExpressionAttributeValues"][":one"]
+            return {
+                "ResponseMetadata": {"HTTPStatusCode": 200},
+                "Attributes": {"Entry_Count": self.count},
+            }
+
+
+def test_concurrent_defects_get_distinct_numbers(monkeypatch):
+    """Defects reported at the same time are stored under different numbers
+    """
+    numbers: List[int] = []
+
+    def createDefect(defect: Dict[str, Any]) -> int:
+        numbers.append(defect["defect_number"])
+        return 0
+
+    monkeypatch.setattr(entry_count, "table", FakeCounterTable())
+    monkeypatch.setattr(dynamodb, "createDefect", createDefect)
+    monkeypatch.setattr(dynamodb, "getIssue", lambda issue_number: {"logic_defects": []})
+    monkeypatch.setattr(dynamodb, "updateIssue", lambda issue_number, issue: 0)
+    comment = {"path": "a.py", "diff_hunk": "@@ -1 +1 @@\n+x = 1"}
+    args = ["defect", "logic", "a.py", "line", "3", "code", "+x = 1", "why"]
+
+    async def report() -> None:
+        await asyncio.gather(
+            *(logicDefect(comment, args, "https://github.com/o/r/issues/1") for _ in range(8))
+        )
+
+    asyncio.run(report())
+    assert sorted(numbers) == list(range(8))
+
+
+def test_invalid_defect_does_not_use_a_number(monkeypatch):
+    """A defect that fails validation is not stored and the next defect gets its number
+    """
+    numbers: List[int] = []
+
+    def createDefect(defect: Dict[str, Any]) -> int:
+        numbers.append(defect["defect_number"])
+        return 0
+
+    counter: FakeCounterTable = FakeCounterTable()
+    monkeypatch.setattr(entry_count, "table", counter)
+    monkeypatch.setattr(dynamodb, "createDefect", createDefect)
+    monkeypatch.setattr(dynamodb, "getIssue", lambda issue_number: {"logic_defects": []})
+    monkeypatch.setattr(dynamodb, "updateIssue", lambda issue_number, issue: 0)
+    args = ["defect", "logic", "a.py", "line", "3", "code", "+x = 1", "why"]
+
+    asyncio.run(logicDefect({"path": None, "diff_hunk": "+x = 1"}, args, "/repos/o/r/issues/1"))
+    asyncio.run(logicDefect({"path": "a.py", "diff_hunk": "+x = 1"}, args, "/repos/o/r/issues/1"))
+
+    assert numbers == [0] and counter.count == 1
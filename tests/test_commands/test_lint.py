@@ -0,0 +1,37 @@
+import asyncio
+from typing import Any, Dict, List
+from cam2_code_review_bot.commands.lint import lint
+from cam2_code_review_bot.utils import Github
+
+
+class FakeGitHubAPI:
+    """Serves one pull request file and records the comments posted
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.posts: List[Dict[str, Any]] = []
+
+    async def getitem(self, url: str) -> Any:
+        if url.endswith("/files"):
+            return [{"filename": self.file_name, "contents_url": "contents?ref=abc"}]
+        return {"name": self.file_name, "download_url": "raw", "html_url": "html"}
+
+    async def post(self, url: str, data: Dict[str, Any]) -> None:
+        self.posts.append(data)
+
+
+def test_file_names_are_not_run_by_a_shell(tmp_path, monkeypatch):
+    """A file name with shell syntax is passed to the linter as a plain argument
+    """
+
+    async def download(url: str) -> str:
+        return "x=1\n"
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Github, "download", download)
+    gh: FakeGitHubAPI = FakeGitHubAPI("a$(touch pwned);touch pwned2.py")
+
+    assert asyncio.run(lint(gh, "/repos/o/r/pulls/1", ["code", "of", "language", "python"]))
+    assert not (tmp_path / "pwned").exists() and not (tmp_path / "pwned2.py").exists()
+    assert "E225" in gh.posts[0]["body"]
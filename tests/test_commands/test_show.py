@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from typing import Any, Dict, List
+import cam2_code_review_bot.dynamodb as dynamodb
+from cam2_code_review_bot.commands.show import showreviewers
+
+
+class FakeGitHubAPI:
+    """Records the comments posted
+    """
+
+    def __init__(self):
+        self.posts: List[Dict[str, Any]] = []
+
+    async def post(self, url: str, data: Dict[str, Any]) -> None:
+        self.posts.append(data)
+
+
+def test_database_is_not_called_on_the_loop(monkeypatch):
+    """The blocking DynamoDB functions are called outside of the event loop thread
+    """
+    threads: List[threading.Thread] = []
+
+    def getIssue(issue_number: int) -> Dict[str, Any]:
+        threads.append(threading.current_thread())
+        return {"reviewers": ["octocat"]}
+
+    def getReviewer(reviewer: str, issue_number: int) -> Dict[str, Any]:
+        threads.append(threading.current_thread())
+        return {"github_username": reviewer, "role": "LOGIC", "role_description": "check it"}
+
+    monkeypatch.setattr(dynamodb, "getIssue", getIssue)
+    monkeypatch.setattr(dynamodb, "getReviewer", getReviewer)
+    gh: FakeGitHubAPI = FakeGitHubAPI()
+
+    assert asyncio.run(showreviewers(gh, "/repos/o/r/issues/1"))
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    assert "octocat" in gh.posts[0]["body"]
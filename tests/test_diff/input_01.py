@@ -0,0 +1,16 @@
+import os
+import sys
+
+
+def first(values):
+    total = 0
+    for value in values:
+        total += value * 2
+    return total
+
+
+def second(values):
+    total = 0
+    for value in values:
+        total += value * 2
+    return total
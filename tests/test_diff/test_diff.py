@@ -0,0 +1,110 @@
+import pytest
+from typing import List
+from cam2_code_review_bot.static_analysis import (
+    ChangedLines,
+    DuplicateTool,
+    PyflakesTool,
+    StaticAnalyzer,
+    StaticError,
+    parse_patch,
+)
+
+PATCH: str = """@@ -1,3 +1,4 @@
+ import os
++import sys
+ 
+ 
+@@ -10,6 +11,7 @@ def first(values):
+ 
+ 
+ def second(values):
+-    total = 1
++    total = 0
++    for value in values:
+         total += value * 2
+     return total
+\\ No newline at end of file"""
+
+
+def test_parse_patch():
+    assert parse_patch(PATCH) == [(2, 2), (14, 15)]
+
+
+def test_changed_lines_merge_and_intersect():
+    changed_lines: ChangedLines = ChangedLines()
+    changed_lines.add("a.py", 10, 12)
+    changed_lines.add("a.py", 1, 2)
+    changed_lines.add("a.py", 13, 20)
+    changed_lines.add("a.py", 5, 5)
+
+    assert changed_lines.ranges("a.py") == [(1, 2), (5, 5), (10, 20)]
+    assert changed_lines.intersects("a.py", 3, 5)
+    assert not changed_lines.intersects("a.py", 3, 4)
+    assert not changed_lines.intersects("a.py", 21)
+    assert not changed_lines.intersects("b.py", 1)
+
+
+def test_changed_lines_keep_file_errors_of_changed_files():
+    changed_lines: ChangedLines = ChangedLines()
+    changed_lines.add("a.py", 10, 12)
+    errors: List[StaticError] = [
+        StaticError(file_path="a.py", line_no=None, error_name="File Error"),
+        StaticError(file_path="b.py", line_no=None, error_name="File Error"),
+        StaticError(file_path="a.py", line_no=3, error_name="Line Error"),
+        StaticError(file_path="a.py", line_no=11, error_name="Line Error"),
+        StaticError(error_name="Timeout Error"),
+    ]
+
+    assert changed_lines.filter(errors) == [errors[0], errors[3], errors[4]]
+
+
+def test_changed_lines_suffix_paths():
+    changed_lines: ChangedLines = ChangedLines.from_files_metadata(
+        [
+            {"filename": "src/a.py", "status": "modified", "patch": PATCH},
+            {"filename": "src/large.py", "status": "modified"},
+            {"filename": "src/gone.py", "status": "removed", "patch": "@@ -1 +0,0 @@\n-x"},
+        ]
+    )
+
+    assert "downloads/pr-1/src/a.py" in changed_lines
+    assert "downloads/pr-1/othersrc/a.py" not in changed_lines
+    assert changed_lines.intersects("downloads/pr-1/src/large.py", 100000)
+    assert changed_lines.files == ["src/a.py", "src/large.py"]
+
+
+def test_analyzer_reports_changed_lines_only():
+    changed_lines: ChangedLines = ChangedLines.from_patches({"tests/test_diff/input_01.py": PATCH})
+    analyzer: StaticAnalyzer = StaticAnalyzer(changed_lines=changed_lines)
+    analyzer.add_tool(PyflakesTool())
+    analyzer.configure_tool("pyflakes", {"file_path": "tests/test_diff/input_01.py"})
+
+    errors: List[StaticError] = analyzer.run_raw()
+
+    assert [error.line_no for error in errors] == [2]
+
+    analyzer.changed_lines = None
+    assert [error.line_no for error in analyzer.run_raw()] == [1, 2]
+
+
+def test_duplicate_reports_changed_clones_only():
+    config = {
+        "FilePath": "tests/test_diff/input_01.py",
+        "ignore": [],
+        "min": 2,
+        "one_error_per_line": 1,
+    }
+    analyzer: StaticAnalyzer = StaticAnalyzer()
+    analyzer.add_tool(DuplicateTool())
+    analyzer.configure_tool("duplicate", config)
+    everything: List[StaticError] = analyzer.run_raw()
+
+    analyzer.changed_lines = ChangedLines.from_patches({"tests/test_diff/input_01.py": PATCH})
+    changed: List[StaticError] = analyzer.run_raw()
+
+    assert changed
+    assert len(changed) < len(everything)
+    assert all(error.line_no >= 12 for error in changed)
+
+    analyzer.changed_lines = ChangedLines.from_patches({"other.py": PATCH})
+    assert analyzer.run_raw() == []
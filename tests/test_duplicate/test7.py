@@ -0,0 +1,28 @@
+def average_price(orders):
+    total = 0
+    count = 0
+    for order in orders:
+        if order.price > 0:
+            total = total + order.price * order.quantity
+            count = count + order.quantity
+    if count == 0:
+        return 0
+    return total / count
+
+
+def mean_weight(parcels):
+    weight_sum = 0
+    parcel_count = 0
+    for parcel in parcels:
+        if parcel.weight > 0:
+            weight_sum = weight_sum + parcel.weight * parcel.items
+            parcel_count = parcel_count + parcel.items
+    if parcel_count == 0:
+        return None
+    print("computed mean weight")
+    return weight_sum / parcel_count
+
+
+def unrelated(path):
+    with open(path) as source:
+        return [line.split(",") for line in source if line.strip()]
@@ -1,5 +1,9 @@
+import ast
+import itertools
 import pytest
 from cam2_code_review_bot.static_analysis import StaticAnalyzer, DuplicateTool
+from cam2_code_review_bot.static_analysis.duplicate_tool import File
+from cam2_code_review_bot.static_analysis.near_duplicate import find_near_duplicates
 
 
 def test_duplicate1():
@@ -90,3 +94,240 @@ def test_ignore():
     fp = open("tests/test_duplicate/expected_duplicate_5.txt", "r")
     expected: str = "".join(fp.readlines())
     fp.close()
+
+
+def test_many_files():
+    """
+    Test clones are found across files and reported with the file they were found in
+    """
+    static_analyzer = StaticAnalyzer()
+    static_analyzer.add_tool(DuplicateTool())
+    static_analyzer.configure_tool_from_file("duplicate", "tests/test_duplicate/test6_config.json")
+    errors = static_analyzer.run_raw()
+
+    locations = {(error.file_path, error.line_no) for error in errors}
+
+    # `x = x + 1` is repeated in both files
+    assert ("tests/test_duplicate/test1.py", 4) in locations
+    assert ("tests/test_duplicate/test3.py", 3) in locations
+
+
+def test_fingerprint_matches_digest():
+    """
+    Test two sub-trees share a fingerprint exactly when their digest strings are equal
+    """
+    from cam2_code_review_bot.static_analysis.duplicate_tool import digest, fingerprint
+
+    with open("tests/test_duplicate/test2.py") as source:
+        tree = ast.parse(source.read())
+
+    nodes = [node for node in ast.walk(tree) if hasattr(node, "lineno")]
+    by_digest = {}
+    by_fingerprint = {}
+    for node in nodes:
+        by_digest.setdefault(digest(node), set()).add(id(node))
+        by_fingerprint.setdefault(fingerprint(node), set()).add(id(node))
+
+    assert all(len(value) == 16 for value in by_fingerprint)
+    assert sorted(map(sorted, by_digest.values())) == sorted(map(sorted, by_fingerprint.values()))
+
+
+def test_repository_clones(tmp_path):
+    """
+    Test clones of a file are found in the rest of a repository through the clone index
+    """
+    from cam2_code_review_bot.static_analysis import CloneIndex
+
+    repository = tmp_path / "repository"
+    repository.mkdir()
+    function = "def total(items):\n    result = 0\n    for item in items:\n        result = result + item * 2\n    return result\n"
+    (repository / "library.py").write_text("import os\n\n" + function)
+    (repository / "unrelated.py").write_text("print('hello')\n")
+    pull_request_file = tmp_path / "change.py"
+    pull_request_file.write_text(function)
+
+    tool = DuplicateTool()
+    tool.load_config(
+        {
+            "FilePath": str(pull_request_file),
+            "ignore": [],
+            "min": "100",
+            "one_error_per_line": "1",
+            "Repository": str(repository),
+            "IndexPath": str(tmp_path / "index.sqlite"),
+        }
+    )
+    errors = tool.run()
+
+    assert [(error.line_no, error.error_description) for error in errors] == [
+        (1, "clone of code in library.py:3-7")
+    ]
+
+    # only the changed file is indexed again, the deleted one is removed
+    (repository / "library.py").write_text(function)
+    (repository / "unrelated.py").unlink()
+    index = CloneIndex(str(tmp_path / "index.sqlite"), str(repository))
+    assert index.update() == (1, 1)
+    index.close()
+
+
+def test_clone_index_location_and_ignore(tmp_path, monkeypatch):
+    """
+    Test the clone index is kept outside of the checkout and skips ignored constructs
+    """
+    import os
+    from cam2_code_review_bot.static_analysis import CloneIndex
+    from cam2_code_review_bot.static_analysis import clone_index
+    from cam2_code_review_bot.static_analysis.duplicate_tool import fingerprint
+
+    repository = tmp_path / "repository"
+    repository.mkdir()
+    function = "def total(items):\n    result = 0\n    for item in items:\n        result = result + item * 2\n    return result\n"
+    (repository / "library.py").write_text(function)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    index_path = CloneIndex.default_path(str(repository))
+    assert index_path.startswith(str(tmp_path / "cache"))
+    assert not os.path.abspath(index_path).startswith(str(repository))
+
+    fingerprints = [fingerprint(node) for node in ast.walk(ast.parse(function))]
+    index = CloneIndex(index_path, str(repository))
+    index.update()
+    assert [(path, begin) for _, path, begin, _ in index.find(fingerprints)] == [("library.py", 1)]
+    index.close()
+
+    # an index built with another blacklist is built again
+    index = CloneIndex(index_path, str(repository), ignore=["FunctionDef"])
+    assert index.update() == (1, 0)
+    assert index.find(fingerprints) == []
+    index.close()
+
+    # an index of another fingerprint format is built again
+    index = CloneIndex(index_path, str(repository), ignore=["FunctionDef"])
+    assert index.update() == (0, 0)
+    index.close()
+    monkeypatch.setattr(clone_index, "_FORMAT_VERSION", clone_index._FORMAT_VERSION + 1)
+    index = CloneIndex(index_path, str(repository), ignore=["FunctionDef"])
+    assert index.update() == (1, 0)
+    index.close()
+    assert not (repository / ".optimus_clone_index.sqlite").exists()
+
+
+def test_near_miss():
+    """
+    Test renamed and slightly modified copies are reported as near duplicates
+    """
+    static_analyzer = StaticAnalyzer()
+    static_analyzer.add_tool(DuplicateTool())
+    static_analyzer.configure_tool_from_file("duplicate", "tests/test_duplicate/test7_config.json")
+    errors = static_analyzer.run_raw()
+
+    assert [(error.error_name, error.line_no) for error in errors] == [
+        ("Near-duplicate code", 1),
+        ("Near-duplicate code", 13),
+    ]
+    assert errors[0].error_description.endswith(
+        "similar to lines 13-23 of tests/test_duplicate/test7.py"
+    )
+
+
+def test_near_miss_of_exact_copies(tmp_path):
+    """
+    Test every exact copy of a block is reported as a near duplicate of a similar block
+    """
+    with open("tests/test_duplicate/test7.py") as test7:
+        functions = test7.read().split("\n\n\n")
+    source = tmp_path / "copies.py"
+    source.write_text("\n\n\n".join([functions[0], functions[0], functions[1]]))
+    tool = DuplicateTool()
+    tool.load_config(
+        {
+            "FilePath": str(source),
+            "min": "100",
+            "ignore": ["None"],
+            "one_error_per_line": "1",
+            "near_miss": True,
+            "similarity_threshold": 0.7,
+        }
+    )
+
+    errors = tool.run()
+
+    assert [(error.error_name, error.line_no) for error in errors] == [
+        ("Near-duplicate code", 1),
+        ("Near-duplicate code", 13),
+        ("Near-duplicate code", 25),
+    ]
+    assert "similar to lines 25-35" in errors[1].error_description
+
+
+def test_max_reports():
+    """
+    Test only the highest scoring clone groups are reported when max_reports is set
+    """
+    config = {
+        "FilePath": "tests/test_duplicate/test1.py",
+        "min": "2",
+        "ignore": ["None"],
+        "one_error_per_line": "0",
+    }
+    tool = DuplicateTool()
+    tool.load_config(config)
+    all_errors = tool.run()
+    tool.load_config(dict(config, max_reports=1))
+    top_errors = tool.run()
+
+    # the highest scoring group is the repeated `x = x + 1` statement
+    assert len(top_errors) == 11
+    assert [error.to_dict() for error in top_errors] == [
+        error.to_dict() for error in all_errors[:11]
+    ]
+
+
+def test_invalid_config():
+    """
+    Test out of range thresholds and limits are rejected
+    """
+    config = {
+        "FilePath": "tests/test_duplicate/test1.py",
+        "min": "2",
+        "ignore": ["None"],
+        "one_error_per_line": "0",
+    }
+    tool = DuplicateTool()
+    for invalid in [
+        {"similarity_threshold": 0},
+        {"similarity_threshold": 1.5},
+        {"similarity_threshold": -0.2},
+        {"min": "0"},
+        {"max_reports": 0},
+    ]:
+        with pytest.raises(ValueError):
+            tool.load_config(dict(config, **invalid))
+    tool.load_config(dict(config, similarity_threshold=1))
+    assert tool.similarity_threshold == 1.0
+
+
+def test_near_miss_does_not_depend_on_file_order():
+    """
+    Test three mutually similar blocks get their most similar match in every file order
+    """
+    with open("tests/test_duplicate/test7.py") as test7:
+        functions = test7.read().split("\n\n\n")
+    sources = {
+        "a.py": functions[0],
+        "b.py": functions[1],
+        "c.py": functions[0].replace(
+            "    if count == 0:", '    print("computed average")\n    if count == 0:'
+        ),
+    }
+
+    reports = []
+    for order in itertools.permutations(sources):
+        trees = [(File(name, sources[name]), ast.parse(sources[name])) for name in order]
+        near_duplicates = find_near_duplicates(trees, threshold=0.5, min_nodes=20)
+        reports.append(
+            sorted((unit.file.name, other.file.name) for unit, other, _ in near_duplicates)
+        )
+
+    assert reports == [[("a.py", "c.py"), ("b.py", "a.py"), ("c.py", "a.py")]] * 6
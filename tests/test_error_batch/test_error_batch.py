@@ -0,0 +1,160 @@
+import gc
+import pytest
+import tracemalloc
+from typing import Any, Callable, Iterator, List
+from cam2_code_review_bot.static_analysis import (
+    StaticTool,
+    StaticError,
+    StaticAnalyzer,
+    ErrorBatch,
+)
+
+
+def make_errors() -> List[StaticError]:
+    return [
+        StaticError(
+            file_path="a.py",
+            line_no=3,
+            code="x = 1",
+            error_id=7,
+            error_name="Vulture Error",
+            error_description="unused variable 'x'",
+            tool_name="vulture",
+            is_false_positive=True,
+            pull_request=12,
+            commit_hash="abc",
+        ),
+        StaticError(file_path="b.py", line_no=10, error_name="MyPy Error", tool_name="mypy"),
+        StaticError(file_path="a.py", line_no=20, error_name="MyPy Error", tool_name="mypy"),
+    ]
+
+
+class ListTool(StaticTool):
+    """Mocks a tool that reports a fixed list of errors"""
+
+    def __init__(self):
+        super(ListTool, self).__init__("list-tool")
+
+    def load_config(self, config) -> None:
+        pass
+
+    def run(self) -> List[StaticError]:
+        return make_errors()
+
+
+def test_round_trip():
+    errors = make_errors()
+    batch = ErrorBatch(errors)
+
+    assert len(batch) == 3
+    assert [error.to_dict() for error in batch] == [error.to_dict() for error in errors]
+    assert batch[0].to_dict() == errors[0].to_dict()
+    assert batch[-1].to_dict() == errors[-1].to_dict()
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_rows_and_columns():
+    batch = ErrorBatch(make_errors())
+
+    assert list(batch.rows("file_path", "line_no")) == [("a.py", 3), ("b.py", 10), ("a.py", 20)]
+    assert list(batch.column("is_false_positive")) == [True, False, False]
+    with pytest.raises(ValueError):
+        batch.column("not_a_field")
+
+
+def test_filter():
+    batch = ErrorBatch(make_errors())
+
+    assert [e.line_no for e in batch.filter(file_path="a.py")] == [3, 20]
+    assert [e.line_no for e in batch.filter(tool_name="mypy", min_line=15)] == [20]
+    assert [e.line_no for e in batch.filter(max_line=10)] == [3, 10]
+    assert len(batch.filter(file_path="missing.py")) == 0
+
+
+def test_group_by_file():
+    groups = ErrorBatch(make_errors()).group_by_file()
+
+    assert list(groups) == ["a.py", "b.py"]
+    assert [e.line_no for e in groups["a.py"]] == [3, 20]
+    assert groups["a.py"][0].commit_hash == "abc"
+
+
+def parsed_errors(count: int) -> Iterator[StaticError]:
+    """Errors as a tool creates them from its output, the parsed strings are new objects"""
+    for index in range(count):
+        line: str = "src/module_%d.py:%d: error: Name 'value_%d' is not defined" % (
+            index % 50,
+            index,
+            index,
+        )
+        file_path, line_no, _, description = line.split(":", 3)
+        yield StaticError(
+            file_path=file_path,
+            line_no=int(line_no),
+            code="    result = value_%d + 1" % index,
+            error_name="MyPy Error",
+            error_description=description.strip(),
+            tool_name="mypy",
+            commit_hash="0123456789abcdef0123456789abcdef01234567",
+        )
+
+
+def allocated(create: Callable[[], Any]) -> int:
+    """The bytes still allocated by the object `create` returns"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept: Any = create()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def test_batch_memory():
+    """Only repeated strings are interned, the batch takes clearly less memory than the list"""
+    list_size: int = allocated(lambda: list(parsed_errors(20000)))
+    batch_size: int = allocated(lambda: ErrorBatch(parsed_errors(20000)))
+
+    assert batch_size * 1.5 < list_size
+
+
+def test_static_error_has_no_dict():
+    assert not hasattr(StaticError(), "__dict__")
+
+
+def test_analyzer_batch():
+    analyzer = StaticAnalyzer()
+    analyzer.add_tool(ListTool())
+
+    batch = analyzer.run_raw(batch=True)
+    assert isinstance(batch, ErrorBatch)
+    assert [e.to_dict() for e in batch] == [e.to_dict() for e in analyzer.run_raw()]
+    assert StaticAnalyzer.format_md(batch) == StaticAnalyzer.format_md(make_errors())
+    assert analyzer.run_md() == StaticAnalyzer.format_md(make_errors())
+
+
+def test_missing_line_no():
+    errors = make_errors() + [
+        StaticError(file_path="c.py", line_no=None, error_name="Prospector Error"),
+        StaticError(file_path="c.py", line_no="12", error_id=None, tool_name="prospector"),
+    ]
+    batch = ErrorBatch(errors)
+
+    assert [error.to_dict() for error in batch] == [error.to_dict() for error in errors]
+    assert batch[3].line_no is None
+    assert batch[4].error_id is None
+    assert list(batch.column("line_no")) == [3, 10, 20, None, "12"]
+    assert [e.line_no for e in batch.filter(min_line=1)] == [3, 10, 20]
+    assert [e.line_no for e in batch.filter(file_path="c.py")] == [None, "12"]
+
+    class MissingLineTool(ListTool):
+        def run(self) -> List[StaticError]:
+            return errors
+
+    analyzer = StaticAnalyzer()
+    analyzer.add_tool(MissingLineTool())
+    assert analyzer.run_md() == StaticAnalyzer.format_md(errors)
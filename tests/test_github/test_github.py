@@ -0,0 +1,63 @@
+import asyncio
+from aiohttp import web
+from typing import Any, Dict
+from cam2_code_review_bot.utils import Github
+
+
+class FakeGitHubAPI:
+    """Answers `getitem` with the metadata of two files served by a local server
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    async def getitem(self, url: str) -> Any:
+        if url.endswith("/files"):
+            return [{"contents_url": "a.py"}, {"contents_url": "b.py"}]
+        return {"name": url, "download_url": self.base_url + "/raw/" + url}
+
+
+async def serve_files(scenario) -> Any:
+    connections = set()
+
+    async def raw(request: web.Request) -> web.Response:
+        connections.add(request.transport.get_extra_info("peername"))
+        return web.Response(text="# " + request.match_info["name"])
+
+    application = web.Application()
+    application.router.add_get("/raw/{name}", raw)
+    runner = web.AppRunner(application)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port: int = site._server.sockets[0].getsockname()[1]
+    try:
+        return await scenario("http://127.0.0.1:%d" % port, connections)
+    finally:
+        await runner.cleanup()
+
+
+def test_shared_session(tmp_path):
+    """Files are downloaded through the shared session and its connections are reused
+    """
+
+    async def scenario(base_url: str, connections) -> Dict[str, Any]:
+        async with Github.create_session(limit_per_host=1) as session:
+            assert session.connector.limit_per_host == 1
+            Github.initialize(FakeGitHubAPI(base_url), session)
+            contents = await Github.get_pull_request_files_rawdata("/repos/o/r/pulls/1")
+            file_list = await Github.save_pull_request_files_to_dir(
+                "/repos/o/r/pulls/1", str(tmp_path)
+            )
+            for _ in range(3):
+                await Github.download(base_url + "/raw/c.py")
+        return {"contents": contents, "file_list": file_list, "connections": len(connections)}
+
+    result: Dict[str, Any] = asyncio.run(serve_files(scenario))
+    Github.initialize(None)
+
+    assert list(result["contents"]) == ["# a.py", "# b.py"]
+    assert result["file_list"] == ["a.py", "b.py"]
+    assert (tmp_path / "b.py").read_text() == "# b.py"
+    # every request went through the one kept alive connection
+    assert result["connections"] == 1
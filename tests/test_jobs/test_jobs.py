@@ -0,0 +1,287 @@
+import os
+import sys
+import time
+import pytest
+from typing import Any, Dict, List
+from cam2_code_review_bot.jobs import (
+    Job,
+    JobQueue,
+    WorkerPool,
+    register_handler,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    FAILED,
+    LOST,
+)
+from cam2_code_review_bot.static_analysis import run_process
+from cam2_code_review_bot.utils import metrics
+
+
+async def write_marker(payload: Dict[str, Any]) -> None:
+    with open(payload["path"], "w") as marker:
+        marker.write(payload["text"])
+    metrics.GITHUB_SECONDS.observe(0.1, method="GET", route="/marker", status="200")
+
+
+async def always_fail(payload: Dict[str, Any]) -> None:
+    raise RuntimeError("this job always fails")
+
+
+register_handler("test-write-marker", write_marker)
+register_handler("test-always-fail", always_fail)
+
+
+def test_enqueue_claim_complete(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id: int = job_queue.enqueue("test-write-marker", "owner/repo", {"text": "hello"})
+
+    job: Job = job_queue.claim()
+    assert job.job_id == job_id
+    assert job.payload == {"text": "hello"}
+    assert job.status == RUNNING
+    assert job.attempts == 1
+    assert job_queue.claim() is None
+
+    job_queue.complete(job_id)
+    assert job_queue.get(job_id).status == SUCCEEDED
+    assert job_queue.counts() == {QUEUED: 0, RUNNING: 0, SUCCEEDED: 1, FAILED: 0}
+
+
+def test_retries_until_failed(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"), retry_delay=0.0)
+    job_id: int = job_queue.enqueue("test-always-fail", "owner/repo", {}, max_attempts=2)
+
+    assert job_queue.fail(job_queue.claim().job_id, "first failure")
+    assert job_queue.get(job_id).status == QUEUED
+    assert not job_queue.fail(job_queue.claim().job_id, "second failure")
+
+    job: Job = job_queue.get(job_id)
+    assert job.status == FAILED
+    assert job.attempts == 2
+    assert job.error == "second failure"
+
+
+def test_retry_delay(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"), retry_delay=60.0)
+    job_queue.enqueue("test-always-fail", "owner/repo", {})
+
+    job_queue.fail(job_queue.claim().job_id, "failure")
+    assert job_queue.claim() is None
+
+
+def test_repositories_are_served_fairly(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    for _ in range(3):
+        job_queue.enqueue("test-write-marker", "busy/repo", {})
+    job_queue.enqueue("test-write-marker", "quiet/repo", {})
+
+    # the quiet repository does not wait for all jobs of the busy one
+    assert [job_queue.claim().repo for _ in range(3)] == ["busy/repo", "quiet/repo", "busy/repo"]
+
+
+def test_requeue_stale(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id: int = job_queue.enqueue("test-write-marker", "owner/repo", {})
+    job_queue.claim()
+
+    assert job_queue.requeue_stale(3600.0) == 0
+    time.sleep(0.01)
+    assert job_queue.requeue_stale(0.0) == 1
+    assert job_queue.get(job_id).status == QUEUED
+
+
+def test_attempts_are_recorded(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"), retry_delay=0.0)
+    job_id: int = job_queue.enqueue("test-write-marker", "owner/repo", {"command": "lint"})
+
+    job_queue.fail(job_queue.claim("a").job_id, "failure", "a")
+    job_queue.claim("b")
+    job_queue.requeue_lost(["a"])
+    job_queue.claim("c")
+    assert not job_queue.complete(job_id, "b")
+    assert job_queue.complete(job_id, "c", {"github": [["GET", 1]]})
+
+    attempts = job_queue.attempts()
+    assert [(job.job_id, outcome) for _, job, outcome, _, _ in attempts] == [
+        (job_id, FAILED),
+        (job_id, LOST),
+        (job_id, SUCCEEDED),
+    ]
+    assert attempts[0][1].payload == {"command": "lint"}
+    assert all(seconds >= 0.0 for _, _, _, seconds, _ in attempts)
+    assert [metrics for _, _, _, _, metrics in attempts] == [{}, {}, {"github": [["GET", 1]]}]
+
+    # attempts are kept for every reader until they are pruned
+    attempt_ids: List[int] = [attempt[0] for attempt in attempts]
+    assert job_queue.last_attempt() == attempt_ids[-1]
+    assert [attempt[0] for attempt in job_queue.attempts(attempt_ids[0])] == attempt_ids[1:]
+    assert [attempt[0] for attempt in job_queue.attempts()] == attempt_ids
+    assert job_queue.prune_attempts(3600.0) == 0
+    assert job_queue.prune_attempts(0.0) == 3
+    assert job_queue.attempts() == [] and job_queue.last_attempt() == 0
+
+
+def test_worker_pool_runs_jobs(tmp_path):
+    worker_pool: WorkerPool = WorkerPool(
+        str(tmp_path / "jobs.sqlite"), processes=2, poll_interval=0.05
+    )
+    job_queue: JobQueue = worker_pool.job_queue
+    job_ids = [
+        job_queue.enqueue(
+            "test-write-marker", "owner/repo", {"path": str(tmp_path / str(i)), "text": str(i)}
+        )
+        for i in range(4)
+    ]
+    failing_id: int = job_queue.enqueue("test-always-fail", "owner/repo", {}, max_attempts=1)
+
+    worker_pool.start()
+    try:
+        deadline: float = time.time() + 30
+        while job_queue.counts()[QUEUED] + job_queue.counts()[RUNNING] and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        worker_pool.stop(timeout=5)
+
+    assert [job_queue.get(job_id).status for job_id in job_ids] == [SUCCEEDED] * 4
+    assert [(tmp_path / str(i)).read_text() for i in range(4)] == ["0", "1", "2", "3"]
+    assert job_queue.get(failing_id).status == FAILED
+    assert "this job always fails" in job_queue.get(failing_id).error
+    # every attempt has the calls of its own job
+    for _, job, _, _, worker_metrics in job_queue.attempts():
+        if job.job_id in job_ids:
+            [(_, counts, _)] = worker_metrics[metrics.GITHUB_SECONDS.name]
+            assert sum(counts) == 1
+
+
+async def sleep_forever(payload: Dict[str, Any]) -> None:
+    with open(payload["path"], "w") as marker:
+        marker.write(str(os.getpid()))
+    time.sleep(3600)
+
+
+register_handler("test-sleep-forever", sleep_forever)
+
+
+async def run_tool_forever(payload: Dict[str, Any]) -> None:
+    # the tool writes its process id and starts a process of its own, both run for an hour
+    run_process(
+        [
+            sys.executable,
+            "-c",
+            "import os, subprocess, sys, time; "
+            "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(3600)']); "
+            "open(%r, 'w').write('%%d %%d' %% (os.getpid(), child.pid)); time.sleep(3600)"
+            % payload["path"],
+        ]
+    )
+
+
+register_handler("test-run-tool-forever", run_tool_forever)
+
+
+def is_running(pid: int) -> bool:
+    try:
+        with open("/proc/%d/stat" % pid) as stat:
+            # a killed process that was not reaped yet is a zombie
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_only_the_owner_finishes_a_job(tmp_path):
+    job_queue: JobQueue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id: int = job_queue.enqueue("test-write-marker", "owner/repo", {})
+    assert job_queue.claim("worker-1").worker == "worker-1"
+
+    # the job of a lost worker is queued again and claimed by another worker
+    assert job_queue.requeue_lost(["worker-2"]) == 1
+    assert job_queue.claim("worker-2").job_id == job_id
+
+    # the lost worker can not overwrite the state of the new attempt
+    assert not job_queue.complete(job_id, "worker-1")
+    assert not job_queue.fail(job_id, "late failure", "worker-1")
+    assert job_queue.get(job_id).status == RUNNING
+    assert job_queue.requeue_lost(["worker-2"]) == 0
+
+    assert job_queue.complete(job_id, "worker-2")
+    assert job_queue.get(job_id).status == SUCCEEDED
+
+
+def test_jobs_of_dead_workers_are_requeued(tmp_path):
+    worker_pool: WorkerPool = WorkerPool(
+        str(tmp_path / "jobs.sqlite"), processes=1, poll_interval=0.05
+    )
+    job_queue: JobQueue = worker_pool.job_queue
+    job_id: int = job_queue.enqueue(
+        "test-sleep-forever", "owner/repo", {"path": str(tmp_path / "pid")}, max_attempts=1
+    )
+
+    worker_pool.start()
+    try:
+        deadline: float = time.time() + 30
+        while not (tmp_path / "pid").exists() and time.time() < deadline:
+            time.sleep(0.05)
+        worker_pool.workers[0].kill()
+        worker_pool.workers[0].join()
+
+        # the job is not left running until the job timeout
+        worker_pool.supervise()
+        assert job_queue.get(job_id).status == FAILED
+        assert worker_pool.workers[0].is_alive()
+    finally:
+        worker_pool.stop(timeout=5)
+
+
+def test_overdue_workers_are_replaced(tmp_path):
+    worker_pool: WorkerPool = WorkerPool(
+        str(tmp_path / "jobs.sqlite"), processes=1, poll_interval=0.05, job_timeout=0.2
+    )
+    job_queue: JobQueue = worker_pool.job_queue
+    job_id: int = job_queue.enqueue(
+        "test-sleep-forever", "owner/repo", {"path": str(tmp_path / "pid")}, max_attempts=1
+    )
+
+    worker_pool.start()
+    try:
+        deadline: float = time.time() + 30
+        while not (tmp_path / "pid").exists() and time.time() < deadline:
+            time.sleep(0.05)
+        first_worker = worker_pool.workers[0]
+        time.sleep(0.3)
+
+        # the worker is stopped before its job is queued again, so the job never runs twice
+        worker_pool.supervise()
+        assert not first_worker.is_alive()
+        assert worker_pool.workers[0] is not first_worker
+        assert job_queue.get(job_id).status == FAILED
+    finally:
+        worker_pool.stop(timeout=5)
+
+
+def test_tools_of_overdue_workers_are_killed(tmp_path):
+    """The processes started by a terminated worker do not outlive it"""
+    worker_pool: WorkerPool = WorkerPool(
+        str(tmp_path / "jobs.sqlite"), processes=1, poll_interval=0.05, job_timeout=0.2
+    )
+    job_queue: JobQueue = worker_pool.job_queue
+    job_queue.enqueue(
+        "test-run-tool-forever", "owner/repo", {"path": str(tmp_path / "pids")}, max_attempts=1
+    )
+
+    worker_pool.start()
+    try:
+        deadline: float = time.time() + 30
+        while not (tmp_path / "pids").exists() and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+        pids: List[int] = [int(pid) for pid in (tmp_path / "pids").read_text().split()]
+        assert all(is_running(pid) for pid in pids)
+
+        worker_pool.supervise()
+        deadline = time.time() + 5
+        while any(is_running(pid) for pid in pids) and time.time() < deadline:
+            time.sleep(0.05)
+        assert not any(is_running(pid) for pid in pids)
+    finally:
+        worker_pool.stop(timeout=5)
@@ -0,0 +1,117 @@
+import boto3
+import json
+import pytest
+from botocore.stub import Stubber
+from cam2_code_review_bot.utils import Counter, Gauge, Histogram, MetricsRegistry, metrics
+
+
+def test_render():
+    """Counters, gauges and histograms are rendered in the Prometheus text format
+    """
+
+    registry: MetricsRegistry = MetricsRegistry()
+    deliveries: Counter = Counter("deliveries_total", "Deliveries", ("result",), registry=registry)
+    jobs: Gauge = Gauge("jobs", "Jobs", ("status",), registry=registry)
+    seconds: Histogram = Histogram(
+        "command_seconds", "Commands", ("command",), buckets=(0.1, 1.0), registry=registry
+    )
+
+    deliveries.inc(result="handled")
+    deliveries.inc(2, result='dup"licate')
+    jobs.set(3, status="queued")
+    for value in (0.05, 0.1, 0.5, 7.0):
+        seconds.observe(value, command="lint")
+
+    assert registry.render() == (
+        "# HELP deliveries_total Deliveries\n"
+        "# TYPE deliveries_total counter\n"
+        'deliveries_total{result="handled"} 1\n'
+        'deliveries_total{result="dup\\"licate"} 2\n'
+        "# HELP jobs Jobs\n"
+        "# TYPE jobs gauge\n"
+        'jobs{status="queued"} 3\n'
+        "# HELP command_seconds Commands\n"
+        "# TYPE command_seconds histogram\n"
+        'command_seconds_bucket{command="lint",le="0.1"} 2\n'
+        'command_seconds_bucket{command="lint",le="1.0"} 3\n'
+        'command_seconds_bucket{command="lint",le="+Inf"} 4\n'
+        'command_seconds_sum{command="lint"} 7.65\n'
+        'command_seconds_count{command="lint"} 4\n'
+    )
+
+    with pytest.raises(ValueError):
+        deliveries.inc(result="handled", extra="label")
+    with pytest.raises(ValueError):
+        Counter("deliveries_total", "Deliveries", registry=registry)
+
+
+def test_timer_outcome():
+    """The outcome of a timed block is set inside it, or to "error" if it raises"""
+
+    seconds: Histogram = Histogram("seconds", "Seconds", ("command", "outcome"), registry=None)
+    with seconds.time(command="lint") as labels:
+        labels["outcome"] = "succeeded"
+    with pytest.raises(RuntimeError):
+        with seconds.time(command="lint"):
+            raise RuntimeError("the command failed")
+
+    assert seconds.count(command="lint", outcome="succeeded") == 1
+    assert seconds.count(command="lint", outcome="error") == 1
+
+
+def test_drain_and_merge():
+    """The series drained from a histogram of a worker are added to the one of the webhook"""
+
+    worker: Histogram = Histogram("seconds", "Seconds", ("route",), (0.1, 1.0), registry=None)
+    webhook: Histogram = Histogram("seconds", "Seconds", ("route",), (0.1, 1.0), registry=None)
+    webhook.observe(0.05, route="/a")
+    worker.observe(0.5, route="/a")
+    worker.observe(5.0, route="/b")
+
+    drained = worker.drain()
+    webhook.merge(json.loads(json.dumps(drained)))
+
+    assert worker.drain() == [] and worker.count(route="/a") == 0
+    assert webhook.count(route="/a") == 2 and webhook.count(route="/b") == 1
+    assert 'seconds_bucket{route="/a",le="0.1"} 1' in webhook.render()
+    assert 'seconds_sum{route="/a"} 0.55' in webhook.render()
+    with pytest.raises(ValueError):
+        Histogram("seconds", "Seconds", ("route",), (1.0,), registry=None).merge(drained)
+
+
+def test_route_template():
+    """Owners, repositories, numbers and user names are not part of the routes
+    """
+
+    assert (
+        metrics.route_template("https://api.github.com/repos/owner/repo/issues/12/comments")
+        == "/repos/{owner}/{repo}/issues/{number}/comments"
+    )
+    assert (
+        metrics.route_template("/repos/owner/repo/collaborators/someone/permission")
+        == "/repos/{owner}/{repo}/collaborators/{username}/permission"
+    )
+    assert (
+        metrics.route_template("/repos/owner/repo/contents/src/main.py?ref=abc")
+        == "/repos/{owner}/{repo}/contents/{path}"
+    )
+
+
+def test_measure_dynamodb():
+    """Every DynamoDB operation is recorded by table, operation and outcome
+    """
+
+    dynamodb = boto3.Session(
+        aws_access_key_id="key", aws_secret_access_key="secret", region_name="us-east-1"
+    ).resource("dynamodb")
+    metrics.measure_dynamodb(dynamodb)
+    before: int = metrics.DYNAMODB_SECONDS.count(table="Tests", operation="GetItem", outcome="ok")
+
+    with Stubber(dynamodb.meta.client) as stubber:
+        stubber.add_response("get_item", {"Item": {"Name": {"S": "test"}}})
+        dynamodb.Table("Tests").get_item(Key={"Name": "test"})
+
+    assert (
+        metrics.DYNAMODB_SECONDS.count(table="Tests", operation="GetItem", outcome="ok")
+        == before + 1
+    )
@@ -19,3 +19,48 @@ def test_mypy():
     fp.close()
 
     assert output == expected
+
+
+def test_mypy_daemon(tmp_path):
+    """Runs mypy through the daemon twice, both runs must match a regular mypy run
+    """
+
+    config = {"file_path": "tests/test_mypy/input_01.py"}
+    tool: MyPyTool = MyPyTool()
+    tool.load_config(config)
+    expected = [error.to_dict() for error in tool.run()]
+
+    tool.load_config(dict(config, daemon=True, cache_dir=str(tmp_path / "mypy_cache")))
+    try:
+        first = [error.to_dict() for error in tool.run()]
+        second = [error.to_dict() for error in tool.run()]
+    finally:
+        tool.stop_daemon()
+
+    assert first == expected and second == expected
+
+
+def test_mypy_daemon_runs_in_root(tmp_path, monkeypatch):
+    """The daemon of a checkout is run inside it and exits after its idle timeout
+    """
+    repository = tmp_path / "repository"
+    repository.mkdir()
+    (repository / "module.py").write_text("x: int = 'text'\n")
+    monkeypatch.chdir(tmp_path)
+    tool: MyPyTool = MyPyTool()
+    tool.load_config(
+        {
+            "file_path": "repository/module.py",
+            "daemon": True,
+            "root": "repository",
+            "daemon_idle_timeout": 60,
+        }
+    )
+    try:
+        errors = tool.run()
+        assert (repository / ".mypy_cache" / "dmypy.json").exists()
+    finally:
+        tool.stop_daemon()
+
+    assert [(error.file_path, error.line_no) for error in errors] == [("repository/module.py", 1)]
+    assert "repository/mypy.ini" in tool.dependency_files()
@@ -0,0 +1,15 @@
+def work(size):
+    total = 0
+    for i in range(size):
+        total += i * i
+    return total
+
+
+def unchanged():
+    return sorted(range(100))
+
+
+for _ in range(10):
+    work(100000)
+    work(100000)
+    unchanged()
@@ -0,0 +1,11 @@
+def rarely_called():
+    return [called_often(i) for i in range(10)]
+
+
+def called_often(value):
+    print("  1000    0.001    0.000    0.002    0.000 fake.py:1(fake)")
+    return value * 2
+
+
+for _ in range(50):
+    rarely_called()
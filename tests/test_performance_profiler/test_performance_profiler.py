@@ -1,3 +1,4 @@
+import json
 import pytest
 from cam2_code_review_bot.static_analysis import PerformanceProfilerTool, StaticAnalyzer
 
@@ -32,3 +33,48 @@ def test_performance_profiler_number_of_calls():
     fp.close()
 
     assert output == expected
+
+
+def test_performance_profiler_sort_top_n():
+    analyzer: StaticAnalyzer = StaticAnalyzer()
+    analyzer.add_tool(PerformanceProfilerTool())
+    analyzer.configure_tool_from_file(
+        "performance-profiler", "tests/test_performance_profiler/config_03.json"
+    )
+
+    output: str = analyzer.run_md()
+
+    fp = open("tests/test_performance_profiler/expected_03.txt", "r")
+    expected: str = "".join(fp.readlines())
+    fp.close()
+
+    assert output == expected
+
+
+def test_performance_profiler_invalid_sort():
+    tool: PerformanceProfilerTool = PerformanceProfilerTool()
+
+    with pytest.raises(ValueError):
+        tool.load_config(
+            {
+                "file_path": "tests/test_performance_profiler/input_03.py",
+                "number_of_calls_thresh": 10,
+                "sort": "not-a-sort-key",
+            }
+        )
+
+
+def test_performance_profiler_regression():
+    tool: PerformanceProfilerTool = PerformanceProfilerTool()
+    fp = open("tests/test_performance_profiler/config_04.json", "r")
+    tool.load_config(json.load(fp))
+    fp.close()
+
+    errors = tool.run()
+
+    assert [(error.error_name, error.code, error.line_no) for error in errors] == [
+        ("number of calls regression", "work", 1),
+        ("execution time regression", "work", 1),
+    ]
+    assert errors[0].file_path == "tests/test_performance_profiler/head_04/input_04.py"
+    assert errors[0].error_description == "median number of calls grew from 10 to 20 (+10)"
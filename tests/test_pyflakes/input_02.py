@@ -0,0 +1,6 @@
+def first(values):
+    # type: (List[int]) -> int
+    return values[0]
+
+
+total = 0  # type: Number
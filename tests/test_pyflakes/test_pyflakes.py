@@ -19,3 +19,51 @@ def test_pyflakes():
     fp.close()
 
     assert type(output) is str and output == expected
+
+
+def test_pyflakes_subprocess():
+    """Runs pyflakes in a subprocess, the report must match the in-process one
+    """
+
+    static_analyzer: StaticAnalyzer = StaticAnalyzer()
+    static_analyzer.add_tool(PyflakesTool())
+    static_analyzer.configure_tool_from_file("pyflakes", "tests/test_pyflakes/config_02.json")
+    output: str = static_analyzer.run_md()
+
+    fp = open("tests/test_pyflakes/expected_01.txt", "r")
+    expected: str = "".join(fp.readlines())
+    fp.close()
+
+    assert type(output) is str and output == expected
+
+
+def test_pyflakes_many_files():
+    """Checks several files in one call, errors are tagged with the file they were found in
+    """
+
+    tool: PyflakesTool = PyflakesTool()
+    tool.load_config({"file_path": "tests/test_pyflakes/input_01.py"})
+    errors = tool.check_files(["tests/test_pyflakes/input_01.py", "tests/test_mypy/input_01.py"])
+
+    assert {error.file_path for error in errors} <= {
+        "tests/test_pyflakes/input_01.py",
+        "tests/test_mypy/input_01.py",
+    }
+    assert [error.line_no for error in errors[:3]] == [1, 5, 8]
+
+
+def test_pyflakes_type_comments():
+    """Names used in type comments are checked in-process, as by the pyflakes command
+    """
+
+    tool: PyflakesTool = PyflakesTool()
+    tool.load_config({"file_path": "tests/test_pyflakes/input_02.py"})
+    in_process = [error.to_dict() for error in tool.run()]
+    tool.load_config({"file_path": "tests/test_pyflakes/input_02.py", "in_process": False})
+    subprocess = [error.to_dict() for error in tool.run()]
+
+    assert [error["error_description"] for error in in_process] == [
+        "undefined name 'List'",
+        "undefined name 'Number'",
+    ]
+    assert in_process == subprocess
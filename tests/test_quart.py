@@ -1,5 +1,11 @@
+import asyncio
 import pytest
+from quart import Quart
+from typing import Any, Dict, List
 from entry import app
+from cam2_code_review_bot.cam2_code_review_bot import record_job_attempts
+import cam2_code_review_bot.jobs as jobs
+import cam2_code_review_bot.utils as utils
 
 """Tests Quart routes and ensure they are processing input correctly.
 """
@@ -18,3 +24,142 @@ async def test_index(app):
     resp = await test_client.get("/")
 
     assert resp.status_code == 200
+
+
+def webhook_app(tmp_path) -> Quart:
+    """Sets up the state of the bot that the webhook needs, without GitHub or DynamoDB
+
+    Must be called in the event loop the app is tested in.
+    """
+    app.bot_name = "@optimus"
+    app.job_queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite"))
+    app.task_scheduler = utils.TaskScheduler(2)
+    app.deliveries = utils.TTLCache(max_entries=100, ttl=3600.0)
+    app.coalesced = utils.TTLCache(max_entries=100, ttl=10.0)
+    app.head_shas = utils.TTLCache(max_entries=100, ttl=3600.0)
+    app.webhook_lock = asyncio.Lock()
+    app.attempt_cursor = app.job_queue.last_attempt()
+    return app
+
+
+def comment_payload(body: str) -> Dict[str, Any]:
+    return {
+        "action": "created",
+        "issue": {"url": "https://api.github.com/repos/o/r/issues/1"},
+        "comment": {"body": body, "url": "https://api.github.com/repos/o/r/issues/comments/2"},
+        "repository": {"full_name": "o/r"},
+    }
+
+
+def push_payload(sha: str) -> Dict[str, Any]:
+    return {
+        "action": "synchronize",
+        "pull_request": {"url": "https://api.github.com/repos/o/r/pulls/1", "head": {"sha": sha}},
+    }
+
+
+def test_duplicate_delivery(tmp_path):
+    """A delivery sent again with the same X-GitHub-Delivery id is not handled twice
+    """
+
+    async def deliver_twice() -> List[Any]:
+        test_client = webhook_app(tmp_path).test_client()
+        headers: Dict[str, str] = {"X-GitHub-Delivery": "delivery-1"}
+        payload: Dict[str, Any] = comment_payload("@optimus lint code of language python")
+        first = await test_client.post("/webhook", json=payload, headers=headers)
+        second = await test_client.post("/webhook", json=payload, headers=headers)
+        statuses: List[Any] = [first.status_code, second.status_code]
+        return statuses + [await first.get_json(), await second.get_json()]
+
+    first_status, second_status, first, second = asyncio.run(deliver_twice())
+
+    assert first_status == 202 and "job_id" in first
+    assert second_status == 200 and second["duplicate"]
+    assert app.job_queue.counts().get("queued") == 1
+
+
+def test_concurrent_deliveries(tmp_path):
+    """Deliveries arriving while a job is queued do not start the same command twice
+    """
+
+    async def deliver_at_once() -> List[Dict[str, Any]]:
+        test_client = webhook_app(tmp_path).test_client()
+        payload: Dict[str, Any] = comment_payload("@optimus lint code of language python")
+        responses = await asyncio.gather(
+            *(
+                test_client.post("/webhook", json=payload, headers={"X-GitHub-Delivery": delivery})
+                for delivery in ["1", "1", "2"]
+            )
+        )
+        return [await response.get_json() for response in responses]
+
+    bodies: List[Dict[str, Any]] = asyncio.run(deliver_at_once())
+
+    assert sum(1 for body in bodies if body.get("duplicate")) == 1
+    assert sum(1 for body in bodies if body.get("coalesced")) == 1
+    assert app.job_queue.counts().get("queued") == 1
+
+
+def test_repeated_lint(tmp_path):
+    """A lint asked for again is coalesced, unless the pull request was pushed to in between
+    """
+
+    async def lint_three_times() -> List[Dict[str, Any]]:
+        test_client = webhook_app(tmp_path).test_client()
+        payload: Dict[str, Any] = comment_payload("@optimus lint code of language python")
+        responses: List[Dict[str, Any]] = []
+        for delivery in ["1", "2", "push", "3"]:
+            headers: Dict[str, str] = {"X-GitHub-Delivery": delivery}
+            if delivery == "push":
+                await test_client.post("/webhook", json=push_payload("abc"), headers=headers)
+                continue
+            response = await test_client.post("/webhook", json=payload, headers=headers)
+            assert response.status_code == 202
+            responses.append(await response.get_json())
+        return responses
+
+    first, repeated, after_push = asyncio.run(lint_three_times())
+
+    assert not first.get("coalesced")
+    assert repeated["coalesced"] and repeated["job_id"] == first["job_id"]
+    assert not after_push.get("coalesced") and after_push["job_id"] != first["job_id"]
+    assert app.job_queue.counts().get("queued") == 2
+
+
+def test_metrics_of_queued_commands(tmp_path):
+    """The attempts finished by the workers and their calls to GitHub are reported by the webhook
+    """
+
+    async def get_metrics() -> List[str]:
+        test_client = webhook_app(tmp_path).test_client()
+        app.job_queue.enqueue("command", "o/r", {"command": "lint"})
+        # the metrics a worker recorded while running the job
+        worker_seconds: utils.Histogram = utils.Histogram(
+            "optimus_github_request_seconds", "", ("method", "route", "status"), registry=None
+        )
+        worker_seconds.observe(0.2, method="GET", route="/repos/{owner}/{repo}", status="200")
+        app.job_queue.complete(
+            app.job_queue.claim("worker").job_id,
+            "worker",
+            {worker_seconds.name: worker_seconds.drain()},
+        )
+        await record_job_attempts()
+        scrapes: List[str] = []
+        for _ in range(2):
+            response = await test_client.get("/metrics")
+            scrapes.append((await response.get_data()).decode())
+        await record_job_attempts()
+        return scrapes
+
+    scrapes: List[str] = asyncio.run(get_metrics())
+    for metrics in scrapes:
+        assert 'optimus_job_seconds_count{command="lint",outcome="succeeded"} 1' in metrics
+    assert utils.metrics.JOB_SECONDS.count(command="lint", outcome="succeeded") == 1
+    assert (
+        utils.metrics.GITHUB_SECONDS.count(
+            method="GET", route="/repos/{owner}/{repo}", status="200"
+        )
+        == 1
+    )
+    # the attempts stay in the queue for other readers
+    assert len(app.job_queue.attempts()) == 1
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from cam2_code_review_bot.static_analysis import (
+    PerformanceProfilerTool,
+    ProcessResult,
+    StaticError,
+    measure_processes,
+    run_process,
+    run_process_async,
+    set_max_processes,
+)
+
+
+def test_timeout_keeps_partial_output():
+    start: float = time.time()
+    result: ProcessResult = run_process(
+        [sys.executable, "-c", "import time; print('partial', flush=True); time.sleep(10)"],
+        timeout=0.5,
+    )
+
+    assert time.time() - start < 5
+    assert result.timed_out
+    assert result.stdout == b"partial\n"
+
+
+def test_timeout_of_process_left_running_by_the_process():
+    """A process started by the process that keeps the output open is killed after the timeout
+    """
+    start: float = time.time()
+    result: ProcessResult = run_process(
+        [
+            sys.executable,
+            "-c",
+            "import subprocess, sys; print('started', flush=True); "
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(10)'])",
+        ],
+        timeout=0.5,
+    )
+
+    assert time.time() - start < 5
+    assert result.timed_out and result.returncode == 0
+    assert result.stdout == b"started\n"
+
+
+def test_usage_of_each_process():
+    """The usage of every process is measured, including its exit code after it was reaped
+    """
+    with measure_processes() as usages:
+        busy: ProcessResult = run_process(
+            [
+                sys.executable,
+                "-c",
+                "import time\nend = time.process_time() + 0.3\n"
+                "while time.process_time() < end: pass",
+            ]
+        )
+        failed: ProcessResult = run_process([sys.executable, "-c", "raise SystemExit(2)"])
+
+    assert busy.returncode == 0 and failed.returncode == 2
+    assert len(usages) == 2
+    assert usages[0].ru_utime + usages[0].ru_stime >= 0.25
+
+
+def test_exit_code_and_output():
+    result: ProcessResult = run_process([sys.executable, "-c", "import sys; sys.exit(3)"])
+
+    assert not result.timed_out
+    assert result.returncode == 3
+    assert result.stdout == b""
+
+
+def test_run_process_in_threads():
+    """The blocking version works in threads and while an event loop is running
+    """
+
+    async def run_in_threads():
+        command = [sys.executable, "-c", "print('ok')"]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *[loop.run_in_executor(None, run_process, command) for _ in range(3)]
+        )
+        # called directly from the thread running the loop
+        results.append(run_process(command))
+        return results
+
+    results: List[ProcessResult] = asyncio.run(run_in_threads())
+    assert [result.stdout for result in results] == [b"ok\n"] * 4
+
+
+def test_concurrency_limit():
+    set_max_processes(1)
+    try:
+
+        async def run_two():
+            command = [sys.executable, "-c", "import time; time.sleep(0.5)"]
+            await asyncio.gather(run_process_async(command), run_process_async(command))
+
+        start: float = time.time()
+        asyncio.run(run_two())
+        assert time.time() - start >= 1.0
+    finally:
+        set_max_processes(os.cpu_count() or 1)
+
+
+def test_tools_leave_the_default_executor_free():
+    """Tools and processes waiting for a slot do not use the threads of the default executor
+    """
+    set_max_processes(1)
+    try:
+
+        async def run_tools():
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+            tools: List[PerformanceProfilerTool] = [PerformanceProfilerTool() for _ in range(2)]
+            for tool in tools:
+                tool.load_config_from_file("tests/test_runner/config_01.json")
+            command = [sys.executable, "-c", "import time; time.sleep(0.5)"]
+            runs = asyncio.gather(*[tool.run_async() for tool in tools], run_process_async(command))
+            # a blocking call, such as a DynamoDB request, still gets a thread right away
+            await asyncio.sleep(0.1)
+            start: float = time.time()
+            await asyncio.wait_for(loop.run_in_executor(None, time.sleep, 0), 1)
+            blocked: float = time.time() - start
+            await asyncio.wait_for(runs, 30)
+            return blocked
+
+        assert asyncio.run(run_tools()) < 0.5
+    finally:
+        set_max_processes(os.cpu_count() or 1)
+
+
+def test_tool_timeout():
+    tool: PerformanceProfilerTool = PerformanceProfilerTool()
+    tool.load_config_from_file("tests/test_runner/config_01.json")
+
+    errors: List[StaticError] = asyncio.run(tool.run_async())
+
+    assert [error.error_name for error in errors] == ["Timeout Error"]
+    assert errors[0].tool_name == "performance-profiler"
+
+
+def test_invalid_timeout():
+    with pytest.raises(ValueError):
+        PerformanceProfilerTool().load_config(
+            {
+                "file_path": "tests/test_runner/input_01.py",
+                "number_of_calls_thresh": 1,
+                "timeout": 0,
+            }
+        )
@@ -0,0 +1,90 @@
+import ast
+import pytest
+from cam2_code_review_bot.static_analysis import (
+    DuplicateTool,
+    PyflakesTool,
+    SourceCache,
+    SourceFile,
+    StaticAnalyzer,
+)
+from cam2_code_review_bot.static_analysis import source_cache as source_cache_module
+
+
+def test_lines_tree_and_tokens(tmp_path):
+    path = tmp_path / "source.py"
+    path.write_bytes(b"a = 1\r\nb = a\n")
+    source_file: SourceFile = SourceFile.read(str(path))
+
+    assert source_file.lines == ["a = 1\n", "b = a\n"]
+    assert isinstance(source_file.tree, ast.Module)
+    assert source_file.tree is source_file.tree
+    assert [token.string for token in source_file.tokens][1:4] == ["a", "=", "1"]
+
+
+def test_syntax_error_is_raised_on_every_access():
+    source_file: SourceFile = SourceFile("broken.py", b"def broken(:\n")
+
+    with pytest.raises(SyntaxError):
+        source_file.tree
+    with pytest.raises(SyntaxError):
+        source_file.tree
+
+
+def test_cache_is_keyed_by_content(tmp_path):
+    path = tmp_path / "source.py"
+    path.write_text("a = 1\n")
+    source_cache: SourceCache = SourceCache()
+
+    first: SourceFile = source_cache.get(str(path))
+    assert source_cache.get(str(path)) is first
+
+    path.write_text("a = 2\n")
+    changed: SourceFile = source_cache.get(str(path))
+    assert changed is not first
+    assert changed.lines == ["a = 2\n"]
+    assert (source_cache.hits, source_cache.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    source_cache: SourceCache = SourceCache(max_bytes=10)
+    source_cache.get("a.py", b"a = 1\n")
+    source_cache.get("b.py", b"b = 1\n")
+
+    assert len(source_cache) == 1
+    assert source_cache.size == 6
+
+    with pytest.raises(ValueError):
+        SourceCache(max_bytes=0)
+
+
+def test_analyzer_parses_each_file_once(tmp_path, monkeypatch):
+    file_paths = []
+    for name in ("first.py", "second.py"):
+        path = tmp_path / name
+        path.write_text("import os\n\nfor i in range(3):\n    print(i * 2)\n")
+        file_paths.append(str(path))
+
+    parsed = []
+    parse = ast.parse
+
+    def counting_parse(source, *args, **kwargs):
+        parsed.append(kwargs.get("filename"))
+        return parse(source, *args, **kwargs)
+
+    monkeypatch.setattr(source_cache_module.ast, "parse", counting_parse)
+
+    sa: StaticAnalyzer = StaticAnalyzer()
+    sa.add_tool(DuplicateTool())
+    sa.add_tool(PyflakesTool())
+    sa.configure_tool(
+        "duplicate", {"FilePaths": file_paths, "ignore": [], "min": 2, "one_error_per_line": 1}
+    )
+    sa.configure_tool("pyflakes", {"file_paths": file_paths})
+
+    errors = sa.run_raw()
+
+    assert sorted(parsed) == sorted(file_paths)
+    assert {error.error_name for error in errors} == {"Duplicate code", "Pyflakes Error"}
+    # the files of a run are released when it ends, the next run parses them again
+    sa.run_raw()
+    assert len(parsed) == 4
@@ -0,0 +1,37 @@
+import os
+import signal
+import sys
+import threading
+import time
+from supervisor import supervise
+
+
+def test_stops_when_one_process_exits():
+    """The other processes are stopped as soon as one exits, with its exit code
+    """
+    start: float = time.monotonic()
+
+    code: int = supervise(
+        [
+            [sys.executable, "-c", "import time; time.sleep(0.2); raise SystemExit(3)"],
+            [sys.executable, "-c", "import time; time.sleep(60)"],
+        ]
+    )
+
+    assert code == 3
+    assert time.monotonic() - start < 30
+
+
+def test_forwards_sigterm():
+    """A SIGTERM sent to the supervisor stops every process
+    """
+    threading.Timer(0.2, os.kill, (os.getpid(), signal.SIGTERM)).start()
+
+    code: int = supervise(
+        [
+            [sys.executable, "-c", "import time; time.sleep(60)"],
+            [sys.executable, "-c", "import time; time.sleep(60)"],
+        ]
+    )
+
+    assert code == 128 + signal.SIGTERM
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from typing import List
+from cam2_code_review_bot.utils.task_scheduler import (
+    TaskScheduler,
+    CANCELLED,
+    FAILED,
+    PENDING,
+    RUNNING,
+    SUCCEEDED,
+)
+
+
+def test_bounded_concurrency():
+    """At most max_concurrency tasks run at the same time, in the order they were submitted
+    """
+
+    async def scenario():
+        task_scheduler: TaskScheduler = TaskScheduler(max_concurrency=2)
+        running: List[int] = []
+        started: List[int] = []
+        peak: List[int] = [0]
+
+        async def work(number: int) -> int:
+            started.append(number)
+            running.append(number)
+            peak[0] = max(peak[0], len(running))
+            await asyncio.sleep(0.01)
+            running.remove(number)
+            return number * 2
+
+        task_ids: List[int] = [task_scheduler.submit("work", work, i) for i in range(6)]
+        assert [task_scheduler.get(task_id).status for task_id in task_ids] == [PENDING] * 6
+        await asyncio.sleep(0)
+        assert task_scheduler.counts()[RUNNING] == 2
+
+        await task_scheduler.join()
+        assert peak[0] == 2
+        assert started == list(range(6))
+        assert [task_scheduler.get(task_id).result for task_id in task_ids] == [0, 2, 4, 6, 8, 10]
+        assert task_scheduler.counts()[SUCCEEDED] == 6
+
+    asyncio.run(scenario())
+
+
+def test_lanes():
+    """Tasks of one lane run in order, one at a time, while other lanes run in parallel
+    """
+
+    async def scenario():
+        task_scheduler: TaskScheduler = TaskScheduler(max_concurrency=4)
+        events: List[str] = []
+
+        async def work(name: str, delay: float) -> None:
+            events.append("start " + name)
+            await asyncio.sleep(delay)
+            events.append("end " + name)
+
+        async def fail() -> None:
+            events.append("fail")
+            raise RuntimeError("this task always fails")
+
+        task_scheduler.submit("a1", work, "a1", 0.03, lane="pull/1")
+        task_scheduler.submit("a2", fail, lane="pull/1")
+        task_scheduler.submit("a3", work, "a3", 0.0, lane="pull/1")
+        task_scheduler.submit("b1", work, "b1", 0.01, lane="pull/2")
+        assert task_scheduler.lanes == 2
+
+        await task_scheduler.join()
+        assert task_scheduler.lanes == 0
+        # pull/2 does not wait for pull/1, and a failure does not stop its lane
+        assert events == ["start a1", "start b1", "end b1", "end a1", "fail", "start a3", "end a3"]
+
+    asyncio.run(scenario())
+
+
+def test_failure_is_isolated(caplog):
+    """A task that raises is logged and marked failed, the other tasks still succeed
+    """
+
+    async def scenario():
+        task_scheduler: TaskScheduler = TaskScheduler(max_concurrency=1)
+
+        async def fail() -> None:
+            raise RuntimeError("this task always fails")
+
+        async def succeed() -> bool:
+            return True
+
+        failing_id: int = task_scheduler.submit("fail", fail)
+        succeeding_id: int = task_scheduler.submit("succeed", succeed)
+        await task_scheduler.join()
+
+        failing = task_scheduler.get(failing_id)
+        assert failing.status == FAILED
+        assert "this task always fails" in failing.error
+        assert failing.to_dict()["finished_at"] >= failing.to_dict()["started_at"]
+        assert task_scheduler.get(succeeding_id).to_dict()["result"] is True
+
+    asyncio.run(scenario())
+    assert "task [1] [fail] failed" in caplog.text
+
+
+def test_history_and_shutdown():
+    """Only the latest finished tasks are kept and shutdown cancels the tasks still running
+    """
+
+    async def scenario():
+        task_scheduler: TaskScheduler = TaskScheduler(max_concurrency=4, history=2)
+
+        async def quick() -> None:
+            pass
+
+        task_ids: List[int] = [task_scheduler.submit("quick", quick) for _ in range(4)]
+        await task_scheduler.join()
+        assert [task_scheduler.get(task_id) is None for task_id in task_ids] == [
+            True,
+            True,
+            False,
+            False,
+        ]
+
+        slow_id: int = task_scheduler.submit("slow", asyncio.sleep, 60)
+        await asyncio.sleep(0)
+        await task_scheduler.shutdown(timeout=0.01)
+        assert task_scheduler.get(slow_id).status == CANCELLED
+
+    asyncio.run(scenario())
+
+    with pytest.raises(ValueError):
+        TaskScheduler(max_concurrency=0)
@@ -0,0 +1,57 @@
+import pytest
+from typing import List
+from cam2_code_review_bot.utils import TTLCache
+
+
+class FakeClock:
+    """A clock that only moves when told to
+    """
+
+    def __init__(self):
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire():
+    """Entries are found until `ttl` seconds after they were set
+    """
+
+    clock: FakeClock = FakeClock()
+    cache: TTLCache = TTLCache(max_entries=10, ttl=5.0, clock=clock)
+
+    assert cache.add("delivery-1")
+    assert not cache.add("delivery-1")
+    cache.set("lint", {"job_id": 3})
+    clock.now = 4.9
+    assert "delivery-1" in cache
+    assert cache.get("lint") == {"job_id": 3}
+
+    clock.now = 5.0
+    assert "delivery-1" not in cache
+    assert cache.get("lint", "missing") == "missing"
+    assert len(cache) == 0
+    assert cache.add("delivery-1")
+
+
+def test_oldest_entries_are_evicted():
+    """At most `max_entries` entries are kept, setting a key again makes it the newest
+    """
+
+    clock: FakeClock = FakeClock()
+    cache: TTLCache = TTLCache(max_entries=3, ttl=60.0, clock=clock)
+    for key in ["a", "b", "c"]:
+        clock.now += 1.0
+        cache.set(key)
+    cache.set("a")
+    cache.set("d")
+
+    kept: List[str] = [key for key in ["a", "b", "c", "d"] if key in cache]
+    assert kept == ["a", "c", "d"]
+    assert len(cache) == 3
+
+    with pytest.raises(ValueError):
+        TTLCache(max_entries=0)
+    with pytest.raises(ValueError):
+        TTLCache(ttl=0.0)
@@ -0,0 +1,13 @@
+import logging
+import os
+
+from cam2_code_review_bot.jobs import WorkerPool
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    processes = os.getenv("OPTIMUS_WORKERS")
+    worker_pool = WorkerPool(
+        os.getenv("OPTIMUS_QUEUE_PATH", "optimus_jobs.sqlite"),
+        processes=int(processes) if processes else None,
+    )
+    worker_pool.run_forever()